@@ -6,7 +6,7 @@
     "category": "Technical",
     "author": "Abissnet",
     "license": "LGPL-3",
-    "depends": ["base"],
+    "depends": ["base", "ab_radius_connector"],
     "data": [
         "security/groups.xml",
         "views/res_company_ministra.xml",
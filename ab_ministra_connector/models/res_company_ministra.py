@@ -4,6 +4,7 @@ from urllib.parse import quote
 
 from odoo import models, fields, _
 from odoo.exceptions import AccessError, UserError
+from odoo.addons.ab_radius_connector.models.http_client import get_client
 
 _logger = logging.getLogger(__name__)
 
@@ -15,6 +16,70 @@ except Exception:
     HTTPBasicAuth = None
 
 
+def ministra_call(base, auth, method, resource, identifiers=None, data=None, params=None, timeout=10):
+    """Ministra REST API v1 call without env (safe from worker threads).
+
+    `identifiers` may be a list: Ministra accepts comma-separated logins/MACs on most resources.
+    Returns the 'results' key; raises UserError on transport / HTTP / API errors.
+    """
+    if requests is None:
+        raise UserError(_("Python package 'requests' is not available on this server."))
+
+    method = (method or "GET").upper()
+    resource = (resource or "").strip().strip("/")
+    if not resource:
+        raise UserError(_("Missing resource for Ministra API call."))
+
+    url = f"{base}/{resource}"
+    if identifiers:
+        if isinstance(identifiers, (list, tuple, set)):
+            identifiers = ",".join(str(x).strip() for x in identifiers)
+        else:
+            identifiers = str(identifiers).strip()
+        # URL encode the identifier to handle special characters
+        url = f"{url}/{quote(identifiers, safe='')}"
+    elif method == "POST":
+        # Some resources in docs show POST on a trailing slash
+        url = f"{url}/"
+
+    # POST/PUT are sent as form data (application/x-www-form-urlencoded), the rest as JSON
+    send_data = data if data is not None and method in ("POST", "PUT") else None
+    send_json = data if data is not None and method not in ("POST", "PUT") else None
+
+    _logger.debug("🔧 Ministra API Request: %s %r data=%s params=%s", method, url, data, params)
+    try:
+        resp = get_client("ministra", base).request(
+            method,
+            url,
+            auth=auth,
+            data=send_data,
+            json=send_json,
+            params=params or {},
+            timeout=(5, timeout),
+        )
+    except requests.exceptions.RequestException as e:
+        _logger.error("Ministra API transport error: %s %s: %s", method, url, e)
+        raise UserError(_("Ministra API transport error:\n%s") % (str(e),))
+
+    # HTTP level errors
+    if resp.status_code == 401:
+        raise UserError(_("Ministra API: 401 Unauthorized (check username/password)."))
+    if resp.status_code >= 400:
+        raise UserError(_("Ministra API HTTP error %s:\n%s") % (resp.status_code, resp.text))
+
+    try:
+        payload = resp.json()
+    except Exception:
+        raise UserError(_("Ministra API returned non-JSON response:\n%s") % (resp.text,))
+
+    _logger.debug("🔧 Ministra API Response %s: %s", resp.status_code, payload)
+
+    if payload.get("status") != "OK":
+        raise UserError(_("Ministra API error:\n%s") % (payload.get("error") or payload))
+
+    return payload.get("results")
+
+
 class ResCompanyMinistra(models.Model):
     _inherit = "res.company"
 
@@ -83,6 +148,12 @@ class ResCompanyMinistra(models.Model):
         self._check_requests_lib()
         return HTTPBasicAuth(self.ministra_api_username.strip(), self.ministra_api_password)
 
+    def _ministra_endpoint(self):
+        """(base_url, auth, timeout) for `ministra_call`, read once so worker threads need no env."""
+        self.ensure_one()
+        self._check_requests_lib()
+        return self._ministra_get_base_url(), self._ministra_auth(), int(self.ministra_api_timeout or 10)
+
     def ministra_api_call(self, method, resource, identifiers=None, data=None, params=None, timeout=None):
         """Generic Ministra REST API v1 call.
 
@@ -92,100 +163,9 @@ class ResCompanyMinistra(models.Model):
         Raises:
             UserError on any transport / HTTP / API error.
         """
-        self.ensure_one()
-        self._check_requests_lib()
-
-        method = (method or "GET").upper()
-        resource = (resource or "").strip().strip("/")
-        if not resource:
-            raise UserError(_("Missing resource for Ministra API call."))
-
-        base = self._ministra_get_base_url()
-
-        # DEBUG: Show exact characters in base and resource
-        _logger.info("🔧 Base URL: %r", base)
-        _logger.info("🔧 Resource: %r", resource)
-
-        url = f"{base}/{resource}"
-        _logger.info("🔧 URL after resource: %r", url)
-
-        if identifiers:
-            # Log raw identifier before processing
-            _logger.info("🔧 Raw identifier: %r", identifiers)
-
-            if isinstance(identifiers, (list, tuple, set)):
-                identifiers = ",".join(str(x).strip() for x in identifiers)
-            else:
-                identifiers = str(identifiers).strip()
-
-            # URL encode the identifier to handle special characters
-            encoded_id = quote(identifiers, safe='')
-            _logger.info("🔧 Stripped identifier: %r", identifiers)
-            _logger.info("🔧 URL-encoded identifier: %r", encoded_id)
-
-            url = f"{url}/{encoded_id}"
-            _logger.info("🔧 URL after identifier: %r", url)
-        else:
-            # Some resources in docs show POST on a trailing slash
-            if method == "POST":
-                url = f"{url}/"
-                _logger.info("🔧 URL after trailing slash: %r", url)
-
-        timeout = int(timeout or self.ministra_api_timeout or 10)
-
-        # DEBUG: Log the request details (repr to see invisible chars)
-        _logger.info("🔧 Ministra API Request: %s %r", method, url)
-        _logger.info("🔧 Ministra API Request (str): %s %s", method, url)
-        _logger.info("🔧 Data: %s", data)
-        _logger.info("🔧 Params: %s", params)
-
-        # Prepare data - Try form-encoded format for POST/PUT
-        if data is not None and method in ('POST', 'PUT'):
-            # Send as form data (application/x-www-form-urlencoded)
-            _logger.info("🔧 Sending as form data")
-            send_data = data
-            send_json = None
-        elif data is not None:
-            # Send as JSON for other methods
-            _logger.info("🔧 Sending as JSON")
-            send_data = None
-            send_json = data
-        else:
-            send_data = None
-            send_json = None
-
-        try:
-            resp = requests.request(
-                method=method,
-                url=url,
-                auth=self._ministra_auth(),
-                data=send_data if send_data is not None else None,
-                json=send_json if send_json is not None else None,
-                params=params or {},
-                timeout=timeout,
-            )
-            _logger.info("🔧 Response Status: %s", resp.status_code)
-        except requests.exceptions.RequestException as e:
-            _logger.exception("Ministra API transport error: %s", e)
-            raise UserError(_("Ministra API transport error:\n%s") % (str(e),))
-
-        # HTTP level errors
-        if resp.status_code == 401:
-            raise UserError(_("Ministra API: 401 Unauthorized (check username/password)."))
-        if resp.status_code >= 400:
-            raise UserError(_("Ministra API HTTP error %s:\n%s") % (resp.status_code, resp.text))
-
-        try:
-            payload = resp.json()
-        except Exception:
-            raise UserError(_("Ministra API returned non-JSON response:\n%s") % (resp.text,))
-
-        _logger.info("🔧 Response: %s", payload)
-
-        if payload.get("status") != "OK":
-            raise UserError(_("Ministra API error:\n%s") % (payload.get("error") or payload))
-
-        return payload.get("results")
+        base, auth, default_timeout = self._ministra_endpoint()
+        return ministra_call(base, auth, method, resource, identifiers=identifiers, data=data,
+                             params=params, timeout=int(timeout or default_timeout))
 
     # ------------------------
     # UI Actions
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Shared outbound HTTP client for the external integrations (GenieACS, Ministra, Superset).
+
+One `HttpUpstream` per (service, base URL), kept for the life of the worker process:
+
+    client = get_client('genieacs', company.gasc_url, timeout=(5, 30))
+    resp = client.request('GET', f'{company.gasc_url}/devices/', params=..., auth=...)
+
+- Keep-alive connection pool per upstream (requests.Session + HTTPAdapter).
+- Default (connect, read) timeouts, overridable per call.
+- Bounded retries with exponential backoff + jitter, only for idempotent methods
+  (or when the caller passes idempotent=True) on transport errors and 502/503/504/429.
+- Circuit breaker per upstream: after `failure_threshold` consecutive failures calls
+  fail fast with CircuitOpenError for `reset_timeout` seconds, then one trial call
+  is let through (half-open).
+- Per-upstream metrics (calls, errors, retries, latency) via `stats()`.
+
+The session does not keep cookies: auth/cookies are passed explicitly per call, so
+companies/threads sharing an upstream never see each other's state.
+"""
+import http.cookiejar
+import logging
+import random
+import threading
+import time
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except Exception:
+    requests = None
+    HTTPAdapter = None
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = (5, 30)           # (connect, read) seconds
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.3               # seconds, doubled on every retry
+DEFAULT_POOL_SIZE = 10
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30          # seconds the circuit stays open
+SLOW_CALL_SECONDS = 5
+
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+if requests is not None:
+    class CircuitOpenError(requests.exceptions.ConnectionError):
+        """Upstream circuit is open; the call was not sent."""
+else:
+    class CircuitOpenError(Exception):
+        """Upstream circuit is open; the call was not sent."""
+
+
+class HttpUpstream:
+    """Pooled session + retry policy + circuit breaker + metrics for one upstream."""
+
+    def __init__(self, name, base_url, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                 backoff=DEFAULT_BACKOFF, pool_size=DEFAULT_POOL_SIZE,
+                 failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT):
+        if requests is None:
+            raise RuntimeError("Python package 'requests' is not available on this server.")
+        self.name = name
+        self.base_url = base_url
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.session = requests.Session()
+        self.session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self.metrics = {
+            'calls': 0,
+            'errors': 0,
+            'retries': 0,
+            'rejected': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0,
+            'last_error': None,
+        }
+
+    # ------------------------------------------------------------
+    # Circuit breaker
+    # ------------------------------------------------------------
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def _before_call(self):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return
+            if state == 'half_open' and not self._trial_running:
+                self._trial_running = True
+                return
+            self.metrics['rejected'] += 1
+        raise CircuitOpenError(
+            "%s (%s) is unavailable, retry in a few seconds (circuit open)" % (self.name, self.base_url))
+
+    def _record(self, ok, elapsed_ms, error=None):
+        with self._lock:
+            self._trial_running = False
+            m = self.metrics
+            m['calls'] += 1
+            m['total_ms'] += elapsed_ms
+            m['max_ms'] = max(m['max_ms'], elapsed_ms)
+            if ok:
+                self._failures = 0
+                self._opened_at = None
+                return
+            m['errors'] += 1
+            m['last_error'] = error
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    _logger.warning("⚡ %s circuit opened after %s failures (%s): %s",
+                                    self.name, self._failures, self.base_url, error)
+                self._opened_at = time.monotonic()
+
+    # ------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------
+    def request(self, method, url, idempotent=None, retries=None, timeout=None, **kwargs):
+        """Sends one request through the pool; returns the `requests.Response`.
+
+        HTTP error statuses are returned, not raised (callers keep their own
+        status handling); transport errors and an open circuit raise
+        `requests.exceptions.RequestException` subclasses.
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        attempts = 1 + ((self.retries if retries is None else retries) if idempotent else 0)
+        kwargs['timeout'] = timeout or self.timeout
+
+        for attempt in range(attempts):
+            self._before_call()
+            start = time.monotonic()
+            try:
+                resp = self.session.request(method, url, **kwargs)
+            except requests.exceptions.RequestException as e:
+                self._record(False, (time.monotonic() - start) * 1000, str(e))
+                if attempt + 1 >= attempts:
+                    raise
+            else:
+                elapsed_ms = (time.monotonic() - start) * 1000
+                failed = resp.status_code >= 500 or resp.status_code == 429
+                self._record(not failed, elapsed_ms, failed and "HTTP %s" % resp.status_code or None)
+                if elapsed_ms > SLOW_CALL_SECONDS * 1000:
+                    _logger.warning("🐢 %s %s %s took %.0f ms", self.name, method, url, elapsed_ms)
+                if resp.status_code not in RETRY_STATUSES or attempt + 1 >= attempts:
+                    return resp
+                resp.close()
+
+            with self._lock:
+                self.metrics['retries'] += 1
+            time.sleep(self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    def stats(self):
+        with self._lock:
+            m = dict(self.metrics)
+        m['avg_ms'] = round(m['total_ms'] / m['calls'], 1) if m['calls'] else 0.0
+        m['total_ms'] = round(m['total_ms'], 1)
+        m['max_ms'] = round(m['max_ms'], 1)
+        m['state'] = self.state
+        m['base_url'] = self.base_url
+        return m
+
+
+def get_client(name, base_url, **config):
+    """Returns the process-wide client for (name, base_url), creating it on first use.
+
+    `config` (timeout, retries, pool_size, ...) only applies when the client is created;
+    per-call timeouts are passed to `request()`.
+    """
+    key = (name, (base_url or '').rstrip('/'))
+    client = _CLIENTS.get(key)
+    if client is None:
+        with _CLIENTS_LOCK:
+            client = _CLIENTS.get(key)
+            if client is None:
+                client = _CLIENTS[key] = HttpUpstream(name, key[1], **config)
+    return client
+
+
+def stats():
+    """Per-upstream metrics: {'genieacs https://...': {...}}."""
+    return {"%s %s" % key: client.stats() for key, client in list(_CLIENTS.items())}
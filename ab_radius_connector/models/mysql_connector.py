@@ -7,10 +7,123 @@ _logger = logging.getLogger(__name__)
 
 try:
     import pymysql
-    from pymysql.cursors import DictCursor
+    from pymysql.cursors import DictCursor, SSDictCursor
 except Exception:
     pymysql = None
     DictCursor = None
+    SSDictCursor = None
+
+# Per-row / per-statement overhead used when estimating packet size
+_ROW_OVERHEAD = 8
+_STATEMENT_OVERHEAD = 512
+
+
+# ------------------------------------------------------------
+# Statement builders / cursor helpers
+#
+# Shared by the mysql.connector bulk methods (own connection, commit per chunk)
+# and by callers that hold an open cursor and control the transaction
+# themselves (e.g. asr_radius_manager on company._get_direct_conn()).
+# ------------------------------------------------------------
+def _quote(name):
+    return "`{}`".format(name)
+
+
+def _placeholders(count):
+    return ', '.join(['%s'] * count)
+
+
+def insert_query(table, fields_list, rows, ignore=False, update_fields=None):
+    """(query, params) of one multi-row INSERT [IGNORE] [... ON DUPLICATE KEY UPDATE]."""
+    row_placeholder = '(' + _placeholders(len(fields_list)) + ')'
+    query = "INSERT {}INTO {} ({}) VALUES ".format(
+        'IGNORE ' if ignore else '', _quote(table), ', '.join(_quote(f) for f in fields_list)
+    ) + ', '.join([row_placeholder] * len(rows))
+    if update_fields:
+        query += " ON DUPLICATE KEY UPDATE " + ', '.join(
+            "{0} = VALUES({0})".format(_quote(f)) for f in update_fields
+        )
+    return query, tuple(v for row in rows for v in row)
+
+
+def delete_in_query(table, key, values, where=None):
+    """(query, params) of DELETE ... WHERE key IN (...) [AND col = %s ...]."""
+    where = where or {}
+    query = "DELETE FROM {} WHERE {} IN ({})".format(_quote(table), _quote(key), _placeholders(len(values)))
+    query += ''.join(" AND {} = %s".format(_quote(k)) for k in where)
+    return query, tuple(values) + tuple(where.values())
+
+
+def keyset_query(table, fields, keys, last=None, where=None, page_size=1000, binary=()):
+    """(query, params) of one keyset page ordered by `keys`.
+
+    last: key values of the previous page's last row (None for the first page).
+    binary: key columns compared and ordered byte-wise (BINARY), so the order
+    matches Python string ordering.
+    """
+    def col(k):
+        return "BINARY " + _quote(k) if k in binary else _quote(k)
+
+    cols = ', '.join(_quote(f) if f != '*' else '*' for f in fields)
+    parts, params = [], []
+    for k, v in (where or {}).items():
+        parts.append("{} = %s".format(_quote(k)))
+        params.append(v)
+    if last is not None:
+        # (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...: stays index-friendly, unlike row comparison
+        ors = []
+        for i, k in enumerate(keys):
+            ands = ["{} = {}".format(col(p), "BINARY %s" if p in binary else "%s") for p in keys[:i]]
+            ands.append("{} > {}".format(col(k), "BINARY %s" if k in binary else "%s"))
+            ors.append('(' + ' AND '.join(ands) + ')')
+            params.extend(last[:i + 1])
+        parts.append('(' + ' OR '.join(ors) + ')')
+    query = "SELECT {} FROM {}".format(cols, _quote(table))
+    if parts:
+        query += " WHERE " + " AND ".join(parts)
+    query += " ORDER BY {} LIMIT {}".format(', '.join(col(k) for k in keys), int(page_size))
+    return query, tuple(params)
+
+
+def insert_rows(cursor, table, fields_list, rows, ignore=False, update_fields=None):
+    """Run one multi-row INSERT on an open cursor; returns rowcount (0 when rows is empty)."""
+    rows = [tuple(r) for r in rows]
+    if not rows:
+        return 0
+    cursor.execute(*insert_query(table, fields_list, rows, ignore=ignore, update_fields=update_fields))
+    return cursor.rowcount
+
+
+def delete_in(cursor, table, key, values, where=None):
+    """Run DELETE ... WHERE key IN (...) on an open cursor; returns rowcount."""
+    values = list(dict.fromkeys(v for v in values if v is not None))
+    if not values:
+        return 0
+    cursor.execute(*delete_in_query(table, key, values, where=where))
+    return cursor.rowcount
+
+
+def iter_keyset(cursor, table, fields, keys, where=None, page_size=1000, start_after=None, binary=()):
+    """Stream rows ordered by `keys` with keyset paging on an open cursor.
+
+    Never uses OFFSET and never holds more than one page; with an unbuffered
+    (SS) cursor the page itself is streamed too. `keys` must identify a row and
+    be part of the selected fields (or fields is ['*']).
+    """
+    keys = tuple(keys)
+    page_size = max(int(page_size or 1000), 1)
+    last = tuple(start_after) if start_after is not None else None
+    while True:
+        cursor.execute(*keyset_query(table, fields, keys, last=last, where=where,
+                                     page_size=page_size, binary=binary))
+        fetch = getattr(cursor, 'fetchall_unbuffered', None) or cursor.fetchall
+        fetched = 0
+        for row in fetch():
+            fetched += 1
+            last = tuple(row[k] for k in keys)
+            yield row
+        if fetched < page_size:
+            return
 
 
 class MysqlConnector(models.Model):
@@ -31,6 +144,17 @@ class MysqlConnector(models.Model):
     write_timeout = fields.Integer(default=10)
     autocommit = fields.Boolean("Auto Commit", default=False)
 
+    # Bulk operations
+    batch_size = fields.Integer(
+        default=1000,
+        help="Maximum number of rows per multi-row statement.",
+    )
+    max_packet_bytes = fields.Integer(
+        default=1024 * 1024,
+        help="Upper bound for a single statement size in bytes. Keep it below the "
+             "server max_allowed_packet; bulk statements are split to respect it.",
+    )
+
     # Stats / status
     query_count = fields.Integer(readonly=True, default=0)
     last_test_success = fields.Boolean(readonly=True)
@@ -64,6 +188,95 @@ class MysqlConnector(models.Model):
         except Exception as e:
             raise UserError(_("Connection failed: %s") % e)
 
+    def _bump_query_count(self, count=1):
+        self.sudo().write({'query_count': self.query_count + count})
+
+    @staticmethod
+    def _estimate_row_bytes(row):
+        size = _ROW_OVERHEAD
+        for value in row:
+            if value is None:
+                size += 4
+            elif isinstance(value, (bytes, bytearray)):
+                size += 2 * len(value) + 3
+            else:
+                # utf8mb4 bytes, not characters: max_packet_bytes is a byte limit
+                size += len(str(value).encode('utf-8')) + 3
+        return size
+
+    def _iter_chunks(self, rows, base_bytes=0):
+        """Split rows (tuples) into chunks bounded by batch_size and max_packet_bytes."""
+        max_rows = max(int(self.batch_size or 1000), 1)
+        max_bytes = max(int(self.max_packet_bytes or 1024 * 1024), 1024)
+        budget = max_bytes - base_bytes - _STATEMENT_OVERHEAD
+        chunk, chunk_bytes = [], 0
+        for row in rows:
+            row_bytes = self._estimate_row_bytes(row)
+            if chunk and (len(chunk) >= max_rows or chunk_bytes + row_bytes > budget):
+                yield chunk
+                chunk, chunk_bytes = [], 0
+            chunk.append(row)
+            chunk_bytes += row_bytes
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def _normalize_rows(rows, fields_list=None):
+        """Return (fields_list, list of tuples) from a list of dicts or tuples."""
+        rows = list(rows or [])
+        if not rows:
+            return fields_list or [], []
+        if isinstance(rows[0], dict):
+            fields_list = fields_list or list(rows[0].keys())
+            return fields_list, [tuple(r.get(f) for f in fields_list) for r in rows]
+        if not fields_list:
+            raise UserError(_("fields_list is required when rows are tuples"))
+        return fields_list, [tuple(r) for r in rows]
+
+    def _execute_chunked(self, rows, build_query, base_bytes=0, many=False):
+        """Run build_query(chunk) -> (query, params) for every chunk on one connection.
+
+        Each chunk is committed separately so a failure only rolls back the
+        chunk that raised. With many=True the params are a sequence of rows
+        sent through cursor.executemany(). Returns the total affected rowcount.
+        """
+        self.ensure_one()
+        total = 0
+        statements = 0
+        connection = None
+        query = None
+        try:
+            connection = self._get_connection()
+            for chunk in self._iter_chunks(rows, base_bytes=base_bytes):
+                query, params = build_query(chunk)
+                with connection.cursor() as cursor:
+                    if many:
+                        cursor.executemany(query, params)
+                    else:
+                        cursor.execute(query, params)
+                    total += cursor.rowcount
+                if not self.autocommit:
+                    connection.commit()
+                statements += 1
+            return total
+        except Exception as e:
+            if connection and not self.autocommit:
+                try:
+                    connection.rollback()
+                except Exception:
+                    pass
+            _logger.error("%s: Bulk query failed after %s chunk(s): %s\nQuery: %.500s",
+                          self.name, statements, e, query)
+            raise UserError(_("Bulk query execution failed: %s") % e)
+        finally:
+            if statements:
+                self._bump_query_count(statements)
+            if connection:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+
     def _execute_query(self, query, params=None, fetch=True, commit=True):
         """Low-level execution with optional fetch & commit."""
         self.ensure_one()
@@ -186,3 +399,102 @@ class MysqlConnector(models.Model):
         params = tuple(where.values())
         query = "DELETE FROM `{}` WHERE {}".format(table, " AND ".join(parts))
         return self._execute_query(query, params=params, fetch=False, commit=True)
+
+    # ----------------------------- Bulk -------------------------------------
+    def create_records(self, table, rows, fields_list=None, ignore=False):
+        """Multi-row INSERT, chunked by batch_size/max_packet_bytes.
+
+        rows: list of dicts (same keys) or tuples ordered as fields_list.
+        Returns the total affected rowcount.
+        """
+        self.ensure_one()
+        fields_list, rows = self._normalize_rows(rows, fields_list)
+        if not rows:
+            return 0
+        head, _params = insert_query(table, fields_list, [], ignore=ignore)
+        return self._execute_chunked(
+            rows, lambda chunk: insert_query(table, fields_list, chunk, ignore=ignore),
+            base_bytes=len(head.encode('utf-8')))
+
+    def upsert_records(self, table, rows, fields_list=None, update_fields=None):
+        """Multi-row INSERT ... ON DUPLICATE KEY UPDATE.
+
+        update_fields defaults to every inserted column; the table must have a
+        PRIMARY/UNIQUE key for the upsert to match existing rows.
+        """
+        self.ensure_one()
+        fields_list, rows = self._normalize_rows(rows, fields_list)
+        if not rows:
+            return 0
+        update_fields = update_fields or fields_list
+        head, _params = insert_query(table, fields_list, [], update_fields=update_fields)
+        return self._execute_chunked(
+            rows, lambda chunk: insert_query(table, fields_list, chunk, update_fields=update_fields),
+            base_bytes=len(head.encode('utf-8')))
+
+    def execute_many(self, query, seq_params):
+        """cursor.executemany() in chunks on a single connection.
+
+        PyMySQL rewrites plain ``INSERT ... VALUES (...)`` statements into
+        multi-row inserts; other statements are sent one by one but still
+        share the connection and the per-chunk transaction.
+        """
+        self.ensure_one()
+        rows = [tuple(p) for p in (seq_params or [])]
+        if not rows:
+            return 0
+        return self._execute_chunked(rows, lambda chunk: (query, chunk),
+                                     base_bytes=len(query.encode('utf-8')), many=True)
+
+    def delete_records(self, table, key, values, where=None):
+        """DELETE rows whose `key` is in values, chunked into ``IN (...)`` lists.
+
+        where: optional extra equals filter applied to every chunk.
+        """
+        self.ensure_one()
+        values = list(dict.fromkeys(v for v in (values or []) if v is not None))
+        if not values:
+            return 0
+        head, _params = delete_in_query(table, key, [], where=where)
+
+        def build(chunk):
+            return delete_in_query(table, key, [row[0] for row in chunk], where=where)
+
+        return self._execute_chunked([(v,) for v in values], build, base_bytes=len(head.encode('utf-8')))
+
+    def iter_records(self, table, key='id', where=None, fields=None, batch_size=None, start_after=None):
+        """Yield rows one by one at constant memory.
+
+        Uses an unbuffered SSDictCursor and keyset paging on `key`
+        (``WHERE key > last ORDER BY key LIMIT n``) over a single connection,
+        so it never relies on OFFSET and never holds more than one page.
+        `key` must be unique and must be part of the selected fields.
+        """
+        self.ensure_one()
+        self._check_lib()
+        page_size = max(int(batch_size or self.batch_size or 1000), 1)
+        fields = fields or ['*']
+        if '*' not in fields and key not in fields:
+            fields = list(fields) + [key]
+        start = (start_after,) if start_after is not None else None
+
+        connection = self._get_connection()
+        rows = 0
+        try:
+            cursor = connection.cursor(SSDictCursor)
+            try:
+                for row in iter_keyset(cursor, table, fields, (key,), where=where,
+                                       page_size=page_size, start_after=start):
+                    rows += 1
+                    yield row
+            finally:
+                cursor.close()
+        except pymysql.MySQLError as e:
+            _logger.error("%s: iter_records failed on %s: %s", self.name, table, e)
+            raise UserError(_("Query execution failed: %s") % e)
+        finally:
+            try:
+                connection.close()
+            except Exception:
+                pass
+            self._bump_query_count(rows // page_size + 1)
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Process-wide pool of PyMySQL connections, keyed on the connection parameters.
+
+    with mysql_connection(params, read_timeout=10, read_only=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT ... WHERE username = %s", (login,))
+            rows = cur.fetchall()
+
+- Connections are reused across requests of the same worker (no TCP/auth per query).
+- A borrowed connection is pinged first; dead or long-idle connections are replaced.
+- `read_timeout` is part of the pool key, so every query class gets its own socket timeout.
+- `read_only=True` opens the sessions with SET SESSION TRANSACTION READ ONLY.
+- A connection whose borrower raised is closed instead of returned.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import pymysql
+    from pymysql.cursors import DictCursor
+except Exception:
+    pymysql = None
+    DictCursor = None
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_IDLE = 4            # idle connections kept per pool
+DEFAULT_IDLE_TIMEOUT = 300      # seconds before an idle connection is dropped
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+class MysqlPool:
+
+    def __init__(self, params, read_timeout=10, connect_timeout=5, read_only=False,
+                 max_idle=DEFAULT_MAX_IDLE, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.params = dict(params)
+        self.read_timeout = read_timeout
+        self.connect_timeout = connect_timeout
+        self.read_only = read_only
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self._idle = []                 # [(conn, released_at)]
+        self._lock = threading.Lock()
+        self.created = self.reused = 0
+
+    def _connect(self):
+        if pymysql is None:
+            raise RuntimeError("PyMySQL is not available. Please install 'PyMySQL' python package.")
+        self.created += 1
+        return pymysql.connect(
+            host=self.params['host'],
+            port=int(self.params.get('port') or 3306),
+            user=self.params['user'],
+            password=self.params.get('password') or '',
+            database=self.params['database'],
+            charset=self.params.get('charset') or 'utf8mb4',
+            cursorclass=DictCursor,
+            connect_timeout=self.connect_timeout,
+            read_timeout=self.read_timeout,
+            autocommit=True,
+            init_command="SET SESSION TRANSACTION READ ONLY" if self.read_only else None,
+        )
+
+    def borrow(self):
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, released_at = self._idle.pop()
+            if now - released_at > self.idle_timeout:
+                self._close(conn)
+                continue
+            try:
+                conn.ping(reconnect=False)
+                self.reused += 1
+                return conn
+            except Exception:
+                self._close(conn)
+        return self._connect()
+
+    def release(self, conn, healthy=True):
+        if healthy:
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append((conn, time.monotonic()))
+                    return
+        self._close(conn)
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def get_pool(params, read_timeout=10, connect_timeout=5, read_only=False):
+    key = (
+        params['host'], int(params.get('port') or 3306), params['user'], params.get('password') or '',
+        params['database'], read_timeout, read_only,
+    )
+    pool = _POOLS.get(key)
+    if pool is None:
+        with _POOLS_LOCK:
+            pool = _POOLS.get(key)
+            if pool is None:
+                pool = _POOLS[key] = MysqlPool(params, read_timeout=read_timeout,
+                                               connect_timeout=connect_timeout, read_only=read_only)
+    return pool
+
+
+@contextmanager
+def mysql_connection(params, read_timeout=10, connect_timeout=5, read_only=False):
+    pool = get_pool(params, read_timeout=read_timeout, connect_timeout=connect_timeout, read_only=read_only)
+    conn = pool.borrow()
+    healthy = False
+    try:
+        yield conn
+        healthy = True
+    finally:
+        pool.release(conn, healthy=healthy)
@@ -2,6 +2,8 @@
 from odoo import models, fields, _
 from odoo.exceptions import AccessError, UserError
 
+from . import http_client
+
 try:
     import pymysql
     from pymysql.cursors import DictCursor
@@ -203,6 +205,28 @@ class ResCompanyRadius(models.Model):
             self.sudo().write({'fr_last_test_ok': False, 'fr_last_error': str(e)})
             raise UserError(_('FreeRADIUS connection failed:\n%s') % (str(e),))
 
+    def action_http_upstream_stats(self):
+        """Latency/error metrics of the shared HTTP client (this worker process only)."""
+        self._check_radius_admin()
+        lines = [
+            _('%(name)s [%(state)s]: %(calls)s calls, %(errors)s errors, %(retries)s retries, '
+              '%(rejected)s rejected, avg %(avg)s ms, max %(max)s ms') % {
+                'name': name, 'state': s['state'], 'calls': s['calls'], 'errors': s['errors'],
+                'retries': s['retries'], 'rejected': s['rejected'], 'avg': s['avg_ms'], 'max': s['max_ms'],
+            }
+            for name, s in sorted(http_client.stats().items())
+        ]
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('HTTP Upstreams'),
+                'message': '\n'.join(lines) or _('No outbound HTTP calls in this worker yet.'),
+                'type': 'info',
+                'sticky': True,
+            }
+        }
+
     def fr_get_mysql_params(self):
         self.ensure_one()
         if self.fr_db_host and self.fr_db_name and self.fr_db_user:
@@ -9,14 +9,20 @@
     'depends': ['ab_radius_connector','asr_radius_manager','crm_abissnet','radius_odoo_integration'],
     'data': [
         'security/ir.model.access.csv',
+        'data/ir_cron.xml',
         'views/olt_show_mac_wizard_views.xml',
         'views/olt_onu_uncfg_wizard_views.xml',
         'views/olt_quick_register_wizard_views.xml',
+        'views/olt_batch_register_wizard_views.xml',
         'views/olt_command_test_wizard_views.xml',  # ← NEW
         'views/asr_radius_user_inherit.xml',
         'views/asr_radius_user_olt_views.xml',  # ← ONU delete functionality
         'views/res_partner_olt_views.xml',  # ← ONU delete for res.partner
         'views/crm_access_device_inherit.xml',
+        'views/olt_fleet_command_views.xml',
+        'views/olt_config_snapshot_views.xml',
+        'views/olt_mac_entry_views.xml',
+        'views/olt_optical_views.xml',
     ],
     'assets': {
         'web.assets_backend': [
@@ -1,3 +1,10 @@
 # -*- coding: utf-8 -*-
+from . import olt_session_pool
 from . import asr_radius_user_olt
-from . import res_partner_olt
\ No newline at end of file
+from . import res_partner_olt
+from . import crm_access_device_olt
+from . import olt_fleet_command
+from . import olt_catalog
+from . import olt_config_snapshot
+from . import olt_mac_entry
+from . import olt_optical
@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
 import re
-import telnetlib
-import time
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 
+from .olt_scheduler import PRIORITY_WRITE
+from .olt_session_pool import olt_session
+
 
 class AsrRadiusUserOLT(models.Model):
     _inherit = 'asr.radius.user'
@@ -45,55 +46,22 @@ class AsrRadiusUserOLT(models.Model):
         # Build delete command
         delete_cmd = f"conf t;interface {interface_for_cmd};no onu {slot};exit;exit"
 
-        # Execute via telnet
+        # Execute via telnet (sesion nga pool-i i OLT)
         olt_ip = self.access_device_id.ip_address.strip()
 
-        try:
-            tn = telnetlib.Telnet(olt_ip, 23, timeout=12)
-        except Exception as e:
-            raise UserError(_('Telnet connection failed to %s: %s') % (olt_ip, str(e)))
+        commands = [c.strip() for c in delete_cmd.split(';') if c.strip()]
+        with olt_session(olt_ip, user, pwd, timeout=12, priority=PRIORITY_WRITE) as sess:
+            results = sess.run(commands)
 
-        try:
-            # Login
-            idx, dummy1, dummy2 = tn.expect([b'Username:', b'Login:', b'login:'], 12)
-            if idx == -1:
-                raise UserError(_('Did not receive Username prompt from %s') % olt_ip)
-            tn.write((user + '\n').encode('ascii', errors='ignore'))
-            time.sleep(0.3)
-
-            idx, dummy1, dummy2 = tn.expect([b'Password:', b'password:'], 12)
-            if idx == -1:
-                raise UserError(_('Did not receive Password prompt from %s') % olt_ip)
-            tn.write((pwd + '\n').encode('ascii', errors='ignore'))
-            time.sleep(0.6)
-
-            idx, dummy1, text = tn.expect([
-                b'>', b'#', b'$',
-                b'Username:',
-                b'Authentication failed',
-                b'Login incorrect',
-                b'Access denied'
-            ], 12)
-            if idx >= 3 or idx == -1:
-                raise UserError(_('Authentication FAILED for %s@%s') % (user, olt_ip))
-
-            # Execute delete commands
-            commands = [c.strip() for c in delete_cmd.split(';') if c.strip()]
-            for cmd in commands:
-                tn.write((cmd + '\n').encode('ascii', errors='ignore'))
-                time.sleep(0.35)
-
-            # Exit
-            try:
-                tn.write(b'exit\n'); time.sleep(0.2)
-                tn.write(b'quit\n')
-            except Exception:
-                pass
-        finally:
-            try:
-                tn.close()
-            except Exception:
-                pass
+        failed = [r for r in results if not r['ok']]
+        if failed:
+            raise UserError(_('ONU delete failed on %(ip)s.\nCommand: %(cmd)s\nError: %(err)s') % {
+                'ip': olt_ip,
+                'cmd': failed[0]['command'],
+                'err': failed[0]['error'],
+            })
+
+        self.env['olt.onu.slot']._forget(self.access_device_id, interface, slot)
 
         # Clear ONU fields
         self.write({
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import fields, models, _
+from odoo.exceptions import UserError
+
+from .olt_scheduler import DEFAULT_MAX_SESSIONS, PRIORITY_INTERACTIVE
+from .olt_session_pool import SESSION_POOL, DEFAULT_IDLE_TIMEOUT, DEFAULT_MAX_IDLE, olt_session
+
+_logger = logging.getLogger(__name__)
+
+
+class CrmAccessDeviceOLT(models.Model):
+    _inherit = 'crm.access.device'
+
+    telnet_max_sessions = fields.Integer(
+        string="Max Telnet Sessions", default=DEFAULT_MAX_SESSIONS,
+        help="Sa sesione vty njëkohësisht lejon Odoo në këtë OLT, të numëruara për të gjithë "
+             "worker-at (edhe sesionet idle në pool); punët e tjera presin në radhë "
+             "(shkrimet para polling-ut).")
+    telnet_max_idle = fields.Integer(
+        string="Max Idle Telnet Sessions", default=DEFAULT_MAX_IDLE,
+        help="Sa sesione të loguara mbahen warm në këtë OLT për të gjithë worker-at bashkë "
+             "(0 = mbyll sesionin pas çdo përdorimi). Sesionet idle zënë vty, ndaj mbajeni të vogël.")
+
+    def _olt_session(self, timeout=10, priority=PRIORITY_INTERACTIVE):
+        """Context manager: sesion Telnet i loguar nga pool-i për këtë OLT.
+
+            with device._olt_session() as sess:
+                out = sess.run_show('show gpon onu uncfg')
+        """
+        self.ensure_one()
+        if not self.ip_address:
+            raise UserError(_('OLT missing Management IP. Set it on the Access Device form.'))
+
+        ICP = self.env['ir.config_parameter'].sudo()
+        try:
+            SESSION_POOL.idle_timeout = int(ICP.get_param('asr_olt_telnet.session_idle_timeout',
+                                                          DEFAULT_IDLE_TIMEOUT))
+        except (TypeError, ValueError):
+            SESSION_POOL.idle_timeout = DEFAULT_IDLE_TIMEOUT
+
+        user, pwd = self.get_telnet_credentials()
+        return olt_session(self.ip_address.strip(), user, pwd, timeout=timeout, priority=priority)
+
+    def action_reset_olt_sessions(self):
+        """Mbyll sesionet Telnet warm të këtyre OLT-ve (p.sh. pas ndryshimit të password-it)."""
+        closed = 0
+        for rec in self.filtered('ip_address'):
+            closed += SESSION_POOL.close_all(host=rec.ip_address.strip())
+        _logger.info('🔌 Closed %d pooled OLT session(s) for %s', closed, self.mapped('name'))
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Telnet Sessions Reset'),
+                'message': _('%d idle session(s) closed.') % closed,
+                'type': 'info',
+                'sticky': False,
+            }
+        }
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import re
+from datetime import timedelta
+
+from odoo import api, fields, models, _
+
+from .olt_scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_TTL_HOURS = 24
+
+# Profile sistemi që nuk ofrohen si shpejtësi në wizard
+_SYSTEM_PROFILES = ('default', 'mcast', 'multicast', 'voip')
+
+_TCONT_NAME_RE = re.compile(r'Name\s*:(\S+)', re.IGNORECASE)
+_ONU_TYPE_RE = re.compile(r'onu\s*type(?:\s*name)?\s*:\s*(\S+)', re.IGNORECASE)
+_VLAN_TOKEN_RE = re.compile(r'\b(\d{1,4})(?:\s*-\s*(\d{1,4}))?\b')
+
+
+def _parse_tcont_profiles(output):
+    profiles = []
+    for line in (output or '').splitlines():
+        m = _TCONT_NAME_RE.search(line)
+        if m:
+            name = m.group(1).strip()
+            if name.lower() not in _SYSTEM_PROFILES and name not in profiles:
+                profiles.append(name)
+    return profiles
+
+
+def _parse_onu_types(output):
+    types = []
+    for line in (output or '').splitlines():
+        m = _ONU_TYPE_RE.search(line)
+        if m and m.group(1) not in types:
+            types.append(m.group(1))
+    return types
+
+
+def _parse_vlans(output):
+    """'show vlan summary' → listë VLAN ID (p.sh. "1,100-102,1604" → [1, 100, 101, 102, 1604])."""
+    vlans = set()
+    for line in (output or '').splitlines():
+        if ':' not in line or 'vlan' not in line.lower():
+            continue
+        for m in _VLAN_TOKEN_RE.finditer(line.split(':', 1)[1]):
+            lo = int(m.group(1))
+            hi = int(m.group(2) or lo)
+            if 1 <= lo <= hi <= 4094:
+                vlans.update(range(lo, hi + 1))
+    return sorted(vlans)
+
+
+# key → (parser, fusha JSON ku ruhet)
+_CATALOG_ITEMS = {
+    'speed_profiles': (_parse_tcont_profiles, 'olt_speed_profiles_json'),
+    'onu_types': (_parse_onu_types, 'olt_onu_types_json'),
+    'vlans': (_parse_vlans, 'olt_vlans_json'),
+}
+
+
+class CrmAccessDeviceCatalog(models.Model):
+    _inherit = 'crm.access.device'
+
+    olt_speed_profiles_json = fields.Text(string="Speed Profiles (cache)", readonly=True)
+    olt_onu_types_json = fields.Text(string="ONU Types (cache)", readonly=True)
+    olt_vlans_json = fields.Text(string="VLANs on OLT (cache)", readonly=True)
+    olt_catalog_date = fields.Datetime(string="Catalog Refreshed", readonly=True)
+    olt_catalog_error = fields.Text(string="Catalog Refresh Errors", readonly=True)
+    olt_catalog_summary = fields.Text(string="OLT Catalog", compute='_compute_olt_catalog_summary')
+
+    @api.depends('olt_speed_profiles_json', 'olt_onu_types_json', 'olt_vlans_json')
+    def _compute_olt_catalog_summary(self):
+        for rec in self:
+            profiles = rec._olt_catalog_list('olt_speed_profiles_json')
+            types = rec._olt_catalog_list('olt_onu_types_json')
+            vlans = rec._olt_catalog_list('olt_vlans_json')
+            rec.olt_catalog_summary = '\n'.join([
+                _('Speed profiles: %s') % (', '.join(profiles) or '-'),
+                _('ONU types: %s') % (', '.join(types) or '-'),
+                _('VLANs: %s') % (', '.join(str(v) for v in vlans) or '-'),
+            ])
+
+    def _olt_catalog_list(self, fname):
+        try:
+            return json.loads(self[fname] or '[]')
+        except ValueError:
+            return []
+
+    @api.model
+    def _olt_catalog_ttl(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        try:
+            hours = float(ICP.get_param('asr_olt_telnet.catalog_ttl_hours', DEFAULT_CATALOG_TTL_HOURS))
+        except (TypeError, ValueError):
+            hours = DEFAULT_CATALOG_TTL_HOURS
+        return timedelta(hours=hours)
+
+    def _olt_catalog_command(self, key):
+        """Komanda read-only për secilin element të katalogut sipas modelit të OLT (None = s'mbështetet)."""
+        self.ensure_one()
+        if (self.manufacturer or '').upper() == 'HUAWEI':
+            return None
+        model = (self.model or '').upper()
+        is_c600 = 'C600' in model or 'C650' in model or 'C680' in model
+        return {
+            'speed_profiles': 'show gpon profile tcont',
+            'onu_types': 'show pon onu-type' if is_c600 else 'show onu-type gpon',
+            'vlans': 'show vlan summary',
+        }.get(key)
+
+    def _refresh_olt_catalog(self, priority=PRIORITY_INTERACTIVE):
+        """Rifresko katalogun (profile, tipe ONU, VLAN) me një fan-out për çdo element.
+
+        Ruhen vetëm elementët që u lexuan me sukses; të tjerët mbajnë vlerën e vjetër.
+        """
+        devices = self.filtered(lambda d: d.device_type == 'olt' and d.ip_address)
+        if not devices:
+            return devices
+
+        collected = {d.id: {} for d in devices}
+        errors = {d.id: [] for d in devices}
+        for key, (parser, fname) in _CATALOG_ITEMS.items():
+            supported = devices.filtered(lambda d: d._olt_catalog_command(key))
+            if not supported:
+                continue
+            for res in supported._olt_fleet_run(lambda d: d._olt_catalog_command(key), priority=priority):
+                if res['ok']:
+                    collected[res['device_id']][fname] = json.dumps(parser(res['output']))
+                else:
+                    errors[res['device_id']].append(f"{key}: {res['error']}")
+
+        now = fields.Datetime.now()
+        for device in devices:
+            vals = dict(collected[device.id])
+            # Data vendoset edhe në dështim, që wizard-et të mos riprovojnë Telnet në çdo hapje
+            vals['olt_catalog_date'] = now
+            vals['olt_catalog_error'] = '\n'.join(errors[device.id]) or False
+            # Teknikët mund të mos kenë të drejtë shkrimi mbi OLT; cache-i është teknik
+            device.sudo().write(vals)
+        _logger.info('📚 OLT catalog refreshed for %d OLT(s)', len(devices))
+        return devices
+
+    def _get_olt_speed_profiles(self):
+        """Profilet e shpejtësisë nga cache-i, pa Telnet ([] derisa cron-i / butoni Refresh
+        ta mbushin katalogun herën e parë)."""
+        self.ensure_one()
+        return self._olt_catalog_list('olt_speed_profiles_json')
+
+    def _get_olt_onu_types(self):
+        """Tipet e ONU-ve të njohura nga OLT (cache; [] kur s'ka katalog)."""
+        self.ensure_one()
+        return self._olt_catalog_list('olt_onu_types_json')
+
+    def _get_olt_vlan_options(self, configured):
+        """VLAN-et që ofrohen në wizard për një shërbim.
+
+        configured: lista e VLAN-eve të konfiguruara në OLT për atë shërbim
+        (p.sh. internet_vlan "100,101"). Kur katalogu ka VLAN-et e OLT-së, mbahen
+        vetëm ato që ekzistojnë realisht; pa konfigurim ofrohen VLAN-et e OLT-së.
+        """
+        self.ensure_one()
+        configured = [v.strip() for v in (configured or '').split(',') if v.strip()]
+        on_olt = [str(v) for v in self._olt_catalog_list('olt_vlans_json')]
+        if not on_olt:
+            return configured
+        if not configured:
+            return on_olt
+        return [v for v in configured if v in on_olt]
+
+    def _olt_catalog_errors(self, onu_type=None, vlans=()):
+        """Kontrollo tipin e ONU-së dhe VLAN-et kundrejt katalogut (vetëm kur ka cache)."""
+        self.ensure_one()
+        errors = []
+        types = self._get_olt_onu_types()
+        if onu_type and types and onu_type not in types:
+            errors.append(_('ONU type "%(t)s" is not known by OLT "%(olt)s".\nAvailable: %(av)s') % {
+                't': onu_type, 'olt': self.name, 'av': ', '.join(types)})
+        on_olt = {str(v) for v in self._olt_catalog_list('olt_vlans_json')}
+        for vlan in vlans:
+            if vlan and on_olt and str(vlan).strip() not in on_olt:
+                errors.append(_('VLAN %(v)s does not exist on OLT "%(olt)s".') % {'v': vlan, 'olt': self.name})
+        return errors
+
+    def action_refresh_olt_catalog(self):
+        self._refresh_olt_catalog()
+        failed = self.filtered('olt_catalog_error')
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('OLT Catalog Refreshed') if not failed else _('OLT Catalog Partially Refreshed'),
+                'message': _('Speed profiles, ONU types and VLANs updated for %d OLT(s).') % len(self)
+                           if not failed else (failed[0].olt_catalog_error or '')[:300],
+                'type': 'success' if not failed else 'warning',
+                'sticky': bool(failed),
+            }
+        }
+
+    @api.model
+    def _cron_refresh_olt_catalog(self):
+        """Rifresko katalogun e OLT-ve që e kanë më të vjetër se TTL (asr_olt_telnet.catalog_ttl_hours)."""
+        limit_date = fields.Datetime.now() - self._olt_catalog_ttl()
+        stale = self._olt_fleet_devices().filtered(
+            lambda d: not d.olt_catalog_date or d.olt_catalog_date < limit_date
+        )
+        if stale:
+            stale._refresh_olt_catalog(priority=PRIORITY_BACKGROUND)
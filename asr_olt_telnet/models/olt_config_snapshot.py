@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+import logging
+import re
+from datetime import timedelta
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+from .olt_scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+
+_logger = logging.getLogger(__name__)
+
+_IFACE_RE = re.compile(r'^interface\s+(\S+)', re.IGNORECASE)
+_OLT_PORT_RE = re.compile(r'^(gpon|epon)[-_]olt[-_](\d+/\d+/\d+)$', re.IGNORECASE)
+_ONU_LINE_RE = re.compile(
+    r'^\s*onu\s+(\d+)\s+type\s+(\S+)(?:\s+(?:sn|mac|loid|pw)\s+(\S+))?', re.IGNORECASE
+)
+
+MAX_DIFF_LINES = 200
+SNAPSHOT_RETENTION_DAYS = 90
+
+
+def normalize_olt_port(port):
+    """C600 'gpon_olt-1/4/3' dhe C300 'gpon-olt_1/4/3' → 'gpon-olt_1/4/3'."""
+    m = _OLT_PORT_RE.match((port or '').strip())
+    if not m:
+        return (port or '').strip()
+    return f"{m.group(1).lower()}-olt_{m.group(2)}"
+
+
+def parse_onu_config(output, default_port=None):
+    """Parse 'show running-config' (ose running-config i një porti) → {port: {onu_id: (type, serial)}}.
+
+    Shembull:
+        interface gpon-olt_1/2/3
+          onu 1 type ZTE-F660 sn ZTEGC1234567
+          onu 2 type ZTE-F612 sn ZTEGC7654321
+        !
+    Për output-in e një porti të vetëm (pa rresht 'interface') përdoret `default_port`.
+    """
+    config = {}
+    port = normalize_olt_port(default_port) if default_port else None
+    for line in (output or '').splitlines():
+        stripped = line.strip()
+        m = _IFACE_RE.match(stripped)
+        if m:
+            iface = m.group(1)
+            port = normalize_olt_port(iface) if _OLT_PORT_RE.match(iface) else None
+            continue
+        if stripped == '!' and not default_port:
+            port = None
+            continue
+        if not port:
+            continue
+        m = _ONU_LINE_RE.match(line)
+        if m:
+            config.setdefault(port, {})[int(m.group(1))] = (m.group(2), (m.group(3) or '').upper())
+    return config
+
+
+def max_onu_slots(port):
+    # GPON zakonisht 1..128; EPON 1..64
+    return 128 if 'gpon' in (port or '').lower() else 64
+
+
+class OltOnuSlot(models.Model):
+    _name = 'olt.onu.slot'
+    _description = 'Registered ONU on OLT (config snapshot)'
+    _order = 'device_id, port, onu_id'
+
+    device_id = fields.Many2one('crm.access.device', string='OLT', required=True,
+                                index=True, ondelete='cascade')
+    port = fields.Char(string='PON Port', required=True, index=True, help="p.sh. gpon-olt_1/2/3")
+    onu_id = fields.Integer(string='ONU ID', required=True)
+    onu_type = fields.Char(string='ONU Type')
+    serial = fields.Char(string='Serial / MAC', index=True)
+    first_seen = fields.Datetime(string='First Seen', readonly=True)
+    last_seen = fields.Datetime(string='Last Seen', readonly=True)
+
+    _sql_constraints = [
+        ('device_port_onu_uniq', 'unique(device_id, port, onu_id)', 'ONU ID must be unique per OLT port.'),
+    ]
+
+    @api.model
+    def _occupied(self, device, port):
+        rows = self.search_read([('device_id', '=', device.id), ('port', '=', normalize_olt_port(port))],
+                                ['onu_id'])
+        return {r['onu_id'] for r in rows}
+
+    @api.model
+    def _find_serial(self, serial, exclude_device=None):
+        """ONU-të e regjistruara me këtë serial kudo në rrjet (indexed lookup)."""
+        if not serial:
+            return self.browse()
+        domain = [('serial', '=', serial.strip().upper())]
+        if exclude_device:
+            domain.append(('device_id', '!=', exclude_device.id))
+        return self.search(domain)
+
+    @api.model
+    def _remember(self, device, port, onu_id, onu_type=None, serial=None):
+        """Upsert pas një regjistrimi të suksesshëm (snapshot-i mbetet i saktë deri në rifreskim)."""
+        port = normalize_olt_port(port)
+        now = fields.Datetime.now()
+        existing = self.search([('device_id', '=', device.id), ('port', '=', port), ('onu_id', '=', int(onu_id))])
+        vals = {'onu_type': onu_type, 'serial': (serial or '').upper() or False, 'last_seen': now}
+        if existing:
+            existing.write(vals)
+        else:
+            self.create(dict(vals, device_id=device.id, port=port, onu_id=int(onu_id), first_seen=now))
+
+    @api.model
+    def _forget(self, device, port, onu_id):
+        self.search([
+            ('device_id', '=', device.id),
+            ('port', '=', normalize_olt_port(port)),
+            ('onu_id', '=', int(onu_id)),
+        ]).unlink()
+
+
+class OltConfigSnapshot(models.Model):
+    _name = 'olt.config.snapshot'
+    _description = 'OLT ONU Config Snapshot'
+    _order = 'date desc, id desc'
+
+    device_id = fields.Many2one('crm.access.device', string='OLT', required=True,
+                                index=True, ondelete='cascade')
+    date = fields.Datetime(string='Date', default=fields.Datetime.now, readonly=True)
+    state = fields.Selection([('ok', 'OK'), ('error', 'Error')], default='ok', readonly=True)
+    port_count = fields.Integer(string='Ports', readonly=True)
+    onu_count = fields.Integer(string='ONUs', readonly=True)
+    added_count = fields.Integer(string='Added', readonly=True)
+    removed_count = fields.Integer(string='Removed', readonly=True)
+    changed_count = fields.Integer(string='Changed', readonly=True)
+    diff = fields.Text(string='Diff', readonly=True)
+    error = fields.Text(string='Error', readonly=True)
+
+
+class CrmAccessDeviceSnapshot(models.Model):
+    _inherit = 'crm.access.device'
+
+    olt_snapshot_date = fields.Datetime(string="ONU Config Snapshot", readonly=True)
+    olt_onu_slot_count = fields.Integer(string="Registered ONUs", compute='_compute_olt_onu_slot_count')
+
+    def _compute_olt_onu_slot_count(self):
+        counts = dict(self.env['olt.onu.slot']._read_group(
+            [('device_id', 'in', self.ids)], ['device_id'], ['__count']
+        ))
+        for rec in self:
+            rec.olt_onu_slot_count = counts.get(rec, 0)
+
+    def _olt_port_config_command(self, port):
+        """C300: show running-config interface gpon-olt_1/5/10
+        C600: show running-config-interface gpon_olt-1/4/3 (me dash!)"""
+        self.ensure_one()
+        model = (self.model or '').upper()
+        if 'C600' in model or 'C650' in model or 'C680' in model:
+            return f"show running-config-interface {normalize_olt_port(port).replace('-olt_', '_olt-')}"
+        return f"show running-config interface {normalize_olt_port(port)}"
+
+    def _olt_live_port_config(self, port):
+        """Lexo direkt nga OLT konfigurimin e një porti → {onu_id: (type, serial)}.
+
+        Kalon nga një sesion i huazuar, jo nga olt_read: rezultati i coalescing-ut mund
+        të jetë deri në COALESCE_WINDOW sekonda i vjetër dhe të humbasë një slot të sapozënë.
+        """
+        self.ensure_one()
+        command = self._olt_port_config_command(port)
+        with self._olt_session(timeout=15) as sess:
+            res = sess.execute(command)
+        if not res['ok']:
+            raise UserError(_('Could not read config of %(port)s on %(olt)s: %(err)s') % {
+                'port': port, 'olt': self.name, 'err': res['error'],
+            })
+        return parse_onu_config(res['output'], default_port=port).get(normalize_olt_port(port), {})
+
+    def _olt_find_free_slot(self, port, live=False):
+        """Slot-i i parë i lirë: nga snapshot-i (indexed) ose, kur s'ka snapshot / live=True, nga OLT."""
+        self.ensure_one()
+        if live or not self.olt_snapshot_date:
+            occupied = set(self._olt_live_port_config(port))
+        else:
+            occupied = self.env['olt.onu.slot']._occupied(self, port)
+        max_slots = max_onu_slots(port)
+        for slot in range(1, max_slots + 1):
+            if slot not in occupied:
+                return slot
+        raise UserError(_('No free slots available on port %s (all %d occupied)') % (port, max_slots))
+
+    def _olt_snapshot(self, priority=PRIORITY_INTERACTIVE):
+        """Snapshot i konfigurimit të ONU-ve (show running-config) për të gjitha OLT-të e `self`.
+
+        Tabela olt.onu.slot sinkronizohet me diff (shto / fshi / ndrysho) dhe çdo OLT
+        merr një rresht olt.config.snapshot me përmbledhjen e ndryshimeve.
+        """
+        devices = self.filtered(lambda d: d.device_type == 'olt' and d.ip_address
+                                and (d.manufacturer or '').upper() != 'HUAWEI')
+        if not devices:
+            return self.env['olt.config.snapshot']
+
+        Slot = self.env['olt.onu.slot'].sudo()
+        Snapshot = self.env['olt.config.snapshot'].sudo()
+        snapshots = Snapshot.browse()
+        now = fields.Datetime.now()
+
+        for res in devices._olt_fleet_run('show running-config', timeout=180, priority=priority):
+            device = self.browse(res['device_id'])
+            if not res['ok']:
+                snapshots |= Snapshot.create({'device_id': device.id, 'state': 'error', 'error': res['error']})
+                continue
+
+            config = parse_onu_config(res['output'])
+            current = {
+                (s.port, s.onu_id): s
+                for s in Slot.search([('device_id', '=', device.id)])
+            }
+            new_keys = {(port, onu_id) for port, onus in config.items() for onu_id in onus}
+
+            added, changed, diff_lines = [], Slot.browse(), []
+            for port, onus in config.items():
+                for onu_id, (onu_type, serial) in onus.items():
+                    slot = current.get((port, onu_id))
+                    if not slot:
+                        added.append({
+                            'device_id': device.id, 'port': port, 'onu_id': onu_id,
+                            'onu_type': onu_type, 'serial': serial or False,
+                            'first_seen': now, 'last_seen': now,
+                        })
+                        diff_lines.append(f"+ {port}:{onu_id} {onu_type} {serial}")
+                    elif slot.onu_type != onu_type or (slot.serial or '') != serial:
+                        diff_lines.append(f"~ {port}:{onu_id} {slot.onu_type} {slot.serial or ''} → {onu_type} {serial}")
+                        slot.write({'onu_type': onu_type, 'serial': serial or False, 'last_seen': now})
+                        changed |= slot
+            removed = Slot.browse([s.id for key, s in current.items() if key not in new_keys])
+            diff_lines += [f"- {s.port}:{s.onu_id} {s.onu_type} {s.serial or ''}" for s in removed]
+
+            # last_seen për të pandryshuarit me një UPDATE të vetëm
+            unchanged = Slot.browse([s.id for key, s in current.items() if key in new_keys]) - changed
+            if unchanged:
+                unchanged.write({'last_seen': now})
+            removed.unlink()
+            Slot.create(added)
+
+            device.sudo().write({'olt_snapshot_date': now})
+            snapshots |= Snapshot.create({
+                'device_id': device.id,
+                'port_count': len(config),
+                'onu_count': len(new_keys),
+                'added_count': len(added),
+                'removed_count': len(removed),
+                'changed_count': len(changed),
+                'diff': '\n'.join(diff_lines[:MAX_DIFF_LINES]) or False,
+            })
+            _logger.info('📸 OLT %s snapshot: %d ONU(s) on %d port(s), +%d -%d ~%d',
+                         device.name, len(new_keys), len(config), len(added), len(removed), len(changed))
+        return snapshots
+
+    def action_olt_snapshot(self):
+        snapshots = self._olt_snapshot()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('ONU Config Snapshots'),
+            'res_model': 'olt.config.snapshot',
+            'view_mode': 'list,form',
+            'domain': [('id', 'in', snapshots.ids)],
+        }
+
+    def action_view_onu_slots(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Registered ONUs on %s') % self.name,
+            'res_model': 'olt.onu.slot',
+            'view_mode': 'list',
+            'domain': [('device_id', '=', self.id)],
+        }
+
+    @api.model
+    def _cron_olt_snapshot(self):
+        self._olt_fleet_devices()._olt_snapshot(priority=PRIORITY_BACKGROUND)
+        # Historiku i diff-eve mbahet 90 ditë
+        self.env['olt.config.snapshot'].sudo().search([
+            ('date', '<', fields.Datetime.now() - timedelta(days=SNAPSHOT_RETENTION_DAYS)),
+        ]).unlink()
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+Expect engine për CLI-në e ZTE C300/C600 (pa time.sleep fiks).
+
+Çdo komandë dërgohet dhe lexohet deri te prompt-i i OLT-së, kështu që
+shpejtësia është ajo e pajisjes:
+
+    cli = ZteCliExpect(tn, host, timeout=10)
+    cli.login(user, pwd)            # detekton hostname-in e prompt-it
+    cli.disable_paging()            # `terminal length 0` (fallback: --More-- → SPACE)
+    res = cli.execute('show gpon onu uncfg')
+    # res = {'command', 'output', 'ok', 'error', 'mode', 'elapsed'}
+
+Prompt-et e njohura:
+    OLT-C300#                  → mode 'exec'
+    OLT-C300(config)#          → mode 'config'
+    OLT-C300(config-if)#       → mode 'config-if' (ose çdo nën-mode tjetër)
+"""
+import logging
+import re
+import time
+
+from odoo import _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+# Prompt gjenerik (para se të dimë hostname-in)
+_ANY_PROMPT_RE = re.compile(rb'(?:^|[\r\n])([\w.\-/]+)(?:\(([^)]*)\))?([#>])\s*$')
+_MORE_RE = re.compile(rb'--More--|---- More ----|-- More --')
+_AUTH_FAIL_RE = re.compile(rb'Username:|Authentication failed|Login incorrect|Access denied|[Bb]ad password')
+
+_ANSI_RE = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]')
+_BACKSPACE_RE = re.compile(r' *\x08+ *\x08*')
+
+# ZTE i printon gabimet me prefiks '%' (p.sh. "%Error 20203: ...", "% Invalid input detected",
+# "%Code 32310-GPONSRV : ..."); disa firmware printojnë "Error:" në fillim të rreshtit.
+_ERROR_LINE_RE = re.compile(
+    r'^\s*(?:%\s*(?:error|invalid|unknown|incomplete|ambiguous|code)\b|%\s*\w.*(?:failed|not found|cannot)'
+    r'|(?:error|failed|invalid)\b[\s:])',
+    re.IGNORECASE,
+)
+
+
+class ZteCliExpect:
+    """Prompt-driven driver mbi një objekt telnetlib.Telnet."""
+
+    def __init__(self, tn, host, timeout=10):
+        self.tn = tn
+        self.host = host
+        self.timeout = timeout
+        self.hostname = None
+        self.prompt_re = _ANY_PROMPT_RE
+        self.mode = None
+        self.paging_disabled = False
+
+    # ------------------------------------------------------------
+    # Login
+    # ------------------------------------------------------------
+    def login(self, username, password):
+        timeout = self.timeout
+        idx, _match, _text = self.tn.expect([b'Username:', b'Login:', b'login:'], timeout)
+        if idx == -1:
+            raise UserError(_('Did not receive Username prompt from %s') % self.host)
+        self.tn.write((username + '\n').encode('ascii', errors='ignore'))
+
+        idx, _match, _text = self.tn.expect([b'Password:', b'password:'], timeout)
+        if idx == -1:
+            raise UserError(_('Did not receive Password prompt from %s') % self.host)
+        self.tn.write((password + '\n').encode('ascii', errors='ignore'))
+
+        idx, match, text = self.tn.expect([_ANY_PROMPT_RE, _AUTH_FAIL_RE], timeout)
+        if idx != 0:
+            raise UserError(_('Authentication FAILED for %s@%s.\nGot: %s') %
+                            (username, self.host, text.decode('utf-8', errors='ignore')[:300]))
+        self._learn_prompt(match)
+
+    def _learn_prompt(self, match):
+        """Pasi shohim prompt-in e parë, ankorojmë regex-in te hostname-i i OLT-së."""
+        self.hostname = match.group(1)
+        self.prompt_re = re.compile(
+            rb'(?:^|[\r\n])' + re.escape(self.hostname) + rb'(?:\(([^)]*)\))?([#>])\s*$'
+        )
+        self._set_mode(match.group(2))
+
+    def _set_mode(self, sub):
+        if not sub:
+            self.mode = 'exec'
+        else:
+            self.mode = sub.decode('ascii', errors='ignore') if isinstance(sub, bytes) else sub
+
+    def disable_paging(self):
+        """`terminal length 0`; nëse s'pranohet, read_until_prompt kalon faqet me SPACE."""
+        res = self.execute('terminal length 0')
+        self.paging_disabled = res['ok']
+        if not res['ok']:
+            _logger.debug('Paging could not be disabled on %s: %s', self.host, res['error'])
+        return self.paging_disabled
+
+    # ------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------
+    def read_until_prompt(self, timeout=None):
+        """Lexo deri te prompt-i; kalon faqet --More-- automatikisht. Kthen bytes."""
+        deadline = time.monotonic() + (timeout or self.timeout)
+        chunks = []
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise UserError(_('Timeout waiting for prompt from %s after %ss.\nPartial output: %s') % (
+                    self.host, timeout or self.timeout,
+                    b''.join(chunks).decode('utf-8', errors='ignore')[-300:]))
+            idx, match, text = self.tn.expect([self.prompt_re, _MORE_RE], remaining)
+            if idx == 0:
+                chunks.append(text[:match.start()])
+                self._set_mode(match.group(1) if self.hostname else match.group(2))
+                return b''.join(chunks)
+            if idx == 1:
+                # Heq marker-in e pager-it; mbetjet (backspace) pastrohen te _clean()
+                chunks.append(text[:match.start()].rstrip(b' '))
+                self.tn.write(b' ')
+                continue
+            chunks.append(text)
+
+    def sync(self, timeout=2):
+        """ENTER bosh → True nëse prompt-i kthehet (sesioni është gjallë)."""
+        try:
+            self.tn.read_very_eager()
+            self.tn.write(b'\n')
+            self.read_until_prompt(timeout)
+            return True
+        except Exception:
+            return False
+
+    # ------------------------------------------------------------
+    # Commands
+    # ------------------------------------------------------------
+    def execute(self, command, timeout=None):
+        """Ekzekuto një komandë; kthen dict me output të pastër dhe gabimin (nëse ka)."""
+        start = time.monotonic()
+        self.tn.read_very_eager()
+        self.tn.write((command + '\n').encode('ascii', errors='ignore'))
+        raw = self.read_until_prompt(timeout)
+        output = self._clean(raw, command)
+        error = self._detect_error(output)
+        return {
+            'command': command,
+            'output': output,
+            'ok': not error,
+            'error': error,
+            'mode': self.mode,
+            'elapsed': time.monotonic() - start,
+        }
+
+    def run(self, commands, stop_on_error=True, timeout=None):
+        """Ekzekuto disa komanda me radhë; ndalon te gabimi i parë nëse stop_on_error."""
+        results = []
+        for cmd in commands:
+            res = self.execute(cmd, timeout=timeout)
+            results.append(res)
+            if not res['ok'] and stop_on_error:
+                break
+        return results
+
+    @staticmethod
+    def _clean(raw, command):
+        text = raw.replace(b'\x00', b'').decode('utf-8', errors='ignore')
+        text = _ANSI_RE.sub('', text)
+        text = _BACKSPACE_RE.sub('', text)
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+        lines = text.split('\n')
+        # Hiq echo-n e komandës
+        while lines and not lines[0].strip():
+            lines.pop(0)
+        if lines and lines[0].strip() == command.strip():
+            lines.pop(0)
+        return '\n'.join(lines).strip('\n')
+
+    @staticmethod
+    def _detect_error(output):
+        if not output:
+            return False
+        low = output.lower()
+        if 'no error' in low or 'error: 0' in low:
+            return False
+        errors = [ln.strip() for ln in output.splitlines() if _ERROR_LINE_RE.match(ln)]
+        return '\n'.join(errors[:3]) if errors else False
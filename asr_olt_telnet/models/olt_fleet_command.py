@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError, ValidationError
+
+from .olt_scheduler import PRIORITY_INTERACTIVE
+from .olt_session_pool import olt_read, olt_session
+
+_logger = logging.getLogger(__name__)
+
+# Vetëm komanda read-only lejohen në fan-out (ZTE: show, Huawei: display)
+_READONLY_PREFIXES = ('show ', 'display ')
+# Ndarës komandash / karaktere kontrolli: expect engine shkruan `command + '\n'`, ndaj një
+# "\n" (ose "\r") brenda komandës do të ekzekutonte komanda të tjera pas show-it
+_CONTROL_CHARS = re.compile(r'[\x00-\x1f\x7f;]')
+
+
+def _is_readonly(command):
+    raw = command or ''
+    return raw.strip().lower().startswith(_READONLY_PREFIXES) and not _CONTROL_CHARS.search(raw)
+
+
+class OltFleetCommand(models.Model):
+    _name = 'olt.fleet.command'
+    _description = 'OLT Fleet Command Run'
+    _order = 'date_start desc, id desc'
+
+    name = fields.Char(string='Name', required=True, default=lambda self: _('New'))
+    command = fields.Char(string='Command', required=True,
+                          help="Read-only command (show ... / display ...) executed on every selected OLT")
+    device_ids = fields.Many2many('crm.access.device', string='OLTs',
+                                  domain=[('device_type', '=', 'olt')],
+                                  help="Bosh = të gjitha OLT-të aktive me Management IP")
+    max_workers = fields.Integer(string='Parallel Sessions', default=8)
+    timeout = fields.Integer(string='Timeout (s)', default=20)
+
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('done', 'Done'),
+    ], default='draft', readonly=True)
+    date_start = fields.Datetime(readonly=True)
+    duration = fields.Float(string='Duration (s)', readonly=True, digits=(10, 2))
+    device_count = fields.Integer(string='OLTs', readonly=True)
+    ok_count = fields.Integer(string='OK', readonly=True)
+    error_count = fields.Integer(string='Errors', readonly=True)
+    result_ids = fields.One2many('olt.fleet.command.result', 'run_id', string='Results', readonly=True)
+
+    @api.constrains('command')
+    def _check_readonly_command(self):
+        for rec in self:
+            if not _is_readonly(rec.command):
+                raise ValidationError(_('Only read-only commands (show ... / display ...) can be run across the fleet.'))
+
+    def action_run(self):
+        self.ensure_one()
+        devices = self.device_ids or self.env['crm.access.device']._olt_fleet_devices()
+        if not devices:
+            raise UserError(_('No OLTs with a Management IP found.'))
+
+        self.result_ids.unlink()
+        start = time.monotonic()
+        self.write({
+            'name': _('%(cmd)s @ %(n)d OLT(s)') % {'cmd': self.command, 'n': len(devices)},
+            'date_start': fields.Datetime.now(),
+        })
+        results = devices._olt_fleet_run(self.command, max_workers=self.max_workers,
+                                         timeout=self.timeout, run=self)
+        ok = sum(1 for r in results if r['ok'])
+        self.write({
+            'state': 'done',
+            'duration': time.monotonic() - start,
+            'device_count': len(results),
+            'ok_count': ok,
+            'error_count': len(results) - ok,
+        })
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'olt.fleet.command',
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'current',
+        }
+
+
+class OltFleetCommandResult(models.Model):
+    _name = 'olt.fleet.command.result'
+    _description = 'OLT Fleet Command Result'
+    _order = 'run_id desc, device_id'
+
+    run_id = fields.Many2one('olt.fleet.command', ondelete='cascade', index=True)
+    device_id = fields.Many2one('crm.access.device', string='OLT', index=True, ondelete='cascade')
+    command = fields.Char(string='Command')
+    state = fields.Selection([('ok', 'OK'), ('error', 'Error')], string='Status')
+    output = fields.Text(string='Output')
+    error = fields.Text(string='Error')
+    elapsed = fields.Float(string='Time (s)', digits=(10, 2))
+
+
+class CrmAccessDeviceFleet(models.Model):
+    _inherit = 'crm.access.device'
+
+    @api.model
+    def _olt_fleet_devices(self):
+        """OLT-të ku ka kuptim një fan-out: aktive, me IP dhe jo offline."""
+        return self.search([
+            ('device_type', '=', 'olt'),
+            ('ip_address', '!=', False),
+            ('operational_status', '!=', 'offline'),
+        ])
+
+    def _olt_fleet_run(self, command, max_workers=8, timeout=20, run=None, priority=PRIORITY_INTERACTIVE):
+        """Ekzekuto një komandë read-only në të gjitha OLT-të e `self` paralelisht.
+
+        `command` mund të jetë string ose callable(device) -> string (p.sh. komanda uncfg
+        ndryshon sipas modelit C300/C600). Çdo OLT merr një sesion nga pool-i, kështu
+        që brenda një fan-out-i hapet maksimumi një vty për OLT; scheduler-i e rendit
+        punën sipas `priority` kundrejt wizard-eve/shkrimeve të tjera në të njëjtën OLT.
+
+        Nëse jepet `run` (olt.fleet.command), rezultatet shkruhen si olt.fleet.command.result
+        sapo mbaron secila OLT. Kthen listë dict-esh:
+        {'device_id', 'command', 'ok', 'output', 'error', 'elapsed'}.
+        """
+        jobs, results = [], []
+
+        def emit(res):
+            results.append(res)
+            if run:
+                self._olt_fleet_store(run, res)
+
+        for device in self:
+            cmd = command(device) if callable(command) else command
+            if not _is_readonly(cmd):
+                emit(self._olt_fleet_error(device, cmd, _('Not a read-only command')))
+                continue
+            try:
+                if not device.ip_address:
+                    raise UserError(_('OLT missing Management IP.'))
+                user, pwd = device.get_telnet_credentials()
+            except UserError as e:
+                emit(self._olt_fleet_error(device, cmd, str(e)))
+                continue
+            jobs.append((device.id, device.ip_address.strip(), user, pwd, cmd))
+
+        # Worker-at e ThreadPoolExecutor s'kanë dbname: kufiri vty ndërmjet proceseve e do
+        dbname = self.env.cr.dbname
+
+        def run_one(host, user, pwd, cmd):
+            start = time.monotonic()
+            try:
+                res = olt_read(host, user, pwd, cmd, timeout=timeout, priority=priority, dbname=dbname)
+                return res['ok'], res['output'], res['error'] or False, time.monotonic() - start
+            except Exception as e:
+                return False, '', str(e), time.monotonic() - start
+
+        _logger.info('🛰️ Fleet command "%s" on %d OLT(s), %d worker(s)',
+                     command if not callable(command) else '<per-model>', len(jobs), max_workers)
+
+        if jobs:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as executor:
+                futures = {
+                    executor.submit(run_one, host, user, pwd, cmd): (device_id, cmd)
+                    for device_id, host, user, pwd, cmd in jobs
+                }
+                for future in as_completed(futures):
+                    device_id, cmd = futures[future]
+                    ok, output, error, elapsed = future.result()
+                    if not ok:
+                        _logger.warning('⚠️ Fleet command failed on OLT %s: %s', device_id, error)
+                    emit({
+                        'device_id': device_id,
+                        'command': cmd,
+                        'ok': ok,
+                        'output': output,
+                        'error': error,
+                        'elapsed': elapsed,
+                    })
+        return results
+
+    def _olt_fleet_run_batch(self, commands, max_workers=8, timeout=20, priority=PRIORITY_INTERACTIVE):
+        """Si `_olt_fleet_run`, por `commands(device)` kthen një listë komandash read-only
+        që ekzekutohen njëra pas tjetrës në të njëjtin sesion të OLT-së (p.sh. një komandë
+        për çdo port PON). Kthen listë dict-esh:
+        {'device_id', 'ok', 'results': [dict i expect engine për çdo komandë], 'error', 'elapsed'}.
+        """
+        jobs, results = [], []
+        for device in self:
+            cmds = [c for c in (commands(device) or []) if c]
+            bad = [c for c in cmds if not _is_readonly(c)]
+            try:
+                if bad:
+                    raise UserError(_('Not a read-only command: %s') % bad[0])
+                if not device.ip_address:
+                    raise UserError(_('OLT missing Management IP.'))
+                user, pwd = device.get_telnet_credentials()
+            except UserError as e:
+                results.append({'device_id': device.id, 'ok': False, 'results': [], 'error': str(e), 'elapsed': 0.0})
+                continue
+            if cmds:
+                jobs.append((device.id, device.ip_address.strip(), user, pwd, cmds))
+
+        dbname = self.env.cr.dbname
+
+        def run_one(host, user, pwd, cmds):
+            start = time.monotonic()
+            try:
+                with olt_session(host, user, pwd, timeout=timeout, priority=priority, dbname=dbname) as sess:
+                    return True, [sess.execute(cmd) for cmd in cmds], False, time.monotonic() - start
+            except Exception as e:
+                return False, [], str(e), time.monotonic() - start
+
+        _logger.info('🛰️ Fleet batch of %d command(s) on %d OLT(s), %d worker(s)',
+                     sum(len(j[4]) for j in jobs), len(jobs), max_workers)
+
+        if jobs:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as executor:
+                futures = {
+                    executor.submit(run_one, host, user, pwd, cmds): device_id
+                    for device_id, host, user, pwd, cmds in jobs
+                }
+                for future in as_completed(futures):
+                    ok, res, error, elapsed = future.result()
+                    if not ok:
+                        _logger.warning('⚠️ Fleet batch failed on OLT %s: %s', futures[future], error)
+                    results.append({
+                        'device_id': futures[future],
+                        'ok': ok,
+                        'results': res,
+                        'error': error,
+                        'elapsed': elapsed,
+                    })
+        return results
+
+    @api.model
+    def _olt_fleet_error(self, device, cmd, error):
+        return {
+            'device_id': device.id,
+            'command': cmd,
+            'ok': False,
+            'output': '',
+            'error': error,
+            'elapsed': 0.0,
+        }
+
+    @api.model
+    def _olt_fleet_store(self, run, res):
+        self.env['olt.fleet.command.result'].create({
+            'run_id': run.id,
+            'device_id': res['device_id'],
+            'command': res['command'],
+            'state': 'ok' if res['ok'] else 'error',
+            'output': res['output'],
+            'error': res['error'] or False,
+            'elapsed': res['elapsed'],
+        })
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+import logging
+import re
+from collections import defaultdict
+from datetime import timedelta
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+from odoo.addons.asr_radius_manager.models.radius_bulk import chunked, fetch_calling_station_ids
+
+from .olt_scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+
+_logger = logging.getLogger(__name__)
+
+MAC_RETENTION_DAYS = 7
+
+# 909a.4a92.35fc   1662   Dynamic   vport-1/2/2.27:1
+# 909a.4a92.35fc   1662   Dynamic   gpon-onu_1/2/2:27  vport 1
+_MAC_ROW_RE = re.compile(
+    r'^\s*([0-9a-f]{4}\.[0-9a-f]{4}\.[0-9a-f]{4}|[0-9a-f]{2}(?:[:\-][0-9a-f]{2}){5})\s+(\d+)\s+\S+\s+(\S+)',
+    re.IGNORECASE,
+)
+_VPORT_RE = re.compile(r'vport-(\d+)/(\d+)/(\d+)\.(\d+):(\d+)', re.IGNORECASE)
+_ONU_PORT_RE = re.compile(r'(?:gpon|epon)[-_]onu[-_](\d+)/(\d+)/(\d+):(\d+)', re.IGNORECASE)
+
+
+def normalize_mac(mac):
+    """Çdo format (aabb.ccdd.eeff, AA-BB-..., AA:BB:...) → 'AA:BB:CC:DD:EE:FF' ('' nëse s'është MAC)."""
+    hexes = re.findall(r'[0-9A-Fa-f]{2}', re.sub(r'[^0-9A-Fa-f]', '', mac or ''))
+    if len(hexes) != 6:
+        return ''
+    return ':'.join(h.upper() for h in hexes)
+
+
+def pon_path_from_port(port):
+    """'vport-1/2/2.27:1' ose 'gpon-onu_1/2/2:27' → '1/2/2/27' (None nëse porti s'është ONU)."""
+    m = _VPORT_RE.search(port or '') or _ONU_PORT_RE.search(port or '')
+    if not m:
+        return None
+    return '/'.join(m.group(i) for i in range(1, 5))
+
+
+def parse_mac_table(output):
+    """Parse 'show mac' → listë (mac, vlan, port, pon_path); një rresht për (mac, vlan)."""
+    rows = {}
+    for line in (output or '').splitlines():
+        m = _MAC_ROW_RE.match(line)
+        if not m:
+            continue
+        mac = normalize_mac(m.group(1))
+        if mac:
+            rows[(mac, int(m.group(2)))] = (m.group(3), pon_path_from_port(m.group(3)))
+    return [(mac, vlan, port, pon_path) for (mac, vlan), (port, pon_path) in rows.items()]
+
+
+class OltMacEntry(models.Model):
+    _name = 'olt.mac.entry'
+    _description = 'OLT MAC Address Table Entry'
+    _order = 'seen_at desc, id desc'
+    _rec_name = 'mac'
+
+    mac = fields.Char(string='MAC Address', required=True, index=True)
+    vlan = fields.Integer(string='VLAN', required=True, default=0)
+    port = fields.Char(string='Port', help="p.sh. vport-1/2/2.27:1")
+    pon_path = fields.Char(string='PON Path', help="p.sh. 1/2/2/27")
+    device_id = fields.Many2one('crm.access.device', string='OLT', required=True,
+                                index=True, ondelete='cascade')
+    first_seen = fields.Datetime(string='First Seen', readonly=True)
+    seen_at = fields.Datetime(string='Last Seen', readonly=True, index=True)
+    login_port = fields.Char(string='Login Port', compute='_compute_login_port')
+
+    _sql_constraints = [
+        ('device_mac_vlan_uniq', 'unique(device_id, mac, vlan)', 'MAC must be unique per OLT and VLAN.'),
+    ]
+
+    @api.depends('pon_path', 'vlan', 'device_id.ip_address')
+    def _compute_login_port(self):
+        for rec in self:
+            ip = (rec.device_id.ip_address or '').strip()
+            rec.login_port = f"{ip} pon {rec.pon_path}:{rec.vlan}" if ip and rec.pon_path else False
+
+    @api.model
+    def _lookup(self, mac):
+        """Hyrjet për një MAC në të gjithë rrjetin, më e fundit e para (indexed lookup)."""
+        mac = normalize_mac(mac)
+        if not mac:
+            return self.browse()
+        return self.search([('mac', '=', mac)])
+
+    @api.model
+    def _lookup_many(self, macs):
+        """{mac: hyrja më e fundit me PON path} për shumë MAC njëherësh (chunk-e me IN)."""
+        found = {}
+        macs = {normalize_mac(m) for m in macs} - {''}
+        for chunk in chunked(macs):
+            for entry in self.search([('mac', 'in', chunk), ('pon_path', '!=', False)],
+                                     order='seen_at asc, id asc'):
+                found[entry.mac] = entry
+        return found
+
+    @api.model
+    def _upsert(self, device, rows, now):
+        """INSERT ... ON CONFLICT për tabelën MAC të një OLT (një query për chunk)."""
+        cr = self.env.cr
+        uid = self.env.uid
+        for chunk in chunked(rows):
+            values = []
+            for mac, vlan, port, pon_path in chunk:
+                values += [mac, vlan, port, pon_path or None, device.id, now, now, uid, now, uid, now]
+            cr.execute("""
+                INSERT INTO olt_mac_entry
+                    (mac, vlan, port, pon_path, device_id, first_seen, seen_at,
+                     create_uid, create_date, write_uid, write_date)
+                VALUES {}
+                ON CONFLICT (device_id, mac, vlan) DO UPDATE SET
+                    port = EXCLUDED.port,
+                    pon_path = EXCLUDED.pon_path,
+                    seen_at = EXCLUDED.seen_at,
+                    write_uid = EXCLUDED.write_uid,
+                    write_date = EXCLUDED.write_date
+            """.format(', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)'] * len(chunk))), values)
+        self.invalidate_model()
+
+    @api.model
+    def _prune(self):
+        limit_date = fields.Datetime.now() - timedelta(days=MAC_RETENTION_DAYS)
+        self.env.cr.execute("DELETE FROM olt_mac_entry WHERE seen_at < %s", [limit_date])
+        self.invalidate_model()
+        return self.env.cr.rowcount
+
+
+class CrmAccessDeviceMacIndex(models.Model):
+    _inherit = 'crm.access.device'
+
+    olt_mac_harvest_date = fields.Datetime(string="MAC Table Harvested", readonly=True)
+    olt_mac_count = fields.Integer(string="MAC Entries", compute='_compute_olt_mac_count')
+
+    def _compute_olt_mac_count(self):
+        counts = dict(self.env['olt.mac.entry']._read_group(
+            [('device_id', 'in', self.ids)], ['device_id'], ['__count']
+        ))
+        for rec in self:
+            rec.olt_mac_count = counts.get(rec, 0)
+
+    def _olt_harvest_mac_table(self, priority=PRIORITY_INTERACTIVE):
+        """Lexo 'show mac' nga të gjitha OLT-të e `self` paralelisht dhe përditëso olt.mac.entry.
+
+        Kthen (numri i OLT-ve OK, numri i hyrjeve, lista e gabimeve).
+        """
+        devices = self.filtered(lambda d: d.device_type == 'olt' and d.ip_address
+                                and (d.manufacturer or '').upper() != 'HUAWEI')
+        Entry = self.env['olt.mac.entry'].sudo()
+        ok_count, entry_count, errors = 0, 0, []
+        now = fields.Datetime.now()
+
+        for res in devices._olt_fleet_run('show mac', timeout=120, priority=priority):
+            device = self.browse(res['device_id'])
+            if not res['ok']:
+                errors.append(f"{device.name}: {res['error']}")
+                continue
+            rows = parse_mac_table(res['output'])
+            Entry._upsert(device, rows, now)
+            device.sudo().write({'olt_mac_harvest_date': now})
+            ok_count += 1
+            entry_count += len(rows)
+            _logger.info('🧾 OLT %s MAC table: %d entr(ies)', device.name, len(rows))
+        return ok_count, entry_count, errors
+
+    def action_harvest_mac_table(self):
+        ok_count, entry_count, errors = self._olt_harvest_mac_table()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('MAC Table Harvested') if not errors else _('MAC Table Partially Harvested'),
+                'message': _('%(n)d MAC entr(ies) from %(ok)d OLT(s).') % {'n': entry_count, 'ok': ok_count}
+                           if not errors else '\n'.join(errors)[:300],
+                'type': 'success' if not errors else 'warning',
+                'sticky': bool(errors),
+            }
+        }
+
+    def action_view_mac_entries(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('MAC Table of %s') % self.name,
+            'res_model': 'olt.mac.entry',
+            'view_mode': 'list',
+            'domain': [('device_id', '=', self.id)],
+        }
+
+    @api.model
+    def _cron_harvest_mac_tables(self):
+        self._olt_fleet_devices()._olt_harvest_mac_table(priority=PRIORITY_BACKGROUND)
+        pruned = self.env['olt.mac.entry'].sudo()._prune()
+        if pruned:
+            _logger.info('🧹 Pruned %d MAC entr(ies) not seen for %d days', pruned, MAC_RETENTION_DAYS)
+
+
+class AsrRadiusUserMacIndex(models.Model):
+    _inherit = 'asr.radius.user'
+
+    def _fill_olt_login_port_from_mac_index(self):
+        """Plotëso olt_login_port (+ OLT-në kur mungon) nga indeksi MAC, pa Telnet.
+
+        MAC-u i klientit merret nga Calling-Station-Id i sesionit të fundit në radacct
+        (një query për chunk); shkrimet grupohen sipas vlerës. Kthen numrin e user-ave
+        të përditësuar.
+        """
+        users = self.filtered('username')
+        if not users:
+            return 0
+
+        # Çdo kompani ka databazën e vet FreeRADIUS: një lidhje për kompani
+        user_macs = {}      # user id -> Calling-Station-Id
+        for company in users.company_id:
+            company_users = users.filtered(lambda u: u.company_id == company)
+            conn = company_users[0]._get_radius_conn()
+            try:
+                with conn.cursor() as cur:
+                    macs = fetch_calling_station_ids(cur, company_users.mapped('username'))
+            finally:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            for user in company_users:
+                if macs.get(user.username):
+                    user_macs[user.id] = macs[user.username]
+
+        entries = self.env['olt.mac.entry'].sudo()._lookup_many(user_macs.values())
+        groups = defaultdict(lambda: self.browse())
+        for user in users:
+            entry = entries.get(normalize_mac(user_macs.get(user.id)))
+            if not entry or not entry.login_port:
+                continue
+            vals = {}
+            if user.olt_login_port != entry.login_port:
+                vals['olt_login_port'] = entry.login_port
+            if not user.access_device_id:
+                vals['access_device_id'] = entry.device_id.id
+            if vals:
+                groups[tuple(sorted(vals.items()))] |= user
+
+        for vals, group in groups.items():
+            group.write(dict(vals))
+        updated = sum(len(g) for g in groups.values())
+        _logger.info('🧾 Login port filled from MAC index for %d/%d user(s)', updated, len(users))
+        return updated
+
+    def action_fill_olt_login_port(self):
+        if not self:
+            raise UserError(_('Select at least one RADIUS user.'))
+        updated = self._fill_olt_login_port_from_mac_index()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Login Port'),
+                'message': _('Login port filled from the MAC index for %(n)d of %(total)d user(s).') % {
+                    'n': updated, 'total': len(self),
+                },
+                'type': 'success' if updated else 'warning',
+                'sticky': False,
+            }
+        }
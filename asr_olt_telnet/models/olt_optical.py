@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+import logging
+import re
+from collections import defaultdict
+from datetime import timedelta
+
+from odoo import api, fields, models, _
+
+from odoo.addons.asr_radius_manager.models.radius_bulk import chunked
+
+from .olt_config_snapshot import normalize_olt_port
+from .olt_scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+
+_logger = logging.getLogger(__name__)
+
+# Downsampling i serisë kohore: raw → mesatare për orë → mesatare për ditë
+RAW_RETENTION_HOURS = 48
+HOURLY_RETENTION_DAYS = 30
+DAILY_RETENTION_DAYS = 365
+
+# Pragjet default (dBm) për Rx të ONU-së; mund të ndryshohen nga ir.config_parameter
+DEFAULT_WARNING_DBM = -25.0
+DEFAULT_CRITICAL_DBM = -27.0
+DEFAULT_OVERLOAD_DBM = -8.0
+
+# gpon-onu_1/2/3:5   -20.123(dbm)     |  gpon_onu-1/2/3:5   N/A
+_POWER_RE = re.compile(r'(?:gpon|epon)[-_]onu[-_]\d+/\d+/\d+:(\d+)\s+(-?\d+(?:\.\d+)?)', re.IGNORECASE)
+# 1/2/3:5   enable   enable   working   1(GPON)
+_STATE_RE = re.compile(r'^\s*(?:\S*?[-_])?\d+/\d+/\d+:(\d+)\s+\S+\s+\S+\s+(\S+)', re.IGNORECASE)
+_PON_PORT_RE = re.compile(r'^(gpon|epon)-olt_(\d+/\d+/\d+):(\d+)$', re.IGNORECASE)
+
+OPTICAL_STATUS = [
+    ('ok', 'OK'),
+    ('warning', 'Weak Signal'),
+    ('critical', 'Critical'),
+    ('offline', 'Offline'),
+]
+
+
+def parse_onu_power(output):
+    """'show pon power onu-rx/olt-rx <port>' → {onu_id: dBm}; ONU-të me N/A mungojnë."""
+    values = {}
+    for line in (output or '').splitlines():
+        m = _POWER_RE.search(line)
+        if m:
+            values[int(m.group(1))] = float(m.group(2))
+    return values
+
+
+def parse_onu_state(output):
+    """'show gpon onu state <port>' → {onu_id: phase state} (p.sh. 'working', 'LOS', 'DyingGasp')."""
+    states = {}
+    for line in (output or '').splitlines():
+        m = _STATE_RE.match(line)
+        if m:
+            states[int(m.group(1))] = m.group(2)
+    return states
+
+
+class OltOnuOpticalSample(models.Model):
+    _name = 'olt.onu.optical.sample'
+    _description = 'ONU Optical Power Sample'
+    _order = 'date desc'
+    _log_access = False
+
+    device_id = fields.Many2one('crm.access.device', string='OLT', required=True,
+                                index=True, ondelete='cascade')
+    port = fields.Char(string='PON Port', required=True)
+    onu_id = fields.Integer(string='ONU ID', required=True)
+    date = fields.Datetime(string='Date', required=True, index=True)
+    resolution = fields.Selection([('raw', 'Raw'), ('hour', 'Hourly'), ('day', 'Daily')],
+                                  default='raw', required=True)
+    rx_power = fields.Float(string='ONU Rx (dBm)', digits=(6, 2), aggregator='avg')
+    olt_rx_power = fields.Float(string='OLT Rx (dBm)', digits=(6, 2), aggregator='avg')
+    online = fields.Boolean(string='Online')
+
+    def init(self):
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS olt_onu_optical_sample_onu_date_idx
+            ON olt_onu_optical_sample (device_id, port, onu_id, date)
+        """)
+
+    @api.model
+    def _insert(self, rows):
+        """Multi-row INSERT (device_id, port, onu_id, date, rx_power, olt_rx_power, online)."""
+        for chunk in chunked(rows):
+            self.env.cr.execute("""
+                INSERT INTO olt_onu_optical_sample
+                    (device_id, port, onu_id, date, rx_power, olt_rx_power, online, resolution)
+                VALUES {}
+            """.format(', '.join(["(%s, %s, %s, %s, %s, %s, %s, 'raw')"] * len(chunk))),
+                [v for row in chunk for v in row])
+
+    @api.model
+    def _downsample(self):
+        """Raw më të vjetra se 48h → mesatare për orë; orët më të vjetra se 30 ditë → për ditë."""
+        now = fields.Datetime.now()
+        raw_limit = (now - timedelta(hours=RAW_RETENTION_HOURS)).replace(minute=0, second=0, microsecond=0)
+        hour_limit = (now - timedelta(days=HOURLY_RETENTION_DAYS)).replace(hour=0, minute=0, second=0, microsecond=0)
+        cr = self.env.cr
+        for src, dst, unit, limit in (('raw', 'hour', 'hour', raw_limit), ('hour', 'day', 'day', hour_limit)):
+            cr.execute("""
+                INSERT INTO olt_onu_optical_sample
+                    (device_id, port, onu_id, date, resolution, rx_power, olt_rx_power, online)
+                SELECT device_id, port, onu_id, date_trunc(%s, date), %s,
+                       AVG(rx_power), AVG(olt_rx_power), bool_and(online)
+                  FROM olt_onu_optical_sample
+                 WHERE resolution = %s AND date < %s
+                 GROUP BY device_id, port, onu_id, date_trunc(%s, date)
+            """, [unit, dst, src, limit, unit])
+            cr.execute("DELETE FROM olt_onu_optical_sample WHERE resolution = %s AND date < %s", [src, limit])
+        cr.execute("DELETE FROM olt_onu_optical_sample WHERE date < %s",
+                   [now - timedelta(days=DAILY_RETENTION_DAYS)])
+        self.invalidate_model()
+
+
+class CrmAccessDeviceOptical(models.Model):
+    _inherit = 'crm.access.device'
+
+    olt_optical_poll_date = fields.Datetime(string="Optical Poll", readonly=True)
+
+    @api.model
+    def _optical_thresholds(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+
+        def param(key, default):
+            try:
+                return float(ICP.get_param(f'asr_olt_telnet.optical_{key}_dbm', default))
+            except (TypeError, ValueError):
+                return default
+
+        return param('warning', DEFAULT_WARNING_DBM), param('critical', DEFAULT_CRITICAL_DBM), \
+            param('overload', DEFAULT_OVERLOAD_DBM)
+
+    @api.model
+    def _optical_status(self, online, rx, thresholds):
+        warning, critical, overload = thresholds
+        if not online or rx is None:
+            return 'offline'
+        if rx < critical or rx > overload:
+            return 'critical'
+        if rx < warning:
+            return 'warning'
+        return 'ok'
+
+    def _olt_optical_commands(self, ports):
+        """Tre komanda për çdo port GPON (gjendja, Rx i ONU-ve, Rx në OLT) – jo për çdo ONU."""
+        self.ensure_one()
+        model = (self.model or '').upper()
+        is_c600 = 'C600' in model or 'C650' in model or 'C680' in model
+        commands = []
+        for port in ports:
+            iface = port.replace('-olt_', '_olt-') if is_c600 else port
+            commands += [
+                f"show gpon onu state {iface}",
+                f"show pon power onu-rx {iface}",
+                f"show pon power olt-rx {iface}",
+            ]
+        return commands
+
+    def _olt_poll_optical(self, priority=PRIORITY_INTERACTIVE):
+        """Lexo gjendjen dhe fuqinë optike të të gjitha ONU-ve në OLT-të e `self`.
+
+        Portet merren nga snapshot-i i konfigurimit (olt.onu.slot); çdo OLT përdor një sesion
+        nga pool-i për të gjitha portet. Mostrat shkruhen në olt.onu.optical.sample dhe
+        statusi aktual te asr.radius.user / res.partner. Kthen numrin e ONU-ve të lexuara.
+        """
+        devices = self.filtered(lambda d: d.device_type == 'olt' and d.ip_address
+                                and (d.manufacturer or '').upper() != 'HUAWEI')
+        if not devices:
+            return 0
+
+        ports = defaultdict(set)
+        for device, port in self.env['olt.onu.slot'].sudo()._read_group(
+                [('device_id', 'in', devices.ids), ('port', '=like', 'gpon-olt_%')], ['device_id', 'port']):
+            ports[device.id].add(port)
+        ports_sorted = {device_id: sorted(p) for device_id, p in ports.items()}
+
+        devices = devices.filtered(lambda d: d.id in ports_sorted)
+        thresholds = self._optical_thresholds()
+        now = fields.Datetime.now()
+        samples, current = [], {}
+
+        for res in devices._olt_fleet_run_batch(lambda d: d._olt_optical_commands(ports_sorted[d.id]),
+                                                timeout=30, priority=priority):
+            if not res['ok']:
+                _logger.warning('Optical poll failed on OLT %s: %s', res['device_id'], res['error'])
+                continue
+            outputs = res['results']
+            for i, port in enumerate(ports_sorted[res['device_id']]):
+                state_res, rx_res, olt_rx_res = outputs[3 * i:3 * i + 3]
+                states = parse_onu_state(state_res['output']) if state_res['ok'] else {}
+                rx = parse_onu_power(rx_res['output']) if rx_res['ok'] else {}
+                olt_rx = parse_onu_power(olt_rx_res['output']) if olt_rx_res['ok'] else {}
+                for onu_id in set(states) | set(rx):
+                    online = (states.get(onu_id) or '').lower() == 'working'
+                    samples.append((res['device_id'], port, onu_id, now,
+                                    rx.get(onu_id), olt_rx.get(onu_id), online))
+                    current[(res['device_id'], port, onu_id)] = (
+                        self._optical_status(online, rx.get(onu_id), thresholds),
+                        rx.get(onu_id), olt_rx.get(onu_id),
+                    )
+            self.browse(res['device_id']).sudo().write({'olt_optical_poll_date': now})
+
+        self.env['olt.onu.optical.sample'].sudo()._insert(samples)
+        updated = self.env['asr.radius.user'].sudo()._apply_optical_status(current, now)
+        _logger.info('🔦 Optical poll: %d ONU(s) on %d OLT(s), %d customer(s) updated',
+                     len(samples), len(devices), updated)
+        return len(samples)
+
+    def action_poll_optical(self):
+        count = self._olt_poll_optical()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Optical Power Polled'),
+                'message': _('%d ONU(s) read. Ports come from the ONU config snapshot.') % count,
+                'type': 'success' if count else 'warning',
+                'sticky': False,
+            }
+        }
+
+    @api.model
+    def _cron_poll_optical(self):
+        self._olt_fleet_devices()._olt_poll_optical(priority=PRIORITY_BACKGROUND)
+        self.env['olt.onu.optical.sample'].sudo()._downsample()
+
+
+class AsrRadiusUserOptical(models.Model):
+    _inherit = 'asr.radius.user'
+
+    onu_optical_status = fields.Selection(OPTICAL_STATUS, string="ONU Signal", readonly=True, index=True)
+    onu_rx_power = fields.Float(string="ONU Rx (dBm)", digits=(6, 2), readonly=True)
+    onu_olt_rx_power = fields.Float(string="OLT Rx (dBm)", digits=(6, 2), readonly=True)
+    onu_optical_date = fields.Datetime(string="Signal Read At", readonly=True)
+
+    @api.model
+    def _apply_optical_status(self, current, now):
+        """Shkruaj statusin optik te user-at (dhe partnerët) me UPDATE ... FROM (VALUES ...) për chunk.
+
+        `current` = {(device_id, port, onu_id): (status, rx, olt_rx)}; user-i gjendet nga
+        access_device_id + olt_pon_port ('gpon-olt_1/2/3:5').
+        """
+        if not current:
+            return 0
+        device_ids = list({key[0] for key in current})
+        rows = []
+        for user in self.search_read([('access_device_id', 'in', device_ids), ('olt_pon_port', '!=', False)],
+                                     ['access_device_id', 'olt_pon_port']):
+            m = _PON_PORT_RE.match((user['olt_pon_port'] or '').strip())
+            if not m:
+                continue
+            key = (user['access_device_id'][0], normalize_olt_port(f"{m.group(1)}-olt_{m.group(2)}"), int(m.group(3)))
+            if key in current:
+                status, rx, olt_rx = current[key]
+                rows.append((user['id'], status, rx, olt_rx))
+
+        cr = self.env.cr
+        for chunk in chunked(rows):
+            cr.execute("""
+                UPDATE asr_radius_user u
+                   SET onu_optical_status = v.status, onu_rx_power = v.rx,
+                       onu_olt_rx_power = v.olt_rx, onu_optical_date = %s
+                  FROM (VALUES {}) AS v(id, status, rx, olt_rx)
+                 WHERE u.id = v.id
+            """.format(', '.join(['(%s, %s, %s::numeric, %s::numeric)'] * len(chunk))),
+                [now] + [v for row in chunk for v in row])
+            cr.execute("""
+                UPDATE res_partner p
+                   SET onu_optical_status = u.onu_optical_status, onu_rx_power = u.onu_rx_power,
+                       onu_olt_rx_power = u.onu_olt_rx_power, onu_optical_date = u.onu_optical_date
+                  FROM asr_radius_user u
+                 WHERE p.radius_user_id = u.id AND u.id IN %s
+            """, [tuple(row[0] for row in chunk)])
+        self.invalidate_model(['onu_optical_status', 'onu_rx_power', 'onu_olt_rx_power', 'onu_optical_date'])
+        self.env['res.partner'].invalidate_model(['onu_optical_status', 'onu_rx_power', 'onu_olt_rx_power',
+                                                  'onu_optical_date'])
+        return len(rows)
+
+
+class ResPartnerOptical(models.Model):
+    _inherit = 'res.partner'
+
+    # Kopje e statusit të user-it RADIUS (përditësohet nga polling-u), për filtrim pa Telnet
+    onu_optical_status = fields.Selection(OPTICAL_STATUS, string="ONU Signal", readonly=True, index=True)
+    onu_rx_power = fields.Float(string="ONU Rx (dBm)", digits=(6, 2), readonly=True)
+    onu_olt_rx_power = fields.Float(string="OLT Rx (dBm)", digits=(6, 2), readonly=True)
+    onu_optical_date = fields.Datetime(string="Signal Read At", readonly=True)
@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+"""
+Scheduler i komandave Telnet për çdo OLT.
+
+OLT-të ZTE lejojnë vetëm pak sesione vty njëkohësisht; kur disa teknikë +
+automatizimi hapin sesione paralelisht, login-i dështon dhe duket si auth error.
+
+- Çdo host ka një numër maksimal sesionesh (default 2, `telnet_max_sessions` në OLT).
+- Kufiri zbatohet ndërmjet TË GJITHË proceseve Odoo (worker-at prefork + cron):
+  çdo sesion Telnet i hapur mban një "lease" = advisory lock Postgres mbi
+  (OLT, slot). Sesionet idle në pool mbajnë lease-in, pra numërohen si të zëna.
+- Brenda një procesi punët presin në radhë me prioritet:
+  WRITE (regjistrim/fshirje ONU) → INTERACTIVE (wizard-et) → BACKGROUND (polling/cron).
+  Ndërmjet proceseve, kush pret një lease e rikontrollon periodikisht (WRITE më shpesh).
+- Komandat read identike (host, user, komandë) të dhëna brenda `COALESCE_WINDOW`
+  sekondash ekzekutohen një herë; të tjerët marrin të njëjtin rezultat.
+- Pas çdo WRITE, cache-i i read-eve për atë host fshihet.
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+import psycopg2
+
+from odoo import _
+from odoo.exceptions import UserError
+from odoo.sql_db import connection_info_for
+
+_logger = logging.getLogger(__name__)
+
+PRIORITY_WRITE = 0
+PRIORITY_INTERACTIVE = 1
+PRIORITY_BACKGROUND = 2
+
+DEFAULT_MAX_SESSIONS = 2
+COALESCE_WINDOW = 5.0
+SLOT_WAIT_TIMEOUT = 90
+LIMITS_TTL = 60                 # sa sekonda mbahen në cache kufijtë e lexuar nga crm_access_device
+IDLE_TOKEN_BASE = 1000          # çelësat (host, 1000 + i) = sesione idle në pool-et e të gjithë worker-ave
+# Sa shpesh rikontrollohet një lease i zënë nga një proces tjetër, sipas prioritetit
+LEASE_POLL = {0: 0.3, 1: 0.7, 2: 2.0}
+
+
+class _HostSlots:
+    __slots__ = ('limit', 'active', 'waiters')
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.active = 0
+        self.waiters = []   # heap me [priority, seq, Event]
+
+
+class OltCommandScheduler:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = {}
+        self._seq = itertools.count()
+        self._inflight = {}
+        self._recent = {}
+        self.stats = {'executed': 0, 'coalesced': 0, 'queued': 0, 'timeouts': 0}
+
+    # ------------------------------------------------------------
+    # Slots (radha e brendshme e procesit, sipas prioritetit)
+    # ------------------------------------------------------------
+    @contextmanager
+    def slot(self, host, priority=PRIORITY_INTERACTIVE, wait_timeout=SLOT_WAIT_TIMEOUT, limit=None):
+        self._acquire(host, priority, wait_timeout, limit)
+        try:
+            yield
+        finally:
+            self._release(host)
+            if priority == PRIORITY_WRITE:
+                self.invalidate(host)
+
+    def _acquire(self, host, priority, wait_timeout, limit=None):
+        with self._lock:
+            hs = self._hosts.setdefault(host, _HostSlots(DEFAULT_MAX_SESSIONS))
+            if limit:
+                hs.limit = max(int(limit), 1)
+                # Nëse kufiri u rrit, zgjo punët që presin
+                while hs.waiters and hs.active < hs.limit:
+                    hs.active += 1
+                    heapq.heappop(hs.waiters)[2].set()
+            if hs.active < hs.limit and not hs.waiters:
+                hs.active += 1
+                return
+            event = threading.Event()
+            entry = [priority, next(self._seq), event]
+            heapq.heappush(hs.waiters, entry)
+            self.stats['queued'] += 1
+            _logger.info('⏳ OLT %s busy (%d/%d sessions), queued job with priority %d',
+                         host, hs.active, hs.limit, priority)
+
+        if event.wait(wait_timeout):
+            return
+        with self._lock:
+            # Slot-i mund të jetë dhënë pikërisht në kufirin e timeout-it
+            if event.is_set():
+                return
+            hs.waiters.remove(entry)
+            heapq.heapify(hs.waiters)
+            self.stats['timeouts'] += 1
+        raise UserError(_('OLT %(host)s is busy: all %(n)d telnet sessions are in use. Try again shortly.') % {
+            'host': host, 'n': hs.limit,
+        })
+
+    def _release(self, host):
+        with self._lock:
+            hs = self._hosts[host]
+            if hs.waiters and hs.active <= hs.limit:
+                # Slot-i kalon direkt te puna me prioritetin më të lartë
+                heapq.heappop(hs.waiters)[2].set()
+            else:
+                hs.active -= 1
+
+    # ------------------------------------------------------------
+    # Coalescing i read-eve
+    # ------------------------------------------------------------
+    def run_read(self, key, fn, window=COALESCE_WINDOW):
+        """Ekzekuto `fn()` një herë për `key` brenda `window` sekondash.
+
+        Thirrjet paralele me të njëjtin key presin rezultatin e ekzekutimit në vazhdim;
+        thirrjet brenda dritares marrin rezultatin e fundit të suksesshëm.
+        """
+        with self._lock:
+            now = time.monotonic()
+            cached = self._recent.get(key)
+            if cached and now - cached[0] < window:
+                self.stats['coalesced'] += 1
+                return cached[1]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.stats['coalesced'] += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            res = fn()
+        except Exception as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            self.stats['executed'] += 1
+            if not isinstance(res, dict) or res.get('ok', True):
+                self._recent[key] = (time.monotonic(), res)
+            self._prune(window)
+        future.set_result(res)
+        return res
+
+    def invalidate(self, host):
+        with self._lock:
+            for key in [k for k in self._recent if k[0] == host]:
+                self._recent.pop(key, None)
+
+    def _prune(self, window):
+        now = time.monotonic()
+        for key in [k for k, (ts, _res) in self._recent.items() if now - ts >= window]:
+            self._recent.pop(key, None)
+
+
+class OltVtyLeases:
+    """Kufiri vty ndërmjet proceseve: një advisory lock Postgres për çdo (OLT, slot).
+
+    Çdo proces mban një lidhje të dedikuar (autocommit) për çdo databazë; lock-et janë
+    session-level, ndaj lirohen vetë kur procesi vdes. Çelësi: (crc32(host), slot),
+    slot 1..limit; (crc32(host), 0) mbahet "shared" nga kush pret, që procesi që
+    liron një sesion ta mbyllë në vend që ta mbajë idle. Një sesion idle mban edhe
+    një token (crc32(host), IDLE_TOKEN_BASE + i), i < max_idle: kështu sesionet idle
+    kufizohen për OLT, jo për worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conns = {}        # dbname -> psycopg2 connection
+        self._held = set()      # (dbname, key, slot) të mbajtura nga ky proces
+        self._limits = {}       # (dbname, host) -> (ts, {'max_sessions': n, ...})
+
+    @staticmethod
+    def host_key(host):
+        return zlib.crc32(host.encode()) & 0x7fffffff
+
+    def _query(self, dbname, query, params=()):
+        with self._lock:
+            for attempt in (1, 2):
+                conn = self._conns.get(dbname)
+                try:
+                    if conn is None or conn.closed:
+                        conn = self._connect(dbname)
+                    with conn.cursor() as cr:
+                        cr.execute(query, params)
+                        return cr.fetchall() if cr.description else None
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    self._conns.pop(dbname, None)
+                    if attempt == 2:
+                        raise
+
+    def _connect(self, dbname):
+        """Lidhje e re; lease-t e mbajtura në lidhjen e humbur rimerren (best effort)."""
+        _dsn, info = connection_info_for(dbname)
+        conn = psycopg2.connect(application_name='odoo-olt-vty-leases', **info)
+        conn.autocommit = True
+        self._conns[dbname] = conn
+        with conn.cursor() as cr:
+            for held_db, key, slot in list(self._held):
+                if held_db != dbname:
+                    continue
+                cr.execute("SELECT pg_try_advisory_lock(%s, %s)", (key, slot))
+                if not cr.fetchone()[0]:
+                    _logger.warning('⚠️ OLT vty lease (%s, %s) lost after DB reconnect', key, slot)
+        return conn
+
+    def limits(self, dbname, host):
+        """Kufijtë e OLT-së nga crm_access_device (cache LIMITS_TTL sekonda)."""
+        defaults = {'max_sessions': DEFAULT_MAX_SESSIONS, 'max_idle': None}
+        if not dbname:
+            return defaults
+        cached = self._limits.get((dbname, host))
+        if cached and time.monotonic() - cached[0] < LIMITS_TTL:
+            return cached[1]
+        try:
+            rows = self._query(dbname, """
+                SELECT telnet_max_sessions, telnet_max_idle FROM crm_access_device
+                 WHERE device_type = 'olt' AND btrim(ip_address) = %s
+                 ORDER BY id LIMIT 1
+            """, (host,))
+        except Exception as e:
+            _logger.warning('Could not read telnet limits of OLT %s: %s', host, e)
+            rows = None
+        limits = dict(defaults)
+        if rows and rows[0][0]:
+            limits['max_sessions'] = max(int(rows[0][0]), 1)
+        if rows and rows[0][1] is not None:
+            # max_idle nuk e kalon kurrë kufirin e sesioneve
+            limits['max_idle'] = max(min(int(rows[0][1]), limits['max_sessions']), 0)
+        self._limits[(dbname, host)] = (time.monotonic(), limits)
+        return limits
+
+    def _try_lock(self, dbname, key, slots):
+        for slot in slots:
+            # Lock-et session-level janë re-entrant brenda lidhjes: slot-et e këtij procesi anashkalohen
+            with self._lock:
+                if (dbname, key, slot) in self._held:
+                    continue
+            if self._query(dbname, "SELECT pg_try_advisory_lock(%s, %s)", (key, slot))[0][0]:
+                with self._lock:
+                    self._held.add((dbname, key, slot))
+                return slot
+        return None
+
+    def park(self, lease, max_idle):
+        """Token për të mbajtur sesionin e `lease` idle; None kur OLT-ja ka max_idle sesione idle."""
+        if not lease or max_idle <= 0:
+            return None
+        dbname, key, _slot = lease
+        token = self._try_lock(dbname, key, range(IDLE_TOKEN_BASE, IDLE_TOKEN_BASE + max_idle))
+        return (dbname, key, token) if token else None
+
+    def acquire(self, dbname, host, limit, priority=PRIORITY_INTERACTIVE,
+                wait_timeout=SLOT_WAIT_TIMEOUT, make_room=None):
+        """Merr një lease për një sesion të ri vty; kthen (dbname, key, slot).
+
+        make_room(): mbyll një sesion idle të këtij procesi te ky host (True nëse mbylli),
+        që lease-i i tij të ripërdoret. Pa dbname (thread jashtë Odoo) kthen None:
+        atëherë vlen vetëm kufiri brenda procesit.
+        """
+        if not dbname:
+            return None
+        key = self.host_key(host)
+        deadline = time.monotonic() + wait_timeout
+        waiting = False
+        try:
+            while True:
+                slot = self._try_lock(dbname, key, range(1, limit + 1))
+                if slot:
+                    return (dbname, key, slot)
+                if make_room and make_room():
+                    continue
+                if not waiting:
+                    self._query(dbname, "SELECT pg_advisory_lock_shared(%s, 0)", (key,))
+                    waiting = True
+                    _logger.info('⏳ OLT %s: all %d vty sessions are held by other workers, waiting', host, limit)
+                if time.monotonic() >= deadline:
+                    raise UserError(_('OLT %(host)s is busy: all %(n)d telnet sessions are in use. '
+                                      'Try again shortly.') % {'host': host, 'n': limit})
+                time.sleep(LEASE_POLL.get(priority, 1.0))
+        finally:
+            if waiting:
+                try:
+                    self._query(dbname, "SELECT pg_advisory_unlock_shared(%s, 0)", (key,))
+                except Exception:
+                    pass
+
+    def others_waiting(self, lease):
+        """True kur një proces tjetër pret një lease për këtë OLT (mban (key, 0) shared)."""
+        if not lease:
+            return False
+        dbname, key, _slot = lease
+        try:
+            rows = self._query(dbname, """
+                SELECT EXISTS (
+                    SELECT 1 FROM pg_locks
+                     WHERE locktype = 'advisory' AND objsubid = 2
+                       AND database = (SELECT oid FROM pg_database WHERE datname = current_database())
+                       AND classid::bigint = %s AND objid::bigint = 0
+                       AND pid <> pg_backend_pid())
+            """, (key,))
+        except Exception:
+            return False
+        return bool(rows and rows[0][0])
+
+    def release(self, lease):
+        if not lease:
+            return
+        with self._lock:
+            if lease not in self._held:
+                return
+            self._held.discard(lease)
+        dbname, key, slot = lease
+        try:
+            self._query(dbname, "SELECT pg_advisory_unlock(%s, %s)", (key, slot))
+        except Exception as e:
+            # Lidhja ra: lock-u u lirua bashkë me të
+            _logger.debug('OLT vty lease release failed: %s', e)
+
+
+SCHEDULER = OltCommandScheduler()
+LEASES = OltVtyLeases()
@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+"""
+Pool me sesione Telnet të autentikuara për çdo OLT.
+
+Login-i në ZTE (Username/Password + prompt) kushton 1–2 sekonda, ndaj
+sesionet mbahen "warm" dhe ripërdoren nga të gjitha wizard-et:
+
+    with olt_session(host, user, pwd) as sess:
+        out = sess.run_show('show gpon onu uncfg')
+
+- Para çdo huazimi sesioni kontrollohet nëse është gjallë (ENTER → prompt).
+- Kur kthehet në pool, gjendja e terminalit resetohet (`end` → del nga config mode).
+- Sesionet idle mbyllen pas `idle_timeout` sekondash nga një reaper thread.
+- Për çdo OLT mbahen të shumtën `telnet_max_idle` sesione idle (default 1, 0 = asnjë);
+  kur një worker tjetër pret një vty në atë OLT, sesioni mbyllet në vend që të mbahet idle.
+- Nëse borrower-i hedh exception, sesioni mbyllet (gjendja është e panjohur).
+- Hyrja kalon nga scheduler-i (olt_scheduler) që kufizon sesionet vty për OLT.
+- Çdo sesion i hapur mban një lease vty (advisory lock Postgres) deri sa mbyllet,
+  edhe kur rri idle në pool: kufiri i OLT-së numëron sesionet e të gjithë worker-ave.
+
+Pool-i jeton në memorien e procesit (një për çdo worker Odoo).
+"""
+import logging
+import telnetlib
+import threading
+import time
+from contextlib import contextmanager
+
+from odoo import _
+from odoo.exceptions import UserError
+
+from .olt_expect import ZteCliExpect
+from .olt_scheduler import LEASES, SCHEDULER, PRIORITY_INTERACTIVE, SLOT_WAIT_TIMEOUT
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_IDLE_TIMEOUT = 180      # sekonda para se të mbyllet një sesion idle
+DEFAULT_MAX_IDLE = 1            # sesione idle të mbajtura për çdo OLT (`telnet_max_idle` në OLT)
+REAPER_INTERVAL = 5             # reaper-i kontrollon edhe nëse një worker tjetër pret vty
+
+
+class OltTelnetSession:
+    """Një lidhje Telnet e loguar në OLT."""
+
+    def __init__(self, host, username, password, timeout=10, port=23):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.tn = None
+        self.cli = None
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.commands_run = 0
+        self.lease = None       # lease vty nga LEASES; lirohet në close()
+        self.idle_token = None  # token idle nga LEASES.park(), vetëm sa rri në pool
+
+    @property
+    def key(self):
+        return (self.host, self.port, self.username)
+
+    # ------------------------------------------------------------
+    # Login / lifecycle
+    # ------------------------------------------------------------
+    def open(self):
+        host, timeout = self.host, self.timeout
+        try:
+            self.tn = telnetlib.Telnet(host, self.port, timeout)
+        except Exception as e:
+            raise UserError(_('Telnet could not connect to %s: %s') % (host, str(e)))
+
+        try:
+            self.cli = ZteCliExpect(self.tn, host, timeout=timeout)
+            self.cli.login(self.username, self.password)
+            self.cli.disable_paging()
+        except Exception:
+            self.close()
+            raise
+
+        _logger.info('🔌 OLT session opened %s@%s (prompt %s, paging %s)', self.username, host,
+                     self.cli.hostname, 'off' if self.cli.paging_disabled else 'on')
+        return self
+
+    def close(self):
+        if self.tn:
+            try:
+                self.tn.write(b'\nquit\n')
+            except Exception:
+                pass
+            try:
+                self.tn.close()
+            except Exception:
+                pass
+            self.tn = None
+        self.unpark()
+        LEASES.release(self.lease)
+        self.lease = None
+
+    def unpark(self):
+        LEASES.release(self.idle_token)
+        self.idle_token = None
+
+    def is_alive(self, timeout=2):
+        """ENTER bosh → duhet të kthehet prompt-i brenda `timeout` sekondave."""
+        return bool(self.tn) and self.cli.sync(timeout)
+
+    def reset(self):
+        """Kthe terminalin në privileged mode për borrower-in tjetër."""
+        if self.cli.mode != 'exec':
+            self.cli.execute('end')
+        self.last_used = time.monotonic()
+
+    # ------------------------------------------------------------
+    # Commands
+    # ------------------------------------------------------------
+    def execute(self, command, timeout=None):
+        """Ekzekuto një komandë; kthen dict {'command','output','ok','error','mode','elapsed'}."""
+        res = self.cli.execute(command, timeout=timeout or self.timeout)
+        self.commands_run += 1
+        self.last_used = time.monotonic()
+        return res
+
+    def run(self, commands, stop_on_error=True, timeout=None):
+        """Ekzekuto një listë komandash; kthen listën e rezultateve (dict) për secilën."""
+        results = self.cli.run(commands, stop_on_error=stop_on_error, timeout=timeout or self.timeout)
+        self.commands_run += len(results)
+        self.last_used = time.monotonic()
+        return results
+
+    def send(self, command, timeout=None):
+        """Dërgo një komandë dhe kthe output-in e pastër (str)."""
+        return self.execute(command, timeout=timeout)['output']
+
+    def run_show(self, command, timeout=None):
+        """Ekzekuto një komandë read-only (paging trajtohet nga expect engine)."""
+        return self.execute(command, timeout=timeout)['output']
+
+
+class OltSessionPool:
+    """Pool thread-safe me sesione idle, të indeksuara sipas (host, port, username)."""
+
+    def __init__(self, idle_timeout=DEFAULT_IDLE_TIMEOUT, max_idle=DEFAULT_MAX_IDLE):
+        self.idle_timeout = idle_timeout
+        self.max_idle = max_idle
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+        self.stats = {'opened': 0, 'reused': 0, 'discarded': 0, 'reaped': 0}
+
+    def acquire(self, host, username, password, timeout=10, port=23, dbname=None,
+                limit=None, priority=PRIORITY_INTERACTIVE):
+        key = (host, port, username)
+        while True:
+            with self._lock:
+                bucket = self._idle.get(key) or []
+                sess = bucket.pop() if bucket else None
+            if sess is None:
+                break
+            sess.unpark()
+            if sess.password == password and sess.is_alive():
+                sess.timeout = timeout
+                self.stats['reused'] += 1
+                return sess
+            sess.close()
+            self.stats['discarded'] += 1
+
+        # Sesion i ri → duhet një lease vty i lirë (ndërmjet të gjithë proceseve)
+        lease = LEASES.acquire(dbname, host, limit or 1, priority=priority, wait_timeout=SLOT_WAIT_TIMEOUT,
+                               make_room=lambda: self._close_one_idle(host))
+        sess = OltTelnetSession(host, username, password, timeout=timeout, port=port)
+        sess.lease = lease
+        try:
+            sess.open()
+        except Exception:
+            sess.close()    # liron lease-in edhe kur lidhja s'u hap fare
+            raise
+        self.stats['opened'] += 1
+        self._ensure_reaper()
+        return sess
+
+    def _close_one_idle(self, host):
+        """Mbyll sesionin idle më të vjetër të këtij procesi te `host` (liron lease-in e tij)."""
+        with self._lock:
+            candidates = [(s.last_used, k) for k, bucket in self._idle.items() if k[0] == host for s in bucket]
+            if not candidates:
+                return False
+            _ts, key = min(candidates)
+            bucket = self._idle[key]
+            sess = min(bucket, key=lambda s: s.last_used)
+            bucket.remove(sess)
+            if not bucket:
+                self._idle.pop(key, None)
+        sess.close()
+        self.stats['reaped'] += 1
+        return True
+
+    def release(self, sess, discard=False, max_idle=None):
+        if not discard:
+            try:
+                sess.reset()
+            except Exception:
+                discard = True
+        max_idle = self.max_idle if max_idle is None else max_idle
+        # Një worker tjetër pret vty në këtë OLT → liroja lease-in në vend që ta mbajmë idle
+        if not discard and max_idle > 0 and not LEASES.others_waiting(sess.lease):
+            with self._lock:
+                host_idle = sum(len(b) for k, b in self._idle.items() if k[0] == sess.host)
+            # Pa lease (thread jashtë Odoo) vlen vetëm kufiri i procesit
+            sess.idle_token = LEASES.park(sess.lease, max_idle) if sess.lease else None
+            if host_idle < max_idle and (sess.idle_token or not sess.lease):
+                with self._lock:
+                    self._idle.setdefault(sess.key, []).append(sess)
+                return
+        sess.close()
+        if discard:
+            self.stats['discarded'] += 1
+
+    def release_to_waiters(self):
+        """Mbyll sesionet idle të OLT-ve ku një worker tjetër pret vty; kthen numrin e mbyllur."""
+        with self._lock:
+            by_host = {}
+            for key, bucket in self._idle.items():
+                for sess in bucket:
+                    if sess.lease:
+                        by_host.setdefault(key[0], sess.lease)
+        closed = 0
+        for host, lease in by_host.items():
+            if not LEASES.others_waiting(lease):
+                continue
+            with self._lock:
+                keys = [k for k in self._idle if k[0] == host]
+                sessions = [s for k in keys for s in self._idle.pop(k)]
+            for sess in sessions:
+                sess.close()
+            closed += len(sessions)
+        if closed:
+            _logger.info('🔌 Closed %d idle OLT session(s) for workers waiting on vty', closed)
+        return closed
+
+    def reap(self):
+        """Mbyll sesionet idle më të vjetra se idle_timeout; kthen numrin e mbyllur."""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for key, bucket in list(self._idle.items()):
+                keep = [s for s in bucket if now - s.last_used < self.idle_timeout]
+                expired += [s for s in bucket if now - s.last_used >= self.idle_timeout]
+                if keep:
+                    self._idle[key] = keep
+                else:
+                    self._idle.pop(key, None)
+        for sess in expired:
+            sess.close()
+        if expired:
+            self.stats['reaped'] += len(expired)
+            _logger.info('🧹 Closed %d idle OLT session(s)', len(expired))
+        return len(expired)
+
+    def close_all(self, host=None):
+        with self._lock:
+            keys = [k for k in self._idle if host is None or k[0] == host]
+            sessions = [s for k in keys for s in self._idle.pop(k)]
+        for sess in sessions:
+            sess.close()
+        return len(sessions)
+
+    def _ensure_reaper(self):
+        if self._reaper and self._reaper.is_alive():
+            return
+
+        def _loop():
+            while True:
+                time.sleep(REAPER_INTERVAL)
+                try:
+                    self.reap()
+                    self.release_to_waiters()
+                except Exception as e:
+                    _logger.warning('OLT session reaper failed: %s', e)
+
+        self._reaper = threading.Thread(target=_loop, name='olt-session-reaper', daemon=True)
+        self._reaper.start()
+
+
+SESSION_POOL = OltSessionPool()
+
+
+def _current_dbname():
+    return getattr(threading.current_thread(), 'dbname', None)
+
+
+@contextmanager
+def olt_session(host, username, password, timeout=10, port=23, priority=PRIORITY_INTERACTIVE, dbname=None):
+    """Huazo një sesion të loguar nga pool-i; e kthen (ose e mbyll në error) në fund.
+
+    Sesioni merret vetëm pasi scheduler-i jep një slot për këtë OLT (kufiri vty +
+    prioriteti: WRITE → INTERACTIVE → BACKGROUND). `dbname` duhet dhënë nga thread-et
+    jashtë request/cron (p.sh. ThreadPoolExecutor), që kufiri të vlejë ndërmjet proceseve.
+    """
+    if not host:
+        raise UserError(_('Missing OLT IP/host.'))
+    if not username or not password:
+        raise UserError(_('Set OLT Username/Password on OLT form or Company settings.'))
+
+    host = host.strip()
+    dbname = dbname or _current_dbname()
+    limits = LEASES.limits(dbname, host)
+    limit = limits['max_sessions']
+    with SCHEDULER.slot(host, priority, limit=limit):
+        sess = SESSION_POOL.acquire(host, username, password, timeout=timeout, port=port,
+                                    dbname=dbname, limit=limit, priority=priority)
+        try:
+            yield sess
+        except Exception:
+            SESSION_POOL.release(sess, discard=True)
+            raise
+        else:
+            SESSION_POOL.release(sess, max_idle=limits['max_idle'])
+
+
+def olt_read(host, username, password, command, timeout=10, priority=PRIORITY_INTERACTIVE, dbname=None):
+    """Komandë read-only me coalescing: thirrjet identike brenda pak sekondash ndajnë
+    të njëjtin ekzekutim. Kthen dict-in e rezultatit të expect engine."""
+    dbname = dbname or _current_dbname()
+
+    def _execute():
+        with olt_session(host, username, password, timeout=timeout, priority=priority, dbname=dbname) as sess:
+            return sess.execute(command)
+
+    return SCHEDULER.run_read(((host or '').strip(), username, command.strip()), _execute)
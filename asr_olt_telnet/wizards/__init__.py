@@ -1,4 +1,5 @@
 from . import olt_onu_uncfg_wizard
 from . import olt_quick_register_wizard
+from . import olt_batch_register_wizard
 from . import olt_show_mac_wizard
 from . import olt_command_test_wizard  # ← NEW
\ No newline at end of file
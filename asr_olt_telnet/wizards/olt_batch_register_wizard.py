@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import time
+from collections import defaultdict
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+from ..models.olt_config_snapshot import max_onu_slots, normalize_olt_port, parse_onu_config
+from ..models.olt_scheduler import PRIORITY_WRITE
+from ..models.olt_session_pool import olt_session
+from .olt_quick_register_wizard import onu_type_options
+
+_logger = logging.getLogger(__name__)
+
+# Modet me VoIP kërkojnë kredenciale SIP për çdo klient → vetëm nga Quick Register
+_BATCH_FUNCTION_MODES = [
+    ('bridge', 'Bridge'),
+    ('router', 'Router'),
+    ('bridge_mcast', 'Bridge + MCAST'),
+]
+
+
+class OltOnuRegisterBatchLine(models.TransientModel):
+    _name = 'olt.onu.register.batch.line'
+    _description = 'Batch ONU Registration (row)'
+    _order = 'olt_id, interface, id'
+
+    batch_id = fields.Many2one('olt.onu.register.batch', ondelete='cascade')
+    olt_id = fields.Many2one('crm.access.device', string="OLT", required=True)
+    technology = fields.Selection([('gpon', 'GPON'), ('epon', 'EPON')], string="Tech", default='gpon')
+    interface = fields.Char(string="Interface", required=True, help="OLT port (e.g., gpon-olt_1/5/10)")
+    serial = fields.Char(string="Serial", required=True)
+    customer_id = fields.Many2one('asr.radius.user', string="Customer",
+                                  help="Rreshtat pa klient anashkalohen")
+    onu_slot = fields.Integer(string="ONU Slot", readonly=True)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Registered'),
+        ('rolled_back', 'Failed (rolled back)'),
+        ('failed', 'Failed'),
+        ('skipped', 'Skipped'),
+    ], default='pending', readonly=True)
+    message = fields.Text(string="Result", readonly=True)
+    elapsed = fields.Float(string="Time (s)", readonly=True, digits=(10, 2))
+
+
+class OltOnuRegisterBatch(models.TransientModel):
+    _name = 'olt.onu.register.batch'
+    _description = 'Batch Register ONUs (from scan)'
+
+    uncfg_wizard_id = fields.Integer(string="Parent Wizard ID")
+    line_ids = fields.One2many('olt.onu.register.batch.line', 'batch_id', string="ONUs")
+
+    # Konfigurimi i përbashkët për të gjitha ONU-të e batch-it
+    onu_type = fields.Char(string="ONU Type", required=True, default='ZTE-F612')
+    onu_type_options = fields.Char(compute='_compute_onu_type_options')
+    function_mode = fields.Selection(_BATCH_FUNCTION_MODES, string="Function Mode", required=True, default='bridge')
+    internet_vlan = fields.Char(string="Internet VLAN", required=True)
+    tv_vlan = fields.Char(string="TV VLAN")
+    speed_profile_name = fields.Char(string="Speed Profile", required=True)
+
+    state = fields.Selection([('draft', 'Draft'), ('done', 'Done')], default='draft', readonly=True)
+    done_count = fields.Integer(string="Registered", compute='_compute_counts')
+    failed_count = fields.Integer(string="Failed", compute='_compute_counts')
+    skipped_count = fields.Integer(string="Skipped", compute='_compute_counts')
+
+    @api.depends('line_ids.olt_id')
+    def _compute_onu_type_options(self):
+        for rec in self:
+            rec.onu_type_options = json.dumps(onu_type_options(rec.line_ids.olt_id))
+
+    @api.depends('line_ids.state')
+    def _compute_counts(self):
+        for rec in self:
+            states = rec.line_ids.mapped('state')
+            rec.done_count = states.count('done')
+            rec.failed_count = states.count('failed') + states.count('rolled_back')
+            rec.skipped_count = states.count('skipped')
+
+    @api.model
+    def _prepare_from_uncfg(self, uncfg_lines):
+        """Vlerat e batch-it nga rreshtat e skanimit; klienti gjendet nga ont_serial (nëse është futur)."""
+        serials = [(l.sn or '').strip().upper() for l in uncfg_lines if l.sn]
+        customers = {}
+        if serials and 'ont_serial' in self.env['asr.radius.user']._fields:
+            for user in self.env['asr.radius.user'].search([('ont_serial', 'in', serials)]):
+                customers[(user.ont_serial or '').strip().upper()] = user.id
+
+        lines = []
+        for l in uncfg_lines:
+            olt = l.olt_id or l.wizard_id.olt_id
+            serial = (l.sn or '').strip().upper()
+            if not olt or not serial:
+                continue
+            lines.append((0, 0, {
+                'olt_id': olt.id,
+                'technology': l.technology or 'gpon',
+                'interface': normalize_olt_port(l._extract_olt_port(l.olt_index)),
+                'serial': serial,
+                'customer_id': customers.get(serial, False),
+            }))
+
+        vals = {'line_ids': lines}
+        olt = uncfg_lines.mapped('olt_id')[:1] or uncfg_lines.mapped('wizard_id.olt_id')[:1]
+        if olt:
+            if olt.internet_vlan:
+                vals['internet_vlan'] = olt.internet_vlan.split(',')[0].strip()
+            if olt.tv_vlan:
+                vals['tv_vlan'] = olt.tv_vlan.split(',')[0].strip()
+            profiles = olt._get_olt_speed_profiles()
+            if profiles:
+                vals['speed_profile_name'] = profiles[0]
+        types = onu_type_options(uncfg_lines.mapped('olt_id') or uncfg_lines.mapped('wizard_id.olt_id'))
+        if 'ZTE-F612' not in types:
+            vals['onu_type'] = types[0]
+        return vals
+
+    # ------------------------------------------------------------
+    # Regjistrimi
+    # ------------------------------------------------------------
+    def _quick_record(self, line):
+        """Wizard-i Quick Register në memorie (pa ruajtje) – ripërdor gjeneratorët e konfigurimit."""
+        return self.env['olt.onu.register.quick'].new({
+            'customer_id': line.customer_id.id,
+            'access_device_id': line.olt_id.id,
+            'interface': line.interface,
+            'onu_slot': line.onu_slot,
+            'serial': line.serial,
+            'onu_type': self.onu_type,
+            'function_mode': self.function_mode,
+            'internet_vlan': self.internet_vlan,
+            'tv_vlan': self.tv_vlan,
+            'speed_profile_name': self.speed_profile_name,
+        })
+
+    def _register_on_olt(self, olt, lines):
+        """Regjistro të gjitha ONU-të e një OLT në një sesion të vetëm (WRITE).
+
+        Për çdo port lexohet konfigurimi live një herë brenda të njëjtit sesion dhe
+        slot-et ndahen në memorie. Çdo ONU ekzekutohet me kontroll për çdo komandë;
+        në dështim fshihet vetëm ai ONU (`no onu <slot>`) dhe vazhdohet me të tjerët.
+        Kthen {line_id: vals} me rezultatin për çdo rresht.
+        """
+        results = {}
+        user, pwd = olt.get_telnet_credentials()
+        model = (olt.model or '').upper()
+        is_c600 = 'C600' in model or 'C650' in model or 'C680' in model
+
+        by_port = defaultdict(list)
+        for line in lines:
+            by_port[line.interface].append(line)
+
+        current = None
+        try:
+            with olt_session(olt.ip_address.strip(), user, pwd, timeout=12, priority=PRIORITY_WRITE) as sess:
+                for port, port_lines in by_port.items():
+                    res = sess.execute(olt._olt_port_config_command(port), timeout=15)
+                    if not res['ok']:
+                        for line in port_lines:
+                            results[line.id] = {'state': 'failed', 'message': _('Could not read port config: %s') % res['error']}
+                        continue
+                    live = parse_onu_config(res['output'], default_port=port).get(normalize_olt_port(port), {})
+                    occupied = set(live)
+                    live_serials = {sn: slot for slot, (_type, sn) in live.items() if sn}
+                    interface_for_cmd = port.replace('-olt_', '_olt-') if is_c600 else port
+
+                    for line in port_lines:
+                        current = line
+                        start = time.monotonic()
+                        if line.serial in live_serials:
+                            results[line.id] = {
+                                'state': 'skipped',
+                                'onu_slot': live_serials[line.serial],
+                                'message': _('Already registered on %(port)s:%(slot)d') % {
+                                    'port': port, 'slot': live_serials[line.serial]},
+                            }
+                            continue
+                        slot = next((s for s in range(1, max_onu_slots(port) + 1) if s not in occupied), None)
+                        if not slot:
+                            results[line.id] = {'state': 'failed', 'message': _('No free slots available on port %s') % port}
+                            continue
+                        line.onu_slot = slot
+                        try:
+                            commands = [c.strip() for c in self._quick_record(line)._generate_config().split(';') if c.strip()]
+                        except UserError as e:
+                            results[line.id] = {'state': 'failed', 'onu_slot': 0, 'message': str(e)}
+                            continue
+
+                        occupied.add(slot)
+                        steps = sess.run(commands, stop_on_error=True)
+                        elapsed = time.monotonic() - start
+                        if steps and steps[-1]['ok']:
+                            results[line.id] = {'state': 'done', 'onu_slot': slot, 'elapsed': elapsed,
+                                                'message': _('Registered on %(port)s:%(slot)d') % {'port': port, 'slot': slot}}
+                            sess.reset()
+                            continue
+
+                        failed = steps[-1] if steps else {'command': '', 'error': _('No output')}
+                        error = _('Failed at step %(step)d/%(total)d: %(cmd)s\n%(err)s') % {
+                            'step': len(steps), 'total': len(commands), 'cmd': failed['command'], 'err': failed['error'],
+                        }
+                        # Rollback i synuar: fshi vetëm këtë ONU
+                        sess.reset()
+                        rollback = sess.run(['conf t', f'interface {interface_for_cmd}', f'no onu {slot}', 'end'],
+                                            stop_on_error=True)
+                        if rollback and rollback[-1]['ok']:
+                            occupied.discard(slot)
+                            results[line.id] = {'state': 'rolled_back', 'onu_slot': 0, 'elapsed': elapsed,
+                                                'message': error + '\n' + _('🔄 Rollback successful: ONU deleted from OLT.')}
+                        else:
+                            results[line.id] = {'state': 'failed', 'onu_slot': slot, 'elapsed': elapsed,
+                                                'message': error + '\n' + _('⚠️ Rollback failed, manual cleanup: interface %(i)s / no onu %(s)d') % {
+                                                    'i': interface_for_cmd, 's': slot}}
+                        sess.reset()
+                    current = None
+        except Exception as e:
+            _logger.error('Batch registration on %s aborted: %s', olt.name, e)
+            if current and current.id not in results:
+                results[current.id] = {'state': 'failed', 'message': _('Session lost, ONU state unknown (check slot %(s)d): %(e)s') % {
+                    's': current.onu_slot, 'e': e}}
+            for line in lines:
+                results.setdefault(line.id, {'state': 'failed', 'onu_slot': 0,
+                                             'message': _('Not attempted: %s') % e})
+        return results
+
+    def action_register(self):
+        self.ensure_one()
+        todo = self.line_ids.filtered(lambda l: l.state == 'pending')
+        if not todo:
+            raise UserError(_('There are no pending ONUs to register.'))
+
+        skipped = todo.filtered(lambda l: not l.customer_id or not l.customer_id.username)
+        skipped.write({'state': 'skipped', 'message': _('No customer (RADIUS user) selected.')})
+        todo -= skipped
+
+        # VLAN-et kontrollohen një herë për çdo OLT (si në Quick Register)
+        by_olt = defaultdict(lambda: self.env['olt.onu.register.batch.line'])
+        for line in todo:
+            by_olt[line.olt_id] |= line
+
+        for olt, lines in by_olt.items():
+            if not olt.ip_address:
+                lines.write({'state': 'failed', 'message': _('OLT missing Management IP.')})
+                continue
+            try:
+                self._quick_record(lines[0])._check_vlan_values()
+            except UserError as e:
+                lines.write({'state': 'failed', 'message': str(e)})
+                continue
+
+            results = self._register_on_olt(olt, lines)
+            for line in lines:
+                line.write(results[line.id])
+
+            self._apply_registered(olt, lines.filtered(lambda l: l.state == 'done'))
+
+        self.state = 'done'
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'olt.onu.register.batch',
+            'view_mode': 'form',
+            'res_id': self.id,
+            'target': 'new',
+        }
+
+    def _apply_registered(self, olt, lines):
+        """Snapshot + fushat e portës te klientët, pas sesionit (jo brenda tij)."""
+        if not lines:
+            return
+        Slot = self.env['olt.onu.slot']
+        for line in lines:
+            Slot._remember(olt, line.interface, line.onu_slot, onu_type=self.onu_type, serial=line.serial)
+
+        customers = lines.mapped('customer_id')
+        if 'access_device_id' in customers._fields:
+            customers.write({'access_device_id': olt.id})
+        for line in lines:
+            vals = self._quick_record(line)._customer_port_vals()
+            vals.pop('access_device_id', None)
+            try:
+                if vals:
+                    line.customer_id.write(vals)
+            except Exception as e:
+                _logger.warning('Customer %s port fields not updated: %s', line.customer_id.username, e)
+
+        try:
+            olt.message_post(body=_('Batch registration: %(n)d ONU(s) registered by %(user)s') % {
+                'n': len(lines), 'user': self.env.user.display_name})
+        except Exception:
+            pass
+        _logger.info('✅ Batch registration on %s: %d ONU(s) registered', olt.name, len(lines))
+
+    def action_back_to_list(self):
+        self.ensure_one()
+        if not self.uncfg_wizard_id:
+            raise UserError(_('Cannot navigate back: parent wizard not found.'))
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'olt.onu.uncfg.wizard',
+            'res_id': self.uncfg_wizard_id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
-import time
-import telnetlib
 import logging
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 
+from ..models.olt_fleet_command import _is_readonly
+from ..models.olt_scheduler import PRIORITY_INTERACTIVE, PRIORITY_WRITE
+from ..models.olt_session_pool import olt_read, olt_session
+
 _logger = logging.getLogger(__name__)
 
 
@@ -92,81 +94,21 @@ class OltCommandTestWizard(models.TransientModel):
         return commands.get(self.command_type, '')
 
     def _telnet_run(self, host, username, password, command, timeout=10):
-        """Execute Telnet command - copied from olt_onu_uncfg_wizard"""
-        if not host:
-            raise UserError(_('Missing OLT IP/host.'))
-        if not username or not password:
-            raise UserError(_('Set OLT Username/Password on OLT form or Company settings.'))
-
-        chunks = []
-        try:
-            tn = telnetlib.Telnet(host, 23, timeout)
-        except Exception as e:
-            raise UserError(_('Telnet could not connect to %s: %s') % (host, str(e)))
-
-        try:
-            # Username
-            idx, _, text = tn.expect([b'Username:', b'Login:', b'login:'], timeout)
-            if idx == -1:
-                raise UserError(_('Did not receive Username prompt'))
-            tn.write((username + '\n').encode('ascii', errors='ignore'))
-            time.sleep(0.3)
-
-            # Password
-            idx, _, text = tn.expect([b'Password:', b'password:'], timeout)
-            if idx == -1:
-                raise UserError(_('Did not receive Password prompt'))
-            tn.write((password + '\n').encode('ascii', errors='ignore'))
-            time.sleep(0.5)
-
-            # Check auth
-            idx, _, text = tn.expect([
-                b'>', b'#', b'$',
-                b'Username:',
-                b'Authentication failed',
-                b'Login incorrect',
-                b'Access denied'
-            ], timeout)
-
-            if idx >= 3 or idx == -1:
-                msg = text.decode('utf-8', errors='ignore')[:300]
-                raise UserError(_('Authentication FAILED.\nGot: %s') % msg)
-
-            # Execute command
-            tn.write((command + '\n').encode('ascii', errors='ignore'))
-            time.sleep(0.6)
-
-            buf = tn.read_very_eager()
-            attempts = 0
-            while attempts < 20 and (b'More' in buf or b'--More--' in buf or b'---- More ----' in buf):
-                chunks.append(buf.replace(b'\x08', b''))
-                tn.write(b' ')
-                time.sleep(0.35)
-                buf = tn.read_very_eager()
-                attempts += 1
-            chunks.append(buf)
-
-            try:
-                tn.write(b'\nquit\n')
-                time.sleep(0.2)
-            except Exception:
-                pass
-
-        finally:
-            try:
-                tn.close()
-            except Exception:
-                pass
-
-        data = b''.join(chunks) if chunks else b''
-        output = data.replace(b'\x00', b'').decode('utf-8', errors='ignore').strip()
-
-        # Trim command echo
-        lines = output.splitlines()
-        if len(lines) > 2:
-            output = '\n'.join(lines[2:])
-
-        return output
+        """Execute Telnet command through the shared OLT session pool.
+
+        Fixed show-commands go through olt_read (coalesced); custom commands always run
+        on a borrowed session, uncached. Returns the expect engine dict (output/ok/error).
+        """
+        if self.command_type != 'custom':
+            return olt_read(host, username, password, command, timeout=timeout)
+
+        readonly = _is_readonly(command)
+        if not readonly and not self.env.user.has_group('base.group_system'):
+            raise UserError(_('Only administrators can run configuration commands. '
+                              'Use a read-only command (show ... / display ...).'))
+        priority = PRIORITY_INTERACTIVE if readonly else PRIORITY_WRITE
+        with olt_session(host, username, password, timeout=timeout, priority=priority) as sess:
+            return sess.execute(command)
 
     def action_run_test(self):
         """Execute the test command"""
@@ -197,14 +139,36 @@ class OltCommandTestWizard(models.TransientModel):
             _logger.info('=' * 60)
 
             # Execute
-            output = self._telnet_run(
+            res = self._telnet_run(
                 device.ip_address.strip(),
                 user, pwd, command,
                 timeout=self.timeout
             )
+            output = res.get('output') or ''
 
             execution_time = time_module.time() - start_time
 
+            # OLT rejected the command (% Invalid input, % Error, ...)
+            if not res.get('ok'):
+                error_msg = res.get('error') or _('Command rejected by the OLT')
+                _logger.warning(f'Command rejected by OLT: {error_msg}')
+                self.write({
+                    'result_text': output or f'ERROR: {error_msg}',
+                    'execution_time': execution_time,
+                    'status': 'error',
+                    'error_message': error_msg,
+                })
+                return {
+                    'type': 'ir.actions.client',
+                    'tag': 'display_notification',
+                    'params': {
+                        'title': _('❌ Command Failed'),
+                        'message': error_msg[:200],
+                        'type': 'danger',
+                        'sticky': True,
+                    }
+                }
+
             self.write({
                 'result_text': output or '(No output)',
                 'execution_time': execution_time,
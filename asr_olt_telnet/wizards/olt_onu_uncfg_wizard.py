@@ -1,12 +1,12 @@
 # -*- coding: utf-8 -*-
 import re
-import time
-import telnetlib
 import logging
 
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError
 
+from ..models.olt_session_pool import olt_read
+
 _logger = logging.getLogger(__name__)
 
 _TAB_LINE_RE = re.compile(r"^-{3,}|^_+|^=+")
@@ -18,6 +18,7 @@ class OltOnuUncfgLine(models.TransientModel):
     _description = 'Unregistered ONU (parsed row)'
 
     wizard_id = fields.Many2one('olt.onu.uncfg.wizard', ondelete='cascade')
+    olt_id = fields.Many2one('crm.access.device', string="OLT")
     technology = fields.Selection([('gpon', 'GPON'), ('epon', 'EPON')], string="Tech")
     olt_index = fields.Char(string="OltIndex")
     model = fields.Char(string="Model")
@@ -51,86 +52,27 @@ class OltOnuUncfgLine(models.TransientModel):
         return onu_index
 
     def _find_free_slot(self, olt_device, olt_port):
-        """Telnet → show config for port → parse slots → return first free
+        """Slot-i i parë i lirë nga snapshot-i i konfigurimit (olt.onu.slot, pa Telnet).
 
-        C300: show running-config interface gpon-olt_1/5/10
-        C600: show running-config-interface gpon_olt-1/4/3 (me dash!)
+        Nëse OLT s'ka ende snapshot, lexohet live: show running-config interface <port>.
+        Slot-i rivalidohet live vetëm në momentin e regjistrimit.
         """
         if not olt_device or not getattr(olt_device, 'ip_address', False):
             raise UserError(_('OLT device has no IP address'))
 
-        user, pwd = olt_device.get_telnet_credentials()
-
-        # Detekto komandën e duhur bazuar në modelin e OLT
-        model = (olt_device.model or '').upper()
-
-        # C600/C650 përdorin sintaksë të ndryshme
-        if 'C600' in model or 'C650' in model or 'C680' in model:
-            # C600 format: show running-config-interface gpon_olt-1/4/3
-            # Port format: gpon-olt_1/4/3 → gpon_olt-1/4/3
-            port_for_cmd = olt_port.replace('-olt_', '_olt-')  # gpon-olt_1/4/3 → gpon_olt-1/4/3
-            cmd = f"show running-config-interface {port_for_cmd}"
-        else:
-            # C300/C320 format standard
-            cmd = f"show running-config interface {olt_port}"
-
-        output = self.wizard_id._telnet_run(
-            olt_device.ip_address.strip(),
-            user, pwd, cmd, timeout=10
-        )
-
-        # Clean output from special characters that might interfere with parsing
-        if output:
-            # Normalize line endings: treat \r as line delimiter
-            output = output.replace('\r\n', '\n')  # Windows-style → Unix
-            output = output.replace('\r', '\n')     # Mac/overwrite → Unix (prevents line concatenation)
-            output = output.replace('\x00', '')     # Remove null bytes
-
-            # Remove telnet pager prompts (--More--) with backspace sequences
-            # Pattern: --More-- followed by backspaces (\x08) and spaces trying to erase it
-            output = re.sub(r'--More--[\x08 ]*', '', output)
-
-        occupied = set()
-        _logger.info(f'Parsing OLT config for {olt_port}')
-        _logger.info(f'Output length: {len(output) if output else 0} chars')
-        _logger.debug(f'Raw output (first 2000 chars):\n{output[:2000] if output else "(empty)"}')
-
-        lines = (output or '').splitlines()
-        _logger.info(f'Total lines to parse: {len(lines)}')
-
-        for idx, line in enumerate(lines, 1):
-            # Example: "  onu 8 type ZTE-F612 sn ZTEGC9647C69"
-            m = re.match(r'^\s*onu\s+(\d+)\s+type', line, re.IGNORECASE)
-            if m:
-                try:
-                    slot_num = int(m.group(1))
-                    occupied.add(slot_num)
-                    _logger.info(f'  Found occupied slot: {slot_num} from line: {line.strip()[:80]}')
-                except Exception:
-                    pass
-            else:
-                # Log lines that look like ONU config but don't match
-                if 'onu' in line.lower() and 'type' in line.lower():
-                    _logger.warning(f'  Line {idx} did not match regex: {repr(line[:100])}')
-
-        _logger.info(f'Total occupied slots: {len(occupied)} - Slots: {sorted(occupied) if occupied else "none"}')
-
-        # GPON zakonisht 1..128; EPON 1..64
-        max_slots = 128 if 'gpon' in olt_port.lower() else 64
-        for slot in range(1, max_slots + 1):
-            if slot not in occupied:
-                return slot
-
-        raise UserError(_('No free slots available on port %s (all %d occupied)') % (olt_port, max_slots))
+        slot = olt_device._olt_find_free_slot(olt_port)
+        _logger.info(f'Free slot on {olt_device.name} {olt_port}: {slot}')
+        return slot
 
     def action_open_register(self):
         """Open quick register wizard with auto-detected free slot."""
         self.ensure_one()
         wiz = self.wizard_id
+        olt = self.olt_id or wiz.olt_id
 
         olt_port = self._extract_olt_port(self.olt_index)
         try:
-            free_slot = self._find_free_slot(wiz.olt_id, olt_port)
+            free_slot = self._find_free_slot(olt, olt_port)
         except Exception as e:
             raise UserError(_('Failed to find free slot: %s') % str(e))
 
@@ -141,7 +83,7 @@ class OltOnuUncfgLine(models.TransientModel):
             'target': 'new',
             'context': {
                 'default_customer_id': wiz.user_id.id if wiz.user_id else False,
-                'default_access_device_id': wiz.olt_id.id if wiz.olt_id else False,
+                'default_access_device_id': olt.id if olt else False,
                 'default_interface': olt_port,
                 'default_onu_slot': free_slot,
                 'default_serial': (self.sn or '').strip(),
@@ -158,7 +100,10 @@ class OltOnuUncfgWizard(models.TransientModel):
     _description = 'List Unregistered ONUs on OLT (Telnet)'
 
     user_id = fields.Many2one('asr.radius.user', string='RADIUS User')
-    olt_id = fields.Many2one('crm.access.device', string='OLT', required=True, help="Access Device with Management IP")
+    scope = fields.Selection([('single', 'Single OLT'), ('fleet', 'All OLTs')],
+                             default='single', required=True,
+                             help="All OLTs: skanon paralelisht të gjitha OLT-të aktive me Management IP")
+    olt_id = fields.Many2one('crm.access.device', string='OLT', help="Access Device with Management IP")
     tech = fields.Selection([('auto', 'Auto (GPON→EPON)'), ('gpon', 'GPON only'), ('epon', 'EPON only')],
                             default='auto', required=True)
     result_text = fields.Text(string='Raw Output', readonly=True)
@@ -191,74 +136,8 @@ class OltOnuUncfgWizard(models.TransientModel):
         return vals
 
     def _telnet_run(self, host, username, password, command, timeout=10):
-        if not host:
-            raise UserError(_('Missing OLT IP/host.'))
-        if not username or not password:
-            raise UserError(_('Set OLT Username/Password on OLT form or Company settings.'))
-
-        chunks = []
-        try:
-            tn = telnetlib.Telnet(host, 23, timeout)
-        except Exception as e:
-            raise UserError(_('Telnet could not connect to %s: %s') % (host, str(e)))
-        try:
-            # Username
-            idx, match, text = tn.expect([b'Username:', b'Login:', b'login:'], timeout)
-            if idx == -1:
-                raise UserError(_('Did not receive Username prompt from %s') % host)
-            tn.write((username + '\n').encode('ascii', errors='ignore'))
-            time.sleep(0.3)
-
-            # Password
-            idx, match, text = tn.expect([b'Password:', b'password:'], timeout)
-            if idx == -1:
-                raise UserError(_('Did not receive Password prompt from %s') % host)
-            tn.write((password + '\n').encode('ascii', errors='ignore'))
-            time.sleep(0.5)
-
-            # Prompt or auth fail
-            idx, match, text = tn.expect([
-                b'>', b'#', b'$',  # success
-                b'Username:',  # auth failed again
-                b'Authentication failed',
-                b'Login incorrect',
-                b'Access denied'
-            ], timeout)
-            if idx >= 3 or idx == -1:
-                msg = text.decode('utf-8', errors='ignore')[:300]
-                raise UserError(_('Authentication FAILED for %s@%s.\nGot: %s') % (username, host, msg))
-
-            # Execute command (+ pagination)
-            tn.write((command + '\n').encode('ascii', errors='ignore'))
-            time.sleep(0.6)
-            buf = tn.read_very_eager()
-            attempts = 0
-            while attempts < 18 and (b'More' in buf or b'--More--' in buf or b'---- More ----' in buf):
-                chunks.append(buf.replace(b'\x08', b''))
-                tn.write(b' ')
-                time.sleep(0.35)
-                buf = tn.read_very_eager()
-                attempts += 1
-            chunks.append(buf)
-
-            try:
-                tn.write(b'\nquit\n')
-                time.sleep(0.2)
-            except Exception:
-                pass
-        finally:
-            try:
-                tn.close()
-            except Exception:
-                pass
-
-        data = b''.join(chunks) if chunks else b''
-        output = data.replace(b'\x00', b'').decode('utf-8', errors='ignore').strip()
-        # Trim echo
-        lines = output.splitlines()
-        if len(lines) > 2:
-            output = '\n'.join(lines[2:])
-        return output
+        # Sesion nga pool-i i OLT; read-et identike paralele bashkohen nga scheduler-i
+        return olt_read(host, username, password, command, timeout=timeout)['output']
 
     def _parse_uncfg(self, output_text, tech_key):
         """
@@ -414,6 +293,9 @@ class OltOnuUncfgWizard(models.TransientModel):
 
     def action_fetch(self):
         self.ensure_one()
+        if self.scope == 'fleet':
+            return self._action_fetch_fleet()
+
         device = self.olt_id
         if not device or not getattr(device, 'ip_address', False):
             raise UserError(_('OLT missing Management IP. Set it on the Access Device form.'))
@@ -469,8 +351,7 @@ class OltOnuUncfgWizard(models.TransientModel):
         _logger.info('=' * 60)
 
         self.line_ids.unlink()
-        for r in rows:
-            self.env['olt.onu.uncfg.line'].create(dict(r, wizard_id=self.id))
+        self.env['olt.onu.uncfg.line'].create([dict(r, wizard_id=self.id, olt_id=device.id) for r in rows])
 
         self.result_text = "\n\n".join(outputs) if outputs else _("(No output)")
 
@@ -480,4 +361,62 @@ class OltOnuUncfgWizard(models.TransientModel):
             'view_mode': 'form',
             'res_id': self.id,
             'target': 'new',
-        }
\ No newline at end of file
+        }
+
+    def _action_fetch_fleet(self):
+        """Skano ONU-të e paregjistruara në të gjitha OLT-të njëherësh (fan-out paralel)."""
+        devices = self.env['crm.access.device']._olt_fleet_devices()
+        if not devices:
+            raise UserError(_('No OLTs with a Management IP found.'))
+
+        _logger.info('ONU UNCFG FLEET FETCH: %d OLT(s), tech %s', len(devices), self.tech)
+
+        passes = []
+        if self.tech in ('auto', 'gpon'):
+            passes.append(('gpon', devices, self._detect_gpon_command))
+        if self.tech in ('auto', 'epon'):
+            # Huawei është vetëm GPON
+            epon_devices = devices.filtered(lambda d: (d.manufacturer or '').upper() != 'HUAWEI')
+            passes.append(('epon', epon_devices, lambda d: 'show onu unauthentication'))
+
+        names = {d.id: d.name for d in devices}
+        outputs, lines = [], []
+        for tech_key, pass_devices, command in passes:
+            for res in pass_devices._olt_fleet_run(command):
+                label = f"### {names.get(res['device_id'])} – {tech_key.upper()} ({res['command']})"
+                if not res['ok']:
+                    outputs.append(f"{label}\nERROR: {res['error']}")
+                    continue
+                outputs.append(f"{label}\n" + (res['output'] or "(no output)"))
+                lines += [dict(r, wizard_id=self.id, olt_id=res['device_id'])
+                          for r in self._parse_uncfg(res['output'], tech_key)]
+
+        _logger.info('Total ONUs found across fleet: %d', len(lines))
+
+        self.line_ids.unlink()
+        self.env['olt.onu.uncfg.line'].create(lines)
+        self.result_text = "\n\n".join(outputs) if outputs else _("(No output)")
+
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'olt.onu.uncfg.wizard',
+            'view_mode': 'form',
+            'res_id': self.id,
+            'target': 'new',
+        }
+
+    def action_open_batch_register(self):
+        """Hap regjistrimin në grup për të gjitha ONU-të e skanuara (një sesion për OLT)."""
+        self.ensure_one()
+        if not self.line_ids:
+            raise UserError(_('No unregistered ONUs to register. Fetch from OLT first.'))
+
+        Batch = self.env['olt.onu.register.batch']
+        batch = Batch.create(dict(Batch._prepare_from_uncfg(self.line_ids), uncfg_wizard_id=self.id))
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'olt.onu.register.batch',
+            'view_mode': 'form',
+            'res_id': batch.id,
+            'target': 'new',
+        }
@@ -1,9 +1,15 @@
 # -*- coding: utf-8 -*-
-import time
-import telnetlib
+import re
+
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError
 
+from ..models.olt_scheduler import PRIORITY_WRITE
+from ..models.olt_session_pool import olt_session
+
+# onu_type shkon direkt në komandën telnet – vetëm emra tipesh të thjeshtë
+_ONU_TYPE_RE = re.compile(r'^[A-Za-z0-9._-]+$')
+
 _ONU_CHOICES = [
     ('ZTE-F412',  'ZTE-F412'),
     ('ZTE-F460',  'ZTE-F460'),
@@ -12,6 +18,19 @@ _ONU_CHOICES = [
     ('ZTE-F6600', 'ZTE-F6600'),
 ]
 
+
+
+def onu_type_options(devices):
+    """Tipet e ONU-ve për dropdown: ato që njohin të gjitha OLT-të (nga katalogu);
+    pa katalog, lista standarde _ONU_CHOICES."""
+    common = None
+    for device in devices:
+        types = device._get_olt_onu_types()
+        if types:
+            common = [t for t in (common if common is not None else types) if t in types]
+    return common if common else [key for key, _label in _ONU_CHOICES]
+
+
 _SPEED_PROFILE_CHOICES = [
     ('10M', '10Mbps'),
     ('20M', '20Mbps'),
@@ -41,9 +60,13 @@ class OltOnuRegisterQuick(models.TransientModel):
 
     # ✅ Error tracking for retry functionality
     last_error = fields.Text(string="Last Error", readonly=True)
+    duplicate_serial_warning = fields.Char(compute='_compute_duplicate_serial_warning',
+                                           help="Serial already registered on an OLT (from config snapshot)")
     registration_attempts = fields.Integer(string="Attempts", default=0, readonly=True)
 
-    onu_type = fields.Selection(_ONU_CHOICES, string="ONU Type", required=True)
+    # Char + dropdown: tipet vijnë nga katalogu i OLT-së (fallback _ONU_CHOICES)
+    onu_type = fields.Char(string="ONU Type", required=True)
+    onu_type_options = fields.Char(compute='_compute_vlan_options', store=False)
     function_mode = fields.Selection([
         ('bridge', 'Bridge'),
         ('router', 'Router'),
@@ -88,17 +111,19 @@ class OltOnuRegisterQuick(models.TransientModel):
                 # Get VLANs from OLT
                 _logger.info(f"[DynamicDropdown] Raw VLANs - Internet: {rec.access_device_id.internet_vlan}, TV: {rec.access_device_id.tv_vlan}, Voice: {rec.access_device_id.voice_vlan}")
 
-                internet_vlans = [v.strip() for v in (rec.access_device_id.internet_vlan or '').split(',') if v.strip()]
-                tv_vlans = [v.strip() for v in (rec.access_device_id.tv_vlan or '').split(',') if v.strip()]
-                voice_vlans = [v.strip() for v in (rec.access_device_id.voice_vlan or '').split(',') if v.strip()]
+                # VLAN-et e konfiguruara, të filtruara sipas VLAN-eve që ekzistojnë në OLT (katalogu)
+                internet_vlans = rec.access_device_id._get_olt_vlan_options(rec.access_device_id.internet_vlan)
+                tv_vlans = rec.access_device_id._get_olt_vlan_options(rec.access_device_id.tv_vlan)
+                voice_vlans = rec.access_device_id._get_olt_vlan_options(rec.access_device_id.voice_vlan)
 
                 rec.internet_vlan_options = json.dumps(internet_vlans) if internet_vlans else json.dumps([])
                 rec.tv_vlan_options = json.dumps(tv_vlans) if tv_vlans else json.dumps([])
                 rec.voice_vlan_options = json.dumps(voice_vlans) if voice_vlans else json.dumps([])
 
-                # ✅ ONLY CHANGE: real speed profiles from OLT (telnet), not hardcoded
+                # ✅ Real speed profiles from OLT catalog cache (no telnet on open)
                 profiles = rec._fetch_speed_profiles_from_olt()
                 rec.speed_profile_options = json.dumps(profiles or [])
+                rec.onu_type_options = json.dumps(onu_type_options(rec.access_device_id))
 
                 _logger.info(f"[DynamicDropdown] Computed JSON - Internet: {rec.internet_vlan_options}")
             else:
@@ -107,6 +132,17 @@ class OltOnuRegisterQuick(models.TransientModel):
                 rec.tv_vlan_options = json.dumps([])
                 rec.voice_vlan_options = json.dumps([])
                 rec.speed_profile_options = json.dumps([])
+                rec.onu_type_options = json.dumps(onu_type_options([]))
+
+    @api.depends('serial')
+    def _compute_duplicate_serial_warning(self):
+        """Kontroll i menjëhershëm (indexed) në snapshot-in e konfigurimit të të gjitha OLT-ve"""
+        Slot = self.env['olt.onu.slot']
+        for rec in self:
+            found = Slot._find_serial(rec.serial)
+            rec.duplicate_serial_warning = ', '.join(
+                f"{s.device_id.name} {s.port}:{s.onu_id}" for s in found[:3]
+            ) if found else False
 
     @api.depends('interface', 'access_device_id')
     def _compute_interface_display(self):
@@ -140,6 +176,9 @@ class OltOnuRegisterQuick(models.TransientModel):
         # Set default VLANs from OLT if available
         if 'access_device_id' in vals and vals['access_device_id']:
             olt = self.env['crm.access.device'].browse(vals['access_device_id'])
+            types = olt._get_olt_onu_types()
+            if types and vals['onu_type'] not in types:
+                vals['onu_type'] = types[0]
             if olt.internet_vlan:
                 vals['internet_vlan'] = olt.internet_vlan.split(',')[0].strip()
             if olt.tv_vlan:
@@ -193,13 +232,21 @@ class OltOnuRegisterQuick(models.TransientModel):
         vport_interface = f"vport-{port_part}.{self.onu_slot}:1"
         return onu_interface, vport_interface, port_part
 
-    @api.constrains('internet_vlan', 'tv_vlan', 'voice_vlan', 'access_device_id')
+    @api.constrains('internet_vlan', 'tv_vlan', 'voice_vlan', 'onu_type', 'access_device_id')
     def _check_vlan_values(self):
-        """Validate that selected VLANs are in the OLT's configured VLANs"""
+        """Validate that selected VLANs are in the OLT's configured VLANs and, when the
+        OLT catalog is cached, that the VLANs and the ONU type exist on the OLT"""
         for rec in self:
+            if rec.onu_type and not _ONU_TYPE_RE.match(rec.onu_type):
+                raise UserError(_('Invalid ONU type "%s".') % rec.onu_type)
             if not rec.access_device_id:
                 continue
 
+            errors = rec.access_device_id._olt_catalog_errors(
+                rec.onu_type, [rec.internet_vlan, rec.tv_vlan, rec.voice_vlan])
+            if errors:
+                raise UserError('\n'.join(errors))
+
             # Check Internet VLAN
             if rec.internet_vlan and rec.access_device_id.internet_vlan:
                 available = [v.strip() for v in rec.access_device_id.internet_vlan.split(',')]
@@ -226,144 +273,75 @@ class OltOnuRegisterQuick(models.TransientModel):
 
     def _execute_telnet_session(self, host, username, password, command, timeout=12):
         """✅ Execute telnet commands with per-command verification"""
-        import re
         import logging
         _logger = logging.getLogger(__name__)
 
-        chunks = []
-        command_log = []
-
-        try:
-            tn = telnetlib.Telnet(host, 23, timeout)
-        except Exception as e:
-            raise UserError(_('Telnet connection failed to %s: %s') % (host, str(e)))
-
-        try:
-            # Login
-            idx, _match, _text = tn.expect([b'Username:', b'Login:', b'login:'], timeout)
-            if idx == -1:
-                raise UserError(_('Did not receive Username prompt from %s') % host)
-            tn.write((username + '\n').encode('ascii', errors='ignore'))
-            time.sleep(0.3)
-
-            idx, _match, _text = tn.expect([b'Password:', b'password:'], timeout)
-            if idx == -1:
-                raise UserError(_('Did not receive Password prompt from %s') % host)
-            tn.write((password + '\n').encode('ascii', errors='ignore'))
-            time.sleep(0.6)
-
-            idx, _match, text = tn.expect([
-                b'>', b'#', b'$',            # success
-                b'Username:',                # auth failed
-                b'Authentication failed',
-                b'Login incorrect',
-                b'Access denied'
-            ], timeout)
-            if idx >= 3 or idx == -1:
-                raise UserError(_('Authentication FAILED for %s@%s.\nGot: %s') %
-                                (username, host, text.decode('utf-8', errors='ignore')[:300]))
-
-            # ✅ Execute commands with per-command verification
-            commands = [c.strip() for c in command.split(';') if c.strip()]
-            _logger.info(f'Executing {len(commands)} commands on {host}')
-
-            for idx, cmd in enumerate(commands, 1):
-                # Send command
-                tn.write((cmd + '\n').encode('ascii', errors='ignore'))
-                time.sleep(0.4)
-
-                # Read response
-                buf = tn.read_very_eager()
-                response = buf.decode('utf-8', errors='ignore')
-                chunks.append(buf)
-
-                # Log command and response
-                command_log.append(f'[{idx}/{len(commands)}] {cmd}')
-                _logger.debug(f'Command: {cmd}')
-                _logger.debug(f'Response: {response[:200]}')
-
-                # ✅ Check for errors in response
-                response_lower = response.lower()
-                error_keywords = ['error', 'failed', 'invalid', 'not found', 'cannot', 'syntax error']
-
-                # Skip false positives (these are normal messages)
-                if 'no error' in response_lower or 'error: 0' in response_lower:
-                    continue
-
-                # Check for real errors
-                for keyword in error_keywords:
-                    if keyword in response_lower:
-                        # Extract error context (line containing error)
-                        error_lines = [line for line in response.splitlines() if keyword in line.lower()]
-                        error_context = '\n'.join(error_lines[:3]) if error_lines else response[:300]
-
-                        raise UserError(_(
-                            '❌ OLT Command Failed at step {step}/{total}:\n'
-                            'Command: {cmd}\n\n'
-                            'Error: {error}\n\n'
-                            'Previous commands executed:\n{history}'
-                        ).format(
-                            step=idx,
-                            total=len(commands),
-                            cmd=cmd,
-                            error=error_context,
-                            history='\n'.join(command_log[:-1]) if len(command_log) > 1 else 'None'
-                        ))
-
-            # Exit
-            try:
-                tn.write(b'exit\n'); time.sleep(0.2)
-                tn.write(b'quit\n')
-            except Exception:
-                pass
-
-        finally:
-            try:
-                tn.close()
-            except Exception:
-                pass
-
-        data = b''.join(chunks) if chunks else b''
-        output = data.replace(b'\x00', b'').decode('utf-8', errors='ignore').strip()
+        # ✅ Sesion i ripërdorshëm nga pool-i i OLT; çdo komandë pret prompt-in (pa sleep fiks)
+        commands = [c.strip() for c in command.split(';') if c.strip()]
+        _logger.info(f'Executing {len(commands)} commands on {host}')
+
+        # WRITE → del para polling-ut në radhën e scheduler-it të OLT-së
+        with olt_session(host, username, password, timeout=timeout, priority=PRIORITY_WRITE) as sess:
+            results = sess.run(commands, stop_on_error=True)
+
+        for step, res in enumerate(results, 1):
+            _logger.debug(f"[{step}/{len(commands)}] {res['command']} ({res['elapsed']:.2f}s, mode {res['mode']})")
+            _logger.debug(f"Response: {res['output'][:200]}")
+
+        # ✅ Per-command verification (expect engine kthen gabimin e strukturuar)
+        failed = results[-1] if results and not results[-1]['ok'] else None
+        if failed:
+            raise UserError(_(
+                '❌ OLT Command Failed at step {step}/{total}:\n'
+                'Command: {cmd}\n\n'
+                'Error: {error}\n\n'
+                'Previous commands executed:\n{history}'
+            ).format(
+                step=len(results),
+                total=len(commands),
+                cmd=failed['command'],
+                error=failed['error'],
+                history='\n'.join(
+                    f"[{i}/{len(commands)}] {r['command']}" for i, r in enumerate(results[:-1], 1)
+                ) or 'None'
+            ))
+
+        output = '\n'.join(r['output'] for r in results if r['output']).strip()
 
         _logger.info(f'All {len(commands)} commands executed successfully on {host}')
         return output
 
     def _fetch_speed_profiles_from_olt(self):
-        """Fetch available speed profiles from OLT via telnet"""
+        """Speed profiles from the OLT catalog cache (refreshed by cron / Refresh button)"""
+        self.ensure_one()
+        if not self.access_device_id:
+            return []
+        return self.access_device_id._get_olt_speed_profiles()
+
+    def _revalidate_slot(self):
+        """✅ Slot-i vjen nga snapshot-i; para regjistrimit kontrollohet live në OLT.
+
+        Nëse ndërkohë slot-i është zënë, zgjidhet slot-i i parë i lirë sipas OLT-së.
+        """
         self.ensure_one()
-        import re
         import logging
         _logger = logging.getLogger(__name__)
 
-        if not self.access_device_id:
-            return []
+        from ..models.olt_config_snapshot import max_onu_slots
+        live = self.access_device_id._olt_live_port_config(self.interface)
+        if self.onu_slot not in live:
+            return
 
-        try:
-            # Get OLT credentials
-            user, pwd = self.access_device_id.get_telnet_credentials()
-            olt_ip = self.access_device_id.ip_address.strip()
-
-            # Execute command to get profiles
-            output = self._execute_telnet_session(olt_ip, user, pwd, 'show gpon profile tcont', timeout=10)
-
-            # Parse profile names from output
-            # Looking for lines like "Name :100M" or "Name :1Gbps"
-            profiles = []
-            for line in output.splitlines():
-                match = re.search(r'Name\s*:(\S+)', line, re.IGNORECASE)
-                if match:
-                    profile_name = match.group(1).strip()
-                    # Exclude system profiles
-                    if profile_name.lower() not in ['default', 'mcast', 'multicast', 'voip']:
-                        profiles.append(profile_name)
-
-            _logger.info(f'Fetched {len(profiles)} speed profiles from OLT {olt_ip}: {profiles}')
-            return profiles
-
-        except Exception as e:
-            _logger.warning(f'Failed to fetch speed profiles from OLT: {str(e)}')
-            return []
+        onu_type, serial = live[self.onu_slot]
+        if serial and serial == (self.serial or '').strip().upper():
+            raise UserError(_('ONU %(sn)s is already registered on %(port)s:%(slot)d.') % {
+                'sn': self.serial, 'port': self.interface, 'slot': self.onu_slot,
+            })
+        free = next((s for s in range(1, max_onu_slots(self.interface) + 1) if s not in live), None)
+        if not free:
+            raise UserError(_('No free slots available on port %s') % self.interface)
+        _logger.info(f'Slot {self.onu_slot} on {self.interface} taken by {serial} ({onu_type}); using {free}')
+        self.onu_slot = free
 
     def _get_speed_profile_name(self):
         """Return the speed profile name as entered by user"""
@@ -733,6 +711,42 @@ class OltOnuRegisterQuick(models.TransientModel):
             ]
         return ";".join(commands)
 
+    def _generate_config(self):
+        """Komandat e plota (regjistrim + konfigurim) sipas function_mode, të ndara me ';'."""
+        self.ensure_one()
+        if self.function_mode == 'router':
+            return self._generate_router_config()
+        elif self.function_mode == 'bridge':
+            return self._generate_bridge_config()
+        elif self.function_mode == 'bridge_mcast':
+            return self._generate_bridge_mcast_config()
+        elif self.function_mode == 'bridge_mcast_voip':
+            return self._generate_bridge_mcast_voip_config()
+        elif self.function_mode == 'data':
+            return self._generate_data_config()
+        elif self.function_mode == 'router_mcast_voip':
+            return self._generate_router_mcast_voip_config()
+        raise UserError(_('Unknown function mode: %s') % self.function_mode)
+
+    def _customer_port_vals(self):
+        """Fushat e portës/ONU-së që shkruhen te customer-i pas regjistrimit."""
+        self.ensure_one()
+        vals = {}
+        if 'ont_serial' in self.customer_id._fields:
+            vals['ont_serial'] = self.serial
+        if 'olt_pon_port' in self.customer_id._fields:
+            vals['olt_pon_port'] = f"{self.interface}:{self.onu_slot}"
+        if 'access_device_id' in self.customer_id._fields:
+            vals['access_device_id'] = self.access_device_id.id
+
+        # NEW: Write olt_login_port with selected VLAN from registration
+        if 'olt_login_port' in self.customer_id._fields:
+            # Extract PON path from interface (remove gpon-olt_ or gpon_olt-)
+            pon_path = self.interface.replace('gpon-olt_', '').replace('gpon_olt-', '')
+            # Format: "10.50.80.3 pon 1/9/4/7:1900" (using internet_vlan from registration)
+            vals['olt_login_port'] = f"{self.access_device_id.ip_address.strip()} pon {pon_path}/{self.onu_slot}:{self.internet_vlan}"
+        return vals
+
     def action_back_to_list(self):
         """✅ Navigate back to uncfg wizard without losing data"""
         self.ensure_one()
@@ -764,22 +778,18 @@ class OltOnuRegisterQuick(models.TransientModel):
 
         olt_ip = self.access_device_id.ip_address.strip()
 
+        try:
+            self._revalidate_slot()
+        except UserError as e:
+            self.write({
+                'last_error': str(e),
+                'registration_attempts': self.registration_attempts + 1
+            })
+            raise
+
         # Generate full command based on function_mode (includes registration + config)
         try:
-            if self.function_mode == 'router':
-                full_cmd = self._generate_router_config()
-            elif self.function_mode == 'bridge':
-                full_cmd = self._generate_bridge_config()
-            elif self.function_mode == 'bridge_mcast':
-                full_cmd = self._generate_bridge_mcast_config()
-            elif self.function_mode == 'bridge_mcast_voip':
-                full_cmd = self._generate_bridge_mcast_voip_config()
-            elif self.function_mode == 'data':
-                full_cmd = self._generate_data_config()
-            elif self.function_mode == 'router_mcast_voip':
-                full_cmd = self._generate_router_mcast_voip_config()
-            else:
-                raise UserError(_('Unknown function mode: %s') % self.function_mode)
+            full_cmd = self._generate_config()
         except UserError as e:
             # ✅ Store error for display
             self.write({
@@ -844,23 +854,13 @@ class OltOnuRegisterQuick(models.TransientModel):
                 }
             }
 
+        # Mbaj snapshot-in e konfigurimit të saktë pa pritur cron-in
+        self.env['olt.onu.slot']._remember(self.access_device_id, self.interface, self.onu_slot,
+                                           onu_type=self.onu_type, serial=self.serial)
+
         # Optional: update customer record fields if they exist
         try:
-            vals = {}
-            if 'ont_serial' in self.customer_id._fields:
-                vals['ont_serial'] = self.serial
-            if 'olt_pon_port' in self.customer_id._fields:
-                vals['olt_pon_port'] = f"{self.interface}:{self.onu_slot}"
-            if 'access_device_id' in self.customer_id._fields:
-                vals['access_device_id'] = self.access_device_id.id
-
-            # NEW: Write olt_login_port with selected VLAN from registration
-            if 'olt_login_port' in self.customer_id._fields:
-                # Extract PON path from interface (remove gpon-olt_ or gpon_olt-)
-                pon_path = self.interface.replace('gpon-olt_', '').replace('gpon_olt-', '')
-                # Format: "10.50.80.3 pon 1/9/4/7:1900" (using internet_vlan from registration)
-                vals['olt_login_port'] = f"{self.access_device_id.ip_address.strip()} pon {pon_path}/{self.onu_slot}:{self.internet_vlan}"
-
+            vals = self._customer_port_vals()
             if vals:
                 self.customer_id.write(vals)
         except Exception:
@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
-import re, time, telnetlib, logging
+import re, logging
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError, ValidationError
 
+from ..models.olt_session_pool import olt_read
+
 _logger = logging.getLogger(__name__)
 
 # --- MAC helpers ---
@@ -54,7 +56,8 @@ class OltShowMacWizard(models.TransientModel):
     _description = 'Show MAC on OLT (Telnet)'
 
     user_id = fields.Many2one('asr.radius.user', string='RADIUS User')
-    olt_id = fields.Many2one('crm.access.device', string='OLT', required=True)
+    olt_id = fields.Many2one('crm.access.device', string='OLT',
+                             help="E nevojshme vetëm për 'show mac' live; kërkimi në indeks mbulon të gjitha OLT-të")
     mac_address = fields.Char(string='MAC Address', required=True)
     result_text = fields.Text(string='Command Output', readonly=True)
     status = fields.Selection([('draft','Draft'),('ok','OK'),('error','Error')], default='draft', readonly=True)
@@ -157,66 +160,54 @@ class OltShowMacWizard(models.TransientModel):
     # TELNET RUNNER
     # ---------------
     def _telnet_run(self, host, username, password, command, timeout=10):
-        if not host:
-            raise UserError(_('Missing OLT IP/host.'))
         if not username or not password:
             raise UserError(_('Set OLT credentials on the OLT form or Company settings.'))
+        return olt_read(host, username, password, command, timeout=timeout)['output']
 
-        chunks = []
-        try:
-            tn = telnetlib.Telnet(host, 23, timeout)
-        except Exception as e:
-            raise UserError(_('Telnet could not connect to %s: %s') % (host, str(e)))
-        try:
-            idx,_,_ = tn.expect([b'Username:', b'Login:', b'login:'], timeout)
-            if idx == -1:
-                raise UserError(_('Did not receive Username prompt from %s') % host)
-            tn.write((username + '\n').encode('ascii', errors='ignore'))
-            time.sleep(0.3)
-
-            idx,_,_ = tn.expect([b'Password:', b'password:'], timeout)
-            if idx == -1:
-                raise UserError(_('Did not receive Password prompt from %s') % host)
-            tn.write((password + '\n').encode('ascii', errors='ignore'))
-            time.sleep(0.5)
-
-            idx,_,text = tn.expect([
-                b'>', b'#', b'$',            # success
-                b'Username:',                # auth failed
-                b'Authentication failed',
-                b'Login incorrect',
-                b'Access denied'
-            ], timeout)
-            if idx >= 3 or idx == -1:
-                raise UserError(_('Authentication FAILED for %s@%s.\nGot: %s') %
-                                (username, host, text.decode('utf-8', errors='ignore')[:300]))
-
-            tn.write((command + '\n').encode('ascii', errors='ignore'))
-            time.sleep(0.6)
-            buf = tn.read_very_eager()
-            attempts = 0
-            while attempts < 18 and (b'More' in buf or b'--More--' in buf or b'---- More ----' in buf):
-                tn.write(b' ')
-                time.sleep(0.3)
-                buf += tn.read_very_eager()
-                attempts += 1
-            chunks.append(buf)
-            try:
-                tn.write(b'\nquit\n')
-            except Exception:
-                pass
-        finally:
+    # ---------------
+    # ACTIONS
+    # ---------------
+    def action_lookup_index(self):
+        """Kërko MAC-un në indeksin olt.mac.entry (të gjitha OLT-të, pa Telnet)."""
+        self.ensure_one()
+
+        mac_ui = (self.mac_address or '').strip()
+        mac_norm = _sanitize_mac(mac_ui)
+        if not _MAC_RE.search(mac_norm):
+            raise ValidationError(_('Invalid MAC format: %s') % mac_ui)
+
+        entries = self.env['olt.mac.entry']._lookup(mac_norm)
+        if entries:
+            lines = [
+                f"{e.device_id.name} ({e.device_id.ip_address or '-'})  VLAN {e.vlan}  {e.port or '-'}  "
+                f"{_('seen')} {fields.Datetime.to_string(e.seen_at)}"
+                for e in entries
+            ]
+            result = '\n'.join(lines)
+        else:
+            result = _('MAC not found in the OLT MAC index. Run "show mac" on the OLT for a live lookup.')
+
+        vals = {'mac_address': mac_norm, 'result_text': result, 'status': 'ok' if entries else 'error'}
+        latest = entries.filtered('login_port')[:1]
+        if latest:
+            vals['olt_id'] = latest.device_id.id
+        self.write(vals)
+
+        if self.user_id and latest:
             try:
-                tn.close()
+                self.user_id.write({'olt_login_port': latest.login_port})
+                self.user_id.message_post(body=_('Updated Login Port: %s') % latest.login_port)
             except Exception:
                 pass
 
-        data = b''.join(chunks) if chunks else b''
-        return data.replace(b'\x00', b'').decode('utf-8', errors='ignore').strip()
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'olt.show.mac.wizard',
+            'view_mode': 'form',
+            'res_id': self.id,
+            'target': 'new',
+        }
 
-    # ---------------
-    # ACTION
-    # ---------------
     def action_run(self):
         self.ensure_one()
 
@@ -228,7 +219,9 @@ class OltShowMacWizard(models.TransientModel):
         mac_cmd = _mac_to_dot4(mac_norm)
 
         device = self.olt_id
-        if not device or not getattr(device, 'ip_address', False):
+        if not device:
+            raise UserError(_('Select an OLT for a live "show mac", or use "Find in MAC Index".'))
+        if not getattr(device, 'ip_address', False):
             raise UserError(_('OLT missing Management IP.'))
 
         # ✅ Përdor cred-et e OLT-it (fallback te Company brenda helper-it)
@@ -25,6 +25,7 @@
     'data/ir_config_parameter.xml',
     'data/ir_ui_menu_fix.xml',        # Activate Sales menu (must load AFTER sale module)
     'data/server_actions.xml',
+    'data/ir_cron.xml',
     # Load root menu FIRST (no children)
     'views/menu.xml',
     # Security views - hide/show buttons based on groups
@@ -37,6 +38,7 @@
     'views/asr_radius_user_views.xml',        # 3rd: References action_asr_radius_pppoe_status
     'views/asr_radius_user_remote_views.xml',
     'views/asr_radius_config_views.xml',
+    'views/asr_radius_reconcile_views.xml',
     'wizards/pppoe_config_wizard_views.xml',
     'wizards/asr_radius_test_wizard_views.xml',
 ],
@@ -7,4 +7,4 @@ from . import asr_radius_session  # NEW
 from . import radius_client
 from . import radius_user_remote
 from . import pppoe_status
-
+from . import radius_reconcile
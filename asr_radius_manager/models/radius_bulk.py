@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Set-based SQL helpers për tabelat e FreeRADIUS (radcheck, radusergroup, radreply, radacct).
+
+Punojnë mbi një cursor PyMySQL të hapur (p.sh. nga company._get_direct_conn()),
+kështu që thirrësi kontrollon transaksionin (begin/commit/rollback) për çdo chunk.
+SQL-i ndërtohet nga helper-at e përbashkët të mysql.connector (ab_radius_connector);
+këtu mbeten vetëm përshtatjet specifike për tabelat e FreeRADIUS.
+"""
+import logging
+
+from odoo.addons.ab_radius_connector.models.mysql_connector import (
+    delete_in, insert_rows, iter_keyset,
+)
+
+_logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500
+
+
+def chunked(items, size=CHUNK_SIZE):
+    """Yield consecutive slices of `items` with at most `size` elements."""
+    items = list(items)
+    size = max(int(size or CHUNK_SIZE), 1)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _placeholders(count):
+    return ', '.join(['%s'] * count)
+
+
+def delete_by_usernames(cursor, table, usernames, attribute=None):
+    """DELETE FROM table WHERE username IN (...) [AND attribute = %s]; returns rowcount."""
+    return delete_in(cursor, table, 'username', [u for u in usernames if u],
+                     where={'attribute': attribute} if attribute else None)
+
+
+def iter_table(cursor, table, columns, attribute=None, page_size=2000):
+    """Stream rows of a FreeRADIUS table ordered by (username, id) with keyset paging.
+
+    Ordering is binary on username so it matches Python string ordering
+    (and Postgres ``COLLATE "C"``), which the reconciliation merge relies on.
+    """
+    fields = ['id', 'username'] + [c for c in columns if c not in ('id', 'username')]
+    return iter_keyset(cursor, table, fields, ('username', 'id'),
+                       where={'attribute': attribute} if attribute else None,
+                       page_size=page_size, binary=('username',))
+
+
+def fetch_online_usernames(cursor, usernames):
+    """Return {username: nasipaddress} for usernames with an open radacct session.
+
+    One query per chunk of CHUNK_SIZE usernames instead of one per user.
+    """
+    online = {}
+    for chunk in chunked([u for u in usernames if u]):
+        cursor.execute(
+            "SELECT username, nasipaddress FROM radacct "
+            "WHERE acctstoptime IS NULL AND username IN ({}) "
+            "ORDER BY acctstarttime".format(_placeholders(len(chunk))),
+            chunk,
+        )
+        for row in cursor.fetchall():
+            online[row['username']] = row['nasipaddress']
+    return online
+
+
+def fetch_reply_values(cursor, usernames, attribute):
+    """Return {username: value} of a radreply attribute for the given usernames."""
+    values = {}
+    for chunk in chunked([u for u in usernames if u]):
+        cursor.execute(
+            "SELECT username, value FROM radreply "
+            "WHERE attribute = %s AND username IN ({})".format(_placeholders(len(chunk))),
+            [attribute] + chunk,
+        )
+        for row in cursor.fetchall():
+            values[row['username']] = row['value']
+    return values
+
+
+def fetch_calling_station_ids(cursor, usernames):
+    """Return {username: callingstationid} of the latest radacct session of each username."""
+    values = {}
+    for chunk in chunked([u for u in usernames if u]):
+        cursor.execute(
+            "SELECT ra.username, ra.callingstationid FROM radacct ra "
+            "JOIN (SELECT username, MAX(acctstarttime) AS last_start FROM radacct "
+            "      WHERE username IN ({}) GROUP BY username) last "
+            "  ON last.username = ra.username AND last.last_start = ra.acctstarttime".format(
+                _placeholders(len(chunk))),
+            chunk,
+        )
+        for row in cursor.fetchall():
+            if row['callingstationid']:
+                values[row['username']] = row['callingstationid']
+    return values
@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+import heapq
+import logging
+import time
+from itertools import groupby
+
+from odoo import models, fields, api, _
+
+from .radius_bulk import chunked, delete_by_usernames, insert_rows, iter_table
+from .radius_user import _slug_company
+
+_logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = 2000
+
+
+def _outer_join(left, right):
+    """Merge two iterators of (username, value) sorted by username.
+
+    Yields (username, left_value, right_value); a missing side is None.
+    """
+    sentinel = object()
+    l_item = next(left, sentinel)
+    r_item = next(right, sentinel)
+    while l_item is not sentinel or r_item is not sentinel:
+        if r_item is sentinel or (l_item is not sentinel and l_item[0] < r_item[0]):
+            yield l_item[0], l_item[1], None
+            l_item = next(left, sentinel)
+        elif l_item is sentinel or r_item[0] < l_item[0]:
+            yield r_item[0], None, r_item[1]
+            r_item = next(right, sentinel)
+        else:
+            yield l_item[0], l_item[1], r_item[1]
+            l_item = next(left, sentinel)
+            r_item = next(right, sentinel)
+
+
+class AsrRadiusReconcile(models.Model):
+    _name = 'asr.radius.reconcile'
+    _description = 'RADIUS Reconciliation Run'
+    _order = 'date_start desc, id desc'
+
+    name = fields.Char(required=True, default=lambda self: _('Reconciliation %s') % fields.Datetime.now())
+    company_id = fields.Many2one('res.company', required=True, default=lambda self: self.env.company, index=True)
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], default='draft', required=True, readonly=True)
+    apply_fixes = fields.Boolean(
+        default=True,
+        help="Push Odoo values to FreeRADIUS for missing and mismatched users.",
+    )
+    fix_orphans = fields.Boolean(
+        default=False,
+        help="Also delete orphaned usernames from radcheck/radusergroup/radreply. "
+             "Leave off if the RADIUS DB holds users not managed by Odoo.",
+    )
+
+    date_start = fields.Datetime(readonly=True)
+    date_end = fields.Datetime(readonly=True)
+    duration = fields.Float(string="Duration (s)", readonly=True)
+    checked_count = fields.Integer(string="Checked", readonly=True)
+    missing_count = fields.Integer(string="Missing", readonly=True)
+    orphaned_count = fields.Integer(string="Orphaned", readonly=True)
+    mismatch_count = fields.Integer(string="Mismatched", readonly=True)
+    fixed_count = fields.Integer(string="Fixed", readonly=True)
+    error = fields.Text(readonly=True)
+
+    line_ids = fields.One2many('asr.radius.reconcile.line', 'reconcile_id', string="Drift", readonly=True)
+
+    # ------------------------------------------------------------
+    # Streams
+    # ------------------------------------------------------------
+    def _iter_expected(self):
+        """Yield (username, fingerprint) for every Odoo user of the company, sorted by username.
+
+        fingerprint = {'user_id', 'present', 'password', 'group', 'access', 'pool'}:
+        'present' depends only on what Odoo holds (a failed sync does not make a user
+        absent), 'access' is radius_access_state ('active', 'suspended' or False when
+        not recorded yet), 'pool' is None when no module tracks per-user pool overrides.
+        """
+        self.ensure_one()
+        Users = self.env['asr.radius.user'].sudo().with_context(active_test=False)
+        cr = self.env.cr
+        last = None
+        while True:
+            cr.execute("""
+                SELECT id FROM asr_radius_user
+                WHERE company_id = %s AND username IS NOT NULL AND username != ''
+                  AND (%s IS NULL OR username COLLATE "C" > %s)
+                ORDER BY username COLLATE "C"
+                LIMIT %s
+            """, (self.company_id.id, last, last, _PAGE_SIZE))
+            ids = [r[0] for r in cr.fetchall()]
+            if not ids:
+                return
+            users = Users.browse(ids)
+            pools = users._reconcile_expected_pools()
+            for user in users:
+                present = bool(user.active and user.subscription_id and user.radius_password)
+                yield user.username, {
+                    'user_id': user.id,
+                    'present': present,
+                    'password': user.radius_password or False,
+                    'group': user.groupname if user.subscription_id else False,
+                    'access': user.radius_access_state or False,
+                    'pool': None if pools is None else (pools.get(user.username) or False),
+                }
+            last = users[-1].username
+            users.invalidate_recordset()
+            if len(ids) < _PAGE_SIZE:
+                return
+
+    @staticmethod
+    def _iter_actual(cursor):
+        """Yield (username, fingerprint) from radcheck/radusergroup/radreply, sorted by username."""
+        streams = [
+            (('password', row) for row in iter_table(cursor, 'radcheck', ['value'], attribute='Cleartext-Password')),
+            (('group', row) for row in iter_table(cursor, 'radusergroup', ['groupname', 'priority'])),
+            (('pool', row) for row in iter_table(cursor, 'radreply', ['value'], attribute='Framed-Pool')),
+        ]
+        merged = heapq.merge(*streams, key=lambda item: item[1]['username'])
+        for username, items in groupby(merged, key=lambda item: item[1]['username']):
+            fp = {'password': False, 'group': False, 'pool': False}
+            group_priority = None
+            for kind, row in items:
+                if kind == 'group':
+                    priority = row.get('priority') or 0
+                    if group_priority is None or priority < group_priority:
+                        fp['group'], group_priority = row['groupname'], priority
+                elif not fp[kind]:
+                    fp[kind] = row['value']
+            yield username, fp
+
+    # ------------------------------------------------------------
+    # Diff
+    # ------------------------------------------------------------
+    @staticmethod
+    def _expected_group(expected, actual, suspended_group):
+        """Group the user should have live: the SUSPENDED group only when Odoo suspended them.
+
+        Users whose access was never recorded (before radius_access_state existed) accept
+        either group; the run records what it found for them.
+        """
+        if expected['access'] == 'suspended':
+            return suspended_group
+        if not expected['access'] and actual and actual['group'] == suspended_group:
+            return suspended_group
+        return expected['group']
+
+    def _diff(self, expected, actual, suspended_group):
+        """Return (drift_type, mismatched_fields) or (None, None) when in sync."""
+        present = bool(expected and expected['present'])
+        if present and actual is None:
+            return 'missing', ['password', 'group'] + (['pool'] if expected['pool'] else [])
+        if not present:
+            return ('orphaned', []) if actual is not None else (None, None)
+
+        diffs = []
+        if expected['password'] != actual['password']:
+            diffs.append('password')
+        if self._expected_group(expected, actual, suspended_group) != actual['group']:
+            diffs.append('group')
+        if expected['pool'] is not None and (expected['pool'] or False) != (actual['pool'] or False):
+            diffs.append('pool')
+        return ('mismatch', diffs) if diffs else (None, None)
+
+    # ------------------------------------------------------------
+    # Run
+    # ------------------------------------------------------------
+    def action_run(self):
+        for rec in self:
+            rec._run()
+        return True
+
+    def _run(self):
+        self.ensure_one()
+        company = self.company_id
+        suspended_group = f"{_slug_company(getattr(company, 'code', None) or company.name)}:SUSPENDED"
+        started = time.time()
+        self.line_ids.unlink()
+        self.write({'date_start': fields.Datetime.now(), 'error': False})
+
+        counts = {'checked': 0, 'missing': 0, 'orphaned': 0, 'mismatch': 0, 'fixed': 0}
+        lines = []
+        fixes = []  # (username, drift_type, fields, expected)
+        unrecorded = {True: [], False: []}  # live group is SUSPENDED -> user ids without radius_access_state
+
+        conn = None
+        try:
+            conn = company._get_direct_conn()
+            with conn.cursor() as cur:
+                joined = _outer_join(self._iter_expected(), self._iter_actual(cur))
+                for username, expected, actual in joined:
+                    counts['checked'] += 1
+                    if expected and expected['present'] and not expected['access'] and actual:
+                        unrecorded[actual['group'] == suspended_group].append(expected['user_id'])
+                    drift, diffs = self._diff(expected, actual, suspended_group)
+                    if not drift:
+                        continue
+                    counts[drift] += 1
+                    if expected and expected['present']:
+                        expected = dict(expected, group=self._expected_group(expected, actual, suspended_group))
+                    fixes.append((username, drift, diffs, expected))
+                    lines.append({
+                        'reconcile_id': self.id,
+                        'username': username,
+                        'drift_type': drift,
+                        'radius_user_id': expected and expected['user_id'] or False,
+                        'drift_fields': ', '.join(diffs),
+                        'expected': self._format_fp(expected) if expected and expected['present'] else False,
+                        'actual': self._format_fp(actual) if actual else False,
+                    })
+
+            fixed = self._apply_fixes(conn, fixes) if self.apply_fixes and fixes else set()
+            counts['fixed'] = len(fixed)
+            for vals in lines:
+                vals['fixed'] = vals['username'] in fixed
+
+            for batch in chunked(lines, 1000):
+                self.env['asr.radius.reconcile.line'].create(batch)
+
+            Users = self.env['asr.radius.user'].sudo().with_context(skip_radius_auto_sync=True)
+            for is_suspended, user_ids in unrecorded.items():
+                if user_ids:
+                    Users.browse(user_ids).write({'radius_access_state': 'suspended' if is_suspended else 'active'})
+
+            self.write({
+                'state': 'done',
+                'date_end': fields.Datetime.now(),
+                'duration': time.time() - started,
+                'checked_count': counts['checked'],
+                'missing_count': counts['missing'],
+                'orphaned_count': counts['orphaned'],
+                'mismatch_count': counts['mismatch'],
+                'fixed_count': counts['fixed'],
+            })
+            _logger.info(
+                "RADIUS reconcile %s: %d checked, %d missing, %d orphaned, %d mismatched, %d fixed in %.1fs",
+                company.name, counts['checked'], counts['missing'], counts['orphaned'],
+                counts['mismatch'], counts['fixed'], time.time() - started,
+            )
+        except Exception as e:
+            _logger.exception("RADIUS reconcile failed for %s", company.name)
+            self.write({
+                'state': 'failed',
+                'date_end': fields.Datetime.now(),
+                'duration': time.time() - started,
+                'error': str(e),
+            })
+        finally:
+            if conn:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+    @staticmethod
+    def _format_fp(fp):
+        pool = fp.get('pool')
+        return "group=%s pool=%s password=%s" % (
+            fp.get('group') or '-',
+            '-' if pool is None else (pool or 'default'),
+            'set' if fp.get('password') else 'missing',
+        )
+
+    def _apply_fixes(self, conn, fixes):
+        """Apply the needed changes with chunked IN deletes and multi-row inserts.
+
+        Each chunk runs in its own transaction. Returns the set of fixed usernames.
+        """
+        self.ensure_one()
+        fixed_usernames = set()
+        fixed_user_ids = []
+        activated_user_ids = []  # access not recorded yet, plan group pushed
+        for chunk in chunked(fixes):
+            pw_rows, group_rows, pool_rows = [], [], []
+            pw_users, group_users, pool_users, orphan_users = [], [], [], []
+            for username, drift, diffs, expected in chunk:
+                if drift == 'orphaned':
+                    if self.fix_orphans:
+                        orphan_users.append(username)
+                    continue
+                if 'password' in diffs:
+                    pw_users.append(username)
+                    pw_rows.append((username, 'Cleartext-Password', ':=', expected['password']))
+                if 'group' in diffs:
+                    group_users.append(username)
+                    group_rows.append((username, expected['group'], 1))
+                if 'pool' in diffs:
+                    pool_users.append(username)
+                    if expected['pool']:
+                        pool_rows.append((username, 'Framed-Pool', ':=', expected['pool']))
+            if not (pw_users or group_users or pool_users or orphan_users):
+                continue
+
+            try:
+                conn.begin()
+                with conn.cursor() as cur:
+                    delete_by_usernames(cur, 'radcheck', pw_users, attribute='Cleartext-Password')
+                    insert_rows(cur, 'radcheck', ('username', 'attribute', 'op', 'value'), pw_rows)
+                    delete_by_usernames(cur, 'radusergroup', group_users)
+                    insert_rows(cur, 'radusergroup', ('username', 'groupname', 'priority'), group_rows)
+                    delete_by_usernames(cur, 'radreply', pool_users, attribute='Framed-Pool')
+                    insert_rows(cur, 'radreply', ('username', 'attribute', 'op', 'value'), pool_rows)
+                    for table in ('radreply', 'radcheck', 'radusergroup'):
+                        delete_by_usernames(cur, table, orphan_users)
+                conn.commit()
+            except Exception as e:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+                _logger.error("RADIUS reconcile: fix chunk failed (%d users): %s", len(chunk), e)
+                continue
+
+            chunk_users = set(pw_users + group_users + pool_users + orphan_users)
+            fixed_usernames |= chunk_users
+            fixed_user_ids += [exp['user_id'] for u, d, f, exp in chunk
+                               if u in chunk_users and exp and exp['present']]
+            activated_user_ids += [exp['user_id'] for u, d, f, exp in chunk
+                                   if u in group_users and exp and exp['present'] and not exp['access']]
+
+        if fixed_user_ids:
+            self.env['asr.radius.user'].sudo().browse(fixed_user_ids).with_context(skip_radius_auto_sync=True).write({
+                'radius_synced': True,
+                'last_sync_error': False,
+                'last_sync_date': fields.Datetime.now(),
+            })
+        if activated_user_ids:
+            self.env['asr.radius.user'].sudo().browse(activated_user_ids).with_context(
+                skip_radius_auto_sync=True).write({'radius_access_state': 'active'})
+        return fixed_usernames
+
+    @api.model
+    def _cron_reconcile(self):
+        """Nightly: reconcile every company with FreeRADIUS DB settings and fix drift."""
+        companies = self.env['res.company'].sudo().search([
+            ('fr_db_host', '!=', False),
+            ('fr_db_name', '!=', False),
+            ('fr_db_user', '!=', False),
+        ])
+        for company in companies:
+            run = self.sudo().create({'company_id': company.id, 'apply_fixes': True})
+            run._run()
+            self.env.cr.commit()
+
+
+class AsrRadiusReconcileLine(models.Model):
+    _name = 'asr.radius.reconcile.line'
+    _description = 'RADIUS Reconciliation Drift'
+    _order = 'drift_type, username'
+
+    reconcile_id = fields.Many2one('asr.radius.reconcile', required=True, ondelete='cascade', index=True)
+    username = fields.Char(required=True, index=True)
+    drift_type = fields.Selection([
+        ('missing', 'Missing in RADIUS'),
+        ('orphaned', 'Orphaned in RADIUS'),
+        ('mismatch', 'Mismatched'),
+    ], required=True)
+    drift_fields = fields.Char(string="Fields", help="Mismatched parts of the fingerprint")
+    expected = fields.Char(string="Odoo")
+    actual = fields.Char(string="RADIUS")
+    radius_user_id = fields.Many2one('asr.radius.user', string="RADIUS User", ondelete='set null')
+    fixed = fields.Boolean(readonly=True)
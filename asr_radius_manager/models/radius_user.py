@@ -1,12 +1,15 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from markupsafe import Markup
 import logging
 import re
 import subprocess  # ← SHTUAR
 import secrets
 import string
 
+from .radius_bulk import CHUNK_SIZE, chunked, delete_by_usernames, fetch_online_usernames, insert_rows
+
 _logger = logging.getLogger(__name__)
 
 _SANITIZE_RE = re.compile(r"[^A-Z0-9]+")
@@ -67,6 +70,17 @@ class AsrRadiusUser(models.Model):
         store=False
     )
 
+    # Grupi i shtyrë në radusergroup nga Odoo (plan ose SUSPENDED); bosh = i panjohur (para këtij fushe)
+    radius_access_state = fields.Selection(
+        [('active', 'Active'), ('suspended', 'Suspended')],
+        string="RADIUS Access",
+        readonly=True,
+        copy=False,
+        index=True,
+        help="Access last pushed by Odoo: plan group (Active) or the SUSPENDED group. "
+             "Reconciliation accepts the SUSPENDED group only for suspended users."
+    )
+
     _sql_constraints = [
         ('uniq_username_company', 'unique(username, company_id)', 'RADIUS username must be unique per company.'),
         ('uniq_partner_company', 'unique(partner_id, company_id)', 'Each partner can have only one RADIUS user per company.')
@@ -213,6 +227,14 @@ class AsrRadiusUser(models.Model):
                        VALUES (%s, %s, 1)
                        """, (username, groupname))
 
+    def _reconcile_expected_pools(self):
+        """Per-user Framed-Pool overrides expected in radreply, as {username: pool or False}.
+
+        Returns None when pool overrides are not managed, so reconciliation skips them.
+        Extended by modules that move users between pools (e.g. expiry handling).
+        """
+        return None
+
     # ---- Actions ----
     def action_sync_to_radius(self):
         ok = 0
@@ -241,6 +263,7 @@ class AsrRadiusUser(models.Model):
                 conn.commit()
                 rec.sudo().with_context(skip_radius_auto_sync=True, _from_radius_sync=True).write({
                     'radius_synced': True,
+                    'radius_access_state': 'active',
                     'last_sync_error': False,
                     'last_sync_date': fields.Datetime.now(),
                 })
@@ -336,7 +359,8 @@ class AsrRadiusUser(models.Model):
                     self._upsert_radusergroup(cur, rec.username, suspended)
                 conn.commit()
                 rec.sudo().with_context(skip_radius_auto_sync=True).write(
-                    {'radius_synced': True, 'last_sync_error': False, 'last_sync_date': fields.Datetime.now()})
+                    {'radius_synced': True, 'radius_access_state': 'suspended',
+                     'last_sync_error': False, 'last_sync_date': fields.Datetime.now()})
                 ok += 1
                 try:
                     rec.message_post(
@@ -396,7 +420,8 @@ class AsrRadiusUser(models.Model):
                     self._upsert_radusergroup(cur, rec.username, rec.groupname)
                 conn.commit()
                 rec.sudo().with_context(skip_radius_auto_sync=True).write(
-                    {'radius_synced': True, 'last_sync_error': False, 'last_sync_date': fields.Datetime.now()})
+                    {'radius_synced': True, 'radius_access_state': 'active',
+                     'last_sync_error': False, 'last_sync_date': fields.Datetime.now()})
                 ok += 1
                 try:
                     rec.message_post(
@@ -806,6 +831,44 @@ class AsrRadiusUserProvision(models.Model):
             except Exception:
                 pass
 
+    @api.model
+    def _disconnect_users_parallel(self, user_ids, max_workers=10, timeout=15):
+        """Disconnect many users concurrently; each worker uses its own cursor.
+
+        Callers pass only users already known to be online (one radacct query),
+        so no per-user session check is done here.
+        Returns {user_id: 'success' | 'error'}.
+        """
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        def disconnect_one(user_id):
+            try:
+                with self.pool.cursor() as cr:
+                    env = api.Environment(cr, self.env.uid, self.env.context)
+                    user = env['asr.radius.user'].browse(user_id)
+                    if not user.exists():
+                        return 'error'
+                    res = user.action_disconnect_user()
+                    ok = isinstance(res, dict) and res.get('params', {}).get('type') == 'success'
+                    return 'success' if ok else 'error'
+            except Exception as e:
+                _logger.warning("⚠️ Failed to disconnect RADIUS user %s: %s", user_id, e)
+                return 'error'
+
+        results = {}
+        if not user_ids:
+            return results
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(disconnect_one, uid): uid for uid in user_ids}
+            for future in as_completed(futures):
+                uid = futures[future]
+                try:
+                    results[uid] = future.result(timeout=timeout)
+                except Exception as e:
+                    _logger.error("❌ Disconnect future failed for RADIUS user %s: %s", uid, e)
+                    results[uid] = 'error'
+        return results
+
     def action_disconnect_user(self):
         """Send RADIUS Disconnect-Request via SSH to FreeRADIUS server."""
         self.ensure_one()
@@ -1005,4 +1068,213 @@ class AsrRadiusUserProvision(models.Model):
             'res_id': self.partner_id.id,
             'view_mode': 'form',
             'target': 'current',
-        }
\ No newline at end of file
+        }
+
+# =========================
+# SHTESË: Bulk actions (set-based SQL, chunked transactions)
+# =========================
+class AsrRadiusUserBulk(models.Model):
+    _inherit = 'asr.radius.user'
+
+    @api.model
+    def _suspended_groupname(self, company):
+        return f"{_slug_company((getattr(company, 'code', None) or company.name))}:SUSPENDED"
+
+    @api.model
+    def _mark_radius_access(self, company, usernames, state):
+        """Record the group Odoo pushed for these usernames ('active' = plan, 'suspended')."""
+        if usernames:
+            self.sudo().with_context(active_test=False, skip_radius_auto_sync=True).search([
+                ('company_id', '=', company.id),
+                ('username', 'in', list(usernames)),
+            ]).write({'radius_access_state': state})
+
+    @api.model
+    def _radius_bulk_apply(self, company, operation, items, chunk_size=CHUNK_SIZE):
+        """Apply suspend/reactivate/remove for many users of one company.
+
+        items: list of (username, groupname); groupname is ignored for 'remove'.
+        Each chunk is one MySQL transaction with ``IN (...)`` deletes and a multi-row
+        insert; online users are read with one radacct query per chunk.
+        Returns (done_usernames, {username: error}, online_usernames).
+        """
+        done, failed, online = set(), {}, set()
+        if not items:
+            return done, failed, online
+        conn = None
+        try:
+            conn = company.sudo()._get_direct_conn()
+            if operation == 'suspend':
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        INSERT IGNORE INTO radgroupreply (groupname, attribute, op, value)
+                        VALUES (%s, 'Reply-Message', ':=', 'Suspended')
+                    """, (self._suspended_groupname(company),))
+            for chunk in chunked(items, chunk_size):
+                usernames = [username for username, _group in chunk]
+                try:
+                    conn.begin()
+                    with conn.cursor() as cur:
+                        if operation == 'remove':
+                            for table in ('radreply', 'radcheck', 'radusergroup'):
+                                delete_by_usernames(cur, table, usernames)
+                        else:
+                            delete_by_usernames(cur, 'radusergroup', usernames)
+                            insert_rows(cur, 'radusergroup', ('username', 'groupname', 'priority'),
+                                        [(username, group, 1) for username, group in chunk])
+                    conn.commit()
+                    done.update(usernames)
+                except Exception as e:
+                    try:
+                        conn.rollback()
+                    except Exception:
+                        pass
+                    _logger.error("Bulk %s failed for %d users: %s", operation, len(chunk), e)
+                    failed.update({username: str(e) for username in usernames})
+                    continue
+                try:
+                    with conn.cursor() as cur:
+                        online.update(fetch_online_usernames(cur, usernames))
+                except Exception as e:
+                    _logger.warning("Bulk %s: could not read online sessions: %s", operation, e)
+        except Exception as e:
+            _logger.error("Bulk %s aborted for company %s: %s", operation, company.name, e)
+            pending = {username for username, _group in items} - done - set(failed)
+            failed.update({username: str(e) for username in pending})
+        finally:
+            if conn:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        if operation in ('suspend', 'reactivate'):
+            self._mark_radius_access(company, done, 'suspended' if operation == 'suspend' else 'active')
+        return done, failed, online
+
+    @api.model
+    def _bulk_notification(self, operation, ok, failed, disconnected, last_error=None):
+        title, verb = {
+            'suspend': (_('RADIUS Suspension'), _('suspended')),
+            'reactivate': (_('RADIUS Reactivation'), _('reactivated')),
+            'remove': (_('RADIUS Removal'), _('removed')),
+        }[operation]
+        msg = _("%(ok)d user(s) %(verb)s, %(failed)d failed, %(disc)d online disconnected") % {
+            'ok': ok, 'verb': verb, 'failed': failed, 'disc': disconnected,
+        }
+        if last_error:
+            msg = f"{msg}\n{last_error}"
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': title if not failed else _('%s (Partial/Failed)') % title,
+                'message': msg,
+                'type': 'warning' if failed or operation == 'suspend' else 'success',
+                'sticky': False,
+            }
+        }
+
+    def _radius_bulk_execute(self, operation):
+        """Core of the bulk actions, shared with res.partner.
+
+        Applies the operation per company, records the sync state, disconnects the
+        users that were online. Results are keyed by record id (usernames are only
+        unique per company): returns (done_users, {id: error}, {disconnected ids}, {id: group}).
+        """
+        if operation == 'reactivate':
+            invalid = self.filtered(lambda r: not r.username or not r.subscription_id)
+            if invalid:
+                raise UserError(_("Missing username or subscription: %s") % ', '.join(
+                    invalid.mapped(lambda r: r.username or r.display_name)[:20]))
+        elif self.filtered(lambda r: not r.username):
+            raise UserError(_("Missing RADIUS username."))
+
+        done_users = self.browse()
+        online_users = self.browse()
+        failed = {}
+        groups = {}
+        for company in self.mapped(lambda r: r.company_id or self.env.company):
+            recs = self.filtered(lambda r: (r.company_id or self.env.company) == company)
+            suspended = self._suspended_groupname(company)
+            items = []
+            for rec in recs:
+                group = suspended if operation == 'suspend' else rec.groupname
+                groups[rec.id] = group
+                items.append((rec.username, group))
+            done, errors, online_names = self._radius_bulk_apply(company, operation, items)
+            done_users |= recs.filtered(lambda r: r.username in done)
+            online_users |= recs.filtered(lambda r: r.username in done and r.username in online_names)
+            failed.update({rec.id: errors[rec.username] for rec in recs if rec.username in errors})
+
+        now = fields.Datetime.now()
+        ctx_self = self.sudo().with_context(skip_radius_auto_sync=True)
+        if done_users:
+            ctx_self.browse(done_users.ids).write({
+                'radius_synced': operation != 'remove',
+                'last_sync_error': False,
+                'last_sync_date': now,
+            })
+        for error in set(failed.values()):
+            vals = {'last_sync_error': error}
+            if operation != 'remove':
+                vals['radius_synced'] = False
+            ctx_self.browse([rid for rid, err in failed.items() if err == error]).write(vals)
+
+        results = self._disconnect_users_parallel(online_users.ids)
+        disconnected = {uid for uid, status in results.items() if status == 'success'}
+        _logger.info("Bulk %s: %d ok, %d failed, %d online, %d disconnected",
+                     operation, len(done_users), len(failed), len(online_users), len(disconnected))
+        return done_users, failed, disconnected, groups
+
+    @api.model
+    def _bulk_log_summary(self, records, operation, lines, chunk_size=CHUNK_SIZE):
+        """One chatter note per chunk of `records` (on the chunk's first record).
+
+        lines: {record id: text}; the note lists every record of the chunk.
+        """
+        title = {
+            'suspend': _('Bulk suspension'),
+            'reactivate': _('Bulk reactivation'),
+            'remove': _('Bulk removal from RADIUS'),
+        }[operation]
+        for chunk in chunked(records.ids, chunk_size):
+            chunk_records = records.browse(chunk)
+            body = Markup('<b>%s</b> (%s)<br/>') % (title, _('%d record(s)') % len(chunk)) + \
+                Markup('<br/>').join(lines[rid] for rid in chunk if rid in lines)
+            try:
+                chunk_records[:1]._message_log(body=body)
+            except Exception as e:
+                _logger.warning("Failed to log bulk %s summary: %s", operation, e)
+
+    @api.model
+    def _bulk_summary_line(self, operation, username, group=None, error=None, disconnected=False):
+        if error:
+            return _("%(u)s: FAILED (%(err)s)") % {'u': username, 'err': error}
+        if operation == 'remove':
+            line = _("%(u)s: removed") % {'u': username}
+        else:
+            line = _("%(u)s → %(g)s") % {'u': username, 'g': group}
+        if disconnected:
+            line += _(" (was online, disconnected)")
+        return line
+
+    def _run_bulk_radius_action(self, operation):
+        """Bulk variant of action_suspend / action_reactivate / action_remove_from_radius."""
+        done_users, failed, disconnected, groups = self._radius_bulk_execute(operation)
+        lines = {
+            rec.id: self._bulk_summary_line(operation, rec.username, groups.get(rec.id),
+                                            failed.get(rec.id), rec.id in disconnected)
+            for rec in self
+        }
+        self._bulk_log_summary(self, operation, lines)
+        return self._bulk_notification(operation, len(done_users), len(self - done_users), len(disconnected),
+                                       last_error=next(iter(failed.values()), None))
+
+    def action_bulk_suspend(self):
+        return self._run_bulk_radius_action('suspend')
+
+    def action_bulk_reactivate(self):
+        return self._run_bulk_radius_action('reactivate')
+
+    def action_bulk_remove_from_radius(self):
+        return self._run_bulk_radius_action('remove')
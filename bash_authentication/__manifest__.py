@@ -2,14 +2,17 @@
     'name': 'API Authentication',
     'version': '1.0.1',
     'author': 'BASH',
-    'depends': ['base', 'stock', 'odoo_website_helpdesk', 'web', 'purchase', 'radius_odoo_integration'],
+    'depends': ['base', 'stock', 'odoo_website_helpdesk', 'web', 'purchase', 'ab_radius_connector', 'radius_odoo_integration'],
     'data': [
         'data/groups.xml',
+        'security/ir.model.access.csv',
+        'data/ir_cron.xml',
         'views/res_users.xml',
         'views/res_company.xml',
         'views/res_partner.xml',
         'views/project_task_view.xml',
-        'views/purchase_inherit.xml'
+        'views/purchase_inherit.xml',
+        'views/device_views.xml',
     ],
     'installable': True,
     'application': True,
@@ -4,6 +4,8 @@ import json
 import logging
 from odoo import SUPERUSER_ID
 
+from ..models.mobile_sync import client_etag, request_payload, set_etag
+
 _logger = logging.getLogger(__name__)
 
 
@@ -56,6 +58,11 @@ class ApiAuthentication(http.Controller):
         """Get the currently authenticated user information."""
         user = request.env.user
 
+        token = user._mobile_change_token("user")
+        set_etag(token)
+        if client_etag(request_payload()) == token:
+            return {'status': 'not_modified', 'etag': token}
+
         # Get user fields
         user_data = {
             'id': user.id,
@@ -75,7 +82,8 @@ class ApiAuthentication(http.Controller):
 
         return {
             'status': 'success',
-            'user': user_data
+            'user': user_data,
+            'etag': token,
         }
 
     @http.route('/api/create_user', type='json', auth='none', csrf=False, methods=['POST'])
@@ -115,13 +123,9 @@ class ApiAuthentication(http.Controller):
             if not portal_group:
                 return {'status': 'error', 'message': 'Portal group not found.'}
 
-            sql = f"SELECT * FROM users where username = '{login}'"
-
             company = request.env['res.company'].sudo().search([('id', '=', 1)], limit=1)
 
-            response = company.run_query(2, sql, 'radius')
-
-            data = response.get('data')
+            data = company.api_query("radius_user", login=login)
 
             _logger.info(data)
 
@@ -157,6 +161,12 @@ class ApiAuthentication(http.Controller):
                 # Update the user to reference the newly created partner
                 user.sudo().write({'partner_id': partner.id})
 
+                # Legacy tickets of this customer were skipped by the importer (no partner yet)
+                try:
+                    request.env['ticket.helpdesk'].sudo()._import_legacy_tickets_for(partner, company)
+                except Exception as e:
+                    _logger.warning(f"Legacy ticket backfill failed for {login}: {e}")
+
                 _logger.info(f"User created successfully: {user[0].name} (ID: {user[0].id})")
 
                 return {
@@ -1,10 +1,9 @@
-import json
 import logging
 from odoo import http
 from odoo.http import request
 from odoo.exceptions import UserError
-from datetime import datetime, timedelta
-from dateutil.relativedelta import relativedelta
+
+from ..models.api_cache import cached_result
 
 _logger = logging.getLogger(__name__)
 
@@ -15,23 +14,6 @@ class ParentalControlAPI(http.Controller):
         try:
             user = request.env.user
 
-            current_date = datetime.now()
-            
-            # Get current month
-            current_month = current_date.month
-            current_year = current_date.year
-            current_str = f"{current_year}_{current_month}"
-            current_postpaid = f"{current_year}_{current_month}_postpaid"
-
-            # Get last month 
-            last_date = current_date - relativedelta(months=1)
-            last_month = last_date.month
-            last_year = last_date.year
-            last_str = f"{last_year}_{last_month}"
-            last_postpaid = f"{last_year}_{last_month}_postpaid"
-
-
-            sql = f"SELECT NASIPAddress as server,FramedIpAddress as ip,67 as plan,username,AcctStartTime FROM {current_postpaid} WHERE username = '{user.login}' AND AcctStopTime IS NULL UNION ALL SELECT NASIPAddress as server,FramedIpAddress as ip,67 as plan,username,AcctStartTime FROM {last_postpaid} WHERE username = '{user.login}' AND AcctStopTime IS NULL ORDER BY AcctStartTime DESC LIMIT 1;"
             if not user.id:
                 return {
                     "status": "error",
@@ -44,20 +26,23 @@ class ParentalControlAPI(http.Controller):
                     'message': "No associated company found for this user",
                     "data": []
                 }
-            response = user.company_id.run_query(3, sql, 'otello')
-            if response.get('data') and response.get('status') == 'success':
-                data = response.get('data')[0]
-                parental = {
-                    "server": data.get('server'),
-                    "ip": data.get('ip'),
-                    "plan": data.get('plan'),
-                    "username": data.get('username'),
-                    "AcctStartTime": data.get('AcctStartTime')
-                }
-                return {
-                    "status": "success",
-                    "data": parental
-                }
+            def load():
+                rows = user.company_id.api_query("parental", login=user.login)
+                if rows:
+                    data = rows[0]
+                    parental = {
+                        "server": data.get('server'),
+                        "ip": data.get('ip'),
+                        "plan": data.get('plan'),
+                        "username": data.get('username'),
+                        "AcctStartTime": data.get('AcctStartTime')
+                    }
+                    return {
+                        "status": "success",
+                        "data": parental
+                    }
+
+            return cached_result(user, "get_parental", {}, load)
         except Exception as e:
             _logger.error(f"Error executing Superset query: {str(e)}")
             return {
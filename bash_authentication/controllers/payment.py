@@ -1,9 +1,9 @@
-import json
 import logging
 from odoo import http
 from odoo.http import request
 from odoo.exceptions import UserError
-from datetime import datetime
+
+from ..models.api_cache import cached_result
 
 _logger = logging.getLogger(__name__)
 
@@ -13,7 +13,6 @@ class PaymentAPI(http.Controller):
     def call_superset_query_api(self, **kwargs):
         try:
             user = request.env.user
-            sql = f"SELECT (SELECT COUNT(*) FROM active_payments t INNER JOIN users u ON t.acctid = u.acctid WHERE u.username = '{user.login}') AS pagesa_ne_total, t.start_date, t.stop_date, t.monthly_fee as pagesa_aktuale_mujore FROM active_payments t INNER JOIN users u ON t.acctid = u.acctid WHERE u.username = '{user.login}' ORDER BY t.id DESC LIMIT 1;"
             if not user.id:
                 return {
                     "status": "error",
@@ -26,19 +25,22 @@ class PaymentAPI(http.Controller):
                     'message': "No associated company found for this user",
                     "data": []
                 }
-            response = user.company_id.run_query(2, sql, 'radius')
-            if response.get('data') and response.get('status') == 'success':
-                data = response.get('data')[0]
-                payment = {
-                    "pagesa_ne_total": data.get('pagesa_ne_total'),
-                    "start_date": data.get('start_date'),
-                    "stop_date": data.get('stop_date'),
-                    "pagesa_aktuale_mujore": data.get('pagesa_aktuale_mujore')
-                }
-                return {
-                        "status": "success",
-                        "data": payment
+            def load():
+                rows = user.company_id.api_query("payment", login=user.login)
+                if rows:
+                    data = rows[0]
+                    payment = {
+                        "pagesa_ne_total": data.get('pagesa_ne_total'),
+                        "start_date": data.get('start_date'),
+                        "stop_date": data.get('stop_date'),
+                        "pagesa_aktuale_mujore": data.get('pagesa_aktuale_mujore')
                     }
+                    return {
+                            "status": "success",
+                            "data": payment
+                        }
+
+            return cached_result(user, "get_payment", {}, load)
         except Exception as e:
             _logger.error(f"Error executing Superset query: {str(e)}")
             return {
@@ -5,6 +5,8 @@ from odoo.http import request
 from odoo.exceptions import UserError
 from datetime import datetime
 
+from ..models.mobile_sync import client_etag, next_since, parse_since, request_payload, set_etag
+
 _logger = logging.getLogger(__name__)
 
 
@@ -13,7 +15,7 @@ class SupersetAPI(http.Controller):
     @http.route('/api/get_tickets', type='json', auth='user', methods=['POST'], csrf=False)
     def call_superset_query_api(self, **kwargs):
         """
-        API to trigger Superset Query Execution.
+        Returns the helpdesk tickets of the logged-in customer (local read only).
         Expected payload:
         {
             "user_id": 1
@@ -37,21 +39,21 @@ class SupersetAPI(http.Controller):
 
             # Get the customer associated with the user
             customer = user.partner_id
-
-            # Get existing imported IDs to avoid duplicates
-            imported_ids = request.env["ticket.helpdesk"].sudo().search([
-                ("customer_id", "=", customer.id)
-            ]).mapped("imported_id")
-
-            _logger.info(f"Imported IDs for customer_id={customer.id}: {imported_ids}")
-
-            # Execute Superset query
-            result = user.company_id.execute_superset_query(user.login, user.last_superset_call, [])
-            request.env["ticket.helpdesk"].sudo().create_new_ticket(result, customer=customer)
-
-            tickets = request.env["ticket.helpdesk"].sudo().search([
-                ("customer_id", "=", customer.id)], order="create_date DESC"
-            )
+            payload = request_payload()
+
+            # Unchanged since the app's last poll: no search, no serialization
+            token = user._mobile_change_token("tickets")
+            set_etag(token)
+            if client_etag(payload) == token:
+                return {"status": "not_modified", "etag": token}
+
+            # Legacy tickets are imported by the background cron (ticket.helpdesk._cron_import_legacy_tickets);
+            # this endpoint only reads local tickets.
+            domain = [("customer_id", "=", customer.id)]
+            since = parse_since(payload)
+            if since:
+                domain.append(("write_date", ">", since))
+            tickets = request.env["ticket.helpdesk"].sudo().search(domain, order="create_date DESC")
 
             # Convert recordset to a list of dictionaries
             ticket_data = [{
@@ -66,10 +68,15 @@ class SupersetAPI(http.Controller):
                 "create_date": ticket.create_date.strftime("%Y-%m-%d %H:%M:%S") if ticket.create_date else None,
             } for ticket in tickets]
 
-            return {
+            result = {
                 "status": "success",
-                "data": ticket_data
+                "data": ticket_data,
+                "etag": token,
+                "server_time": next_since(),
             }
+            if since:
+                result["deleted"] = [int(k) for k in request.env["mobile.api.deletion"]._deleted_since(user, "ticket", since)]
+            return result
         except Exception as e:
             _logger.error(f"Error executing Superset query: {str(e)}")
             return {
@@ -113,9 +120,7 @@ class SupersetAPI(http.Controller):
             current_time = datetime.now()
             formatted_time = current_time.strftime("%Y-%m-%dT%H:%M:%S")
 
-            sql_user = f"SELECT * FROM users where username = '{user.login}'"
-
-            user_id = user.company_id.run_query(2, sql_user, 'radius').get('data')[0].get('acctid')
+            user_id = user.company_id.api_query("radius_user", login=user.login)[0].get('acctid')
 
             sql = f"INSERT INTO troubleticket(subject, description, acctid, start_date, status, assigned_to_department, operatorid) VALUES('{subject}', '{description}', {user_id}, '{formatted_time}' , 0, 2, 1553); SELECT LAST_INSERT_ID(); "
 
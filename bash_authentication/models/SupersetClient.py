@@ -1,6 +1,7 @@
-import requests
 import logging
 
+from odoo.addons.ab_radius_connector.models.http_client import get_client
+
 _logger = logging.getLogger(__name__)  # Set up logging for this model
 
 
@@ -21,9 +22,11 @@ class SupersetClient:
         self.username = username
         self._password = password
         self.token = token
+        self.session_cookie = None
         self.provider = provider
         self.verify = verify
         self.session = None
+        self.client = get_client("superset", host, timeout=(5, 120))
 
     @staticmethod
     def join_urls(*args) -> str:
@@ -38,7 +41,8 @@ class SupersetClient:
         if not self.username or not self._password:
             raise ValueError("Username and password are required for authentication.")
 
-        response = requests.post(
+        response = self.client.request(
+            "POST",
             self.login_endpoint,
             json={
                 "username": self.username,
@@ -47,6 +51,7 @@ class SupersetClient:
                 "refresh": "true",
             },
             verify=self.verify,
+            idempotent=True,
         )
         response.raise_for_status()
         tokens = response.json()
@@ -57,31 +62,32 @@ class SupersetClient:
     def get_csrf_token(self):
         """Fetch CSRF token for authenticated session."""
         headers = {"Authorization": f"Bearer {self.token}"}
-        response = requests.get(
+        response = self.client.request(
+            "GET",
             self.join_urls(self.base_url, "security/csrf_token/"),
             headers=headers,
+            cookies={"session": self.session_cookie} if self.session_cookie else None,
             verify=self.verify,
         )
         response.raise_for_status()
+        # The shared client keeps no cookies; the CSRF secret lives in this response's session cookie
+        self.session_cookie = response.cookies.get("session") or self.session_cookie
         csrf_token = response.json().get("result")
         if not csrf_token:
             raise RuntimeError("Failed to fetch CSRF token.")
         return csrf_token
 
     def create_session(self):
-        """Create an authenticated session with CSRF token."""
+        """Authenticate and build the request headers (the pooled HTTP client is shared)."""
         if not self.token:
             self.authenticate()
 
         csrf_token = self.get_csrf_token()
-        self.session = requests.Session()
-        self.session.headers.update(
-            {
-                "Authorization": f"Bearer {self.token}",
-                "X-CSRFToken": csrf_token,
-                "Referer": f"{self.base_url}",
-            }
-        )
+        self.session = {
+            "Authorization": f"Bearer {self.token}",
+            "X-CSRFToken": csrf_token,
+            "Referer": f"{self.base_url}",
+        }
         return self.session
 
     def run_query(self, database_id, query, schema=None, query_limit=None):
@@ -97,7 +103,14 @@ class SupersetClient:
         if query_limit:
             payload["queryLimit"] = query_limit
 
-        response = self.session.post(self._sql_endpoint, json=payload, verify=self.verify)
+        response = self.client.request(
+            "POST",
+            self._sql_endpoint,
+            json=payload,
+            headers=self.session,
+            cookies={"session": self.session_cookie} if self.session_cookie else None,
+            verify=self.verify,
+        )
         response.raise_for_status()
         result = response.json()
 
@@ -1,9 +1,14 @@
 from . import stock_quant
 from . import res_users
 from . import res_company
+from . import api_data
 from . import res_partner
 from . import hr_attendance
 from . import ticket_helpdesk
 from . import project_task
 from . import hr_employee
-from . import device
\ No newline at end of file
+from . import device
+from . import device_task
+from . import device_task_wizard
+from . import account_payment
+from . import mobile_sync
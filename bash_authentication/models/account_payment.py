@@ -0,0 +1,12 @@
+from odoo import models
+
+
+class AccountPayment(models.Model):
+    _inherit = 'account.payment'
+
+    def action_post(self):
+        res = super().action_post()
+        # Payment changes what /api/get_payment and /api/get_packages return
+        partners = self.partner_id | self.partner_id.commercial_partner_id
+        partners.with_context(active_test=False).user_ids.sudo().api_cache_invalidate()
+        return res
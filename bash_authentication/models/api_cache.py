@@ -0,0 +1,105 @@
+"""TTL result cache for the Superset-backed mobile API endpoints.
+
+Results are kept per (user, endpoint, parameters) in the worker process:
+
+    return cached_result(user, "get_payment", {}, lambda: load_payment(user))
+
+- TTL per endpoint: ICP `bash_authentication.api_cache_ttl.<endpoint>` (seconds, 0 disables),
+  default DEFAULT_TTL.
+- Request coalescing: concurrent identical requests wait for the one upstream call
+  already in flight instead of sending their own.
+- Stale fallback: while a refresh is in flight, or when the refresh fails (Superset slow
+  or down), the last value is served for up to STALE_TTL seconds.
+- Invalidation: the key includes `res.users.api_cache_version`; bumping it
+  (`user.api_cache_invalidate()`, e.g. on payment) invalidates the user's entries in
+  every worker, since each worker reads the version from the database.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300           # seconds a result is fresh
+STALE_TTL = 6 * 3600        # seconds a result may still be served when the upstream fails
+WAIT_TIMEOUT = 60           # seconds a coalesced request waits for the call in flight
+MAX_ENTRIES = 20000
+
+
+class ResultCache:
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (fresh_until, stale_until, value)
+        self._inflight = {}             # key -> threading.Event
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.stale = 0
+
+    def get(self, key, ttl, compute, stale_ttl=STALE_TTL):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+        has_stale = bool(entry and entry[1] > now)
+
+        if not leader:
+            if has_stale:
+                self.stale += 1
+                return entry[2]
+            event.wait(WAIT_TIMEOUT)
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[2]
+            return compute()
+
+        self.misses += 1
+        try:
+            value = compute()
+        except Exception as e:
+            if has_stale:
+                self.stale += 1
+                _logger.warning("⏳ Serving cached %s after upstream error: %s", key[1], str(e))
+                return entry[2]
+            raise
+        else:
+            done = time.monotonic()
+            with self._lock:
+                self._entries[key] = (done + ttl, done + max(ttl, stale_ttl), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+
+CACHE = ResultCache()
+
+
+def cached_result(user, endpoint, params, compute):
+    """Returns compute() through the cache, keyed on user, endpoint and request parameters."""
+    ttl = int(user.env["ir.config_parameter"].sudo().get_param(
+        "bash_authentication.api_cache_ttl.%s" % endpoint, DEFAULT_TTL))
+    if ttl <= 0:
+        return compute()
+    key = (
+        user.env.cr.dbname,
+        endpoint,
+        user.id,
+        user.sudo().api_cache_version,
+        json.dumps(params or {}, sort_keys=True, default=str),
+    )
+    return CACHE.get(key, ttl, compute)
@@ -0,0 +1,244 @@
+"""Read-only data access for the mobile API (billing `radius` DB and accounting `otello` DB).
+
+Every query the app needs is declared once in QUERIES with %s placeholders and runs
+through `res.company.api_query(name, **params)`, which returns a list of dict rows.
+
+- backend 'direct': pooled PyMySQL connections (ab_radius_connector.mysql_pool), prepared
+  parameters, read-only sessions; the databases come from `mysql.connector` records.
+- backend 'superset': the same SQL rendered with escaped literals and sent to SQL Lab.
+
+Per-query timeouts: QUERIES default, overridable with ICP
+`bash_authentication.api_query_timeout.<name>` (seconds).
+"""
+import datetime
+import decimal
+import logging
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import _, fields, models
+from odoo.exceptions import UserError
+from odoo.addons.ab_radius_connector.models.mysql_pool import mysql_connection
+
+_logger = logging.getLogger(__name__)
+
+# source -> (Superset database id, Superset schema)
+SUPERSET_SOURCES = {
+    "billing": (2, "radius"),
+    "accounting": (3, "otello"),
+}
+
+_ESCAPES = {
+    "\0": "\\0", "\n": "\\n", "\r": "\\r", "\032": "\\Z",
+    "'": "\\'", '"': '\\"', "\\": "\\\\",
+}
+
+
+def _postpaid_table(year, month):
+    """`2025_3_postpaid`: table names cannot be parameters, so they are built from ints only."""
+    year, month = int(year), int(month)
+    if not (2000 <= year <= 2100 and 1 <= month <= 12):
+        raise UserError(_("Invalid period %s/%s") % (month, year))
+    return "`%s_%s_postpaid`" % (year, month)
+
+
+def _usage_sessions(login, year, month, size, offset):
+    table = _postpaid_table(year, month)
+    sql = (f"SELECT AcctStartTime AS start_date, AcctStopTime AS stop_date, "
+           f"SUM(AcctInputOctets + AcctOutputOctets) / 1000000000 AS usage_gb, "
+           f"TIMEDIFF(AcctStopTime, AcctStartTime) AS session_time, NASIPAddress AS nas_ip_address, "
+           f"FramedIPAddress AS ip_address, "
+           f"(SELECT SUM(AcctInputOctets + AcctOutputOctets) / 1000000000 FROM {table} WHERE UserName = %s) AS totali_gb "
+           f"FROM {table} WHERE UserName = %s AND MONTH(AcctStartTime) = %s AND YEAR(AcctStartTime) = %s "
+           f"GROUP BY AcctStartTime, AcctStopTime, NASIPAddress, FramedIPAddress "
+           f"ORDER BY AcctStartTime DESC LIMIT %s OFFSET %s")
+    return sql, (login, login, int(month), int(year), int(size), int(offset))
+
+
+def _usage_total(login, year, month):
+    table = _postpaid_table(year, month)
+    sql = (f"SELECT COUNT(*) AS total_rows FROM (SELECT 1 FROM {table} WHERE UserName = %s "
+           f"GROUP BY AcctStartTime, AcctStopTime, NASIPAddress, FramedIPAddress) AS total_count")
+    return sql, (login,)
+
+
+def _packages(login):
+    sql = ("SELECT t.id, t.acctid AS customer_id, u.username AS ab_username, u.fullname AS customer_name, "
+           "u.email AS email, u.mobile AS phone, "
+           "CASE WHEN pl.name <> '' THEN pl.name ELSE '-' END AS internet_plan_name, "
+           "CASE WHEN tpl.name <> '' THEN tpl.name ELSE '-' END AS tv_plan_name, "
+           "CASE WHEN t.voice_plan_id <> 0 THEN 'Standard' ELSE '-' END AS voice_plan_name, "
+           "CASE WHEN t.static_ip <> 0 THEN 'Po' ELSE 'Jo' END AS ip_statike "
+           "FROM active_payments t INNER JOIN users u ON t.acctid = u.acctid "
+           "LEFT JOIN plans pl ON (t.internet_plan_id <> 0 AND t.internet_plan_id = pl.id AND t.active = 1) "
+           "LEFT JOIN tv_plans tpl ON (t.tv_plan_id <> 0 AND t.tv_plan_id = tpl.id AND t.active = 1) "
+           "WHERE u.username = %s AND t.active = 1 ORDER BY t.`id` ASC LIMIT 10")
+    return sql, (login,)
+
+
+def _payment(login):
+    sql = ("SELECT (SELECT COUNT(*) FROM active_payments t INNER JOIN users u ON t.acctid = u.acctid "
+           "WHERE u.username = %s) AS pagesa_ne_total, t.start_date, t.stop_date, "
+           "t.monthly_fee AS pagesa_aktuale_mujore "
+           "FROM active_payments t INNER JOIN users u ON t.acctid = u.acctid "
+           "WHERE u.username = %s ORDER BY t.id DESC LIMIT 1")
+    return sql, (login, login)
+
+
+def _parental(login, today=None):
+    today = today or datetime.date.today()
+    last = today - relativedelta(months=1)
+    current_table = _postpaid_table(today.year, today.month)
+    last_table = _postpaid_table(last.year, last.month)
+    sql = (f"SELECT NASIPAddress AS server, FramedIpAddress AS ip, 67 AS plan, username, AcctStartTime "
+           f"FROM {current_table} WHERE username = %s AND AcctStopTime IS NULL "
+           f"UNION ALL "
+           f"SELECT NASIPAddress AS server, FramedIpAddress AS ip, 67 AS plan, username, AcctStartTime "
+           f"FROM {last_table} WHERE username = %s AND AcctStopTime IS NULL "
+           f"ORDER BY AcctStartTime DESC LIMIT 1")
+    return sql, (login, login)
+
+
+_TICKET_SELECT = (
+    "SELECT t.id AS imported_id, t.operatorid AS user_id, t.acctid AS customer_id, "
+    "u.username AS ab_username, u.fullname AS customer_name, u.email AS email, u.mobile AS phone, "
+    "CASE WHEN t.status = 1 THEN 5 ELSE 1 END AS stage_id, "
+    "CASE WHEN t.status = 1 THEN 'Closed' ELSE 'Inbox' END AS stage_name, "
+    "t.start_date AS create_date, t.subject AS subject, t.description AS description, "
+    "t.closed_solution, t.close_date AS end_date, t.update_date AS last_update_date, "
+    "t.closedBy AS assigned_user_id, t.priority AS priority "
+)
+
+
+def _tickets(login, exclude_ids=(), limit=10):
+    sql = _TICKET_SELECT + "FROM troubleticket t INNER JOIN users u ON t.acctid = u.acctid WHERE u.username = %s"
+    args = [login]
+    exclude_ids = [int(i) for i in exclude_ids or () if i]
+    if exclude_ids:
+        sql += " AND t.id NOT IN (%s)" % ", ".join(["%s"] * len(exclude_ids))
+        args += exclude_ids
+    sql += " LIMIT %s"
+    args.append(int(limit))
+    return sql, tuple(args)
+
+
+def _tickets_since(since_date, since_id, limit=1000):
+    """Keyset page over all customers, ordered by (last change, id) after the watermark."""
+    # rows with neither date sort first instead of never matching
+    changed = "COALESCE(t.update_date, t.start_date, '1970-01-01 00:00:00')"
+    sql = (_TICKET_SELECT + ", " + changed + " AS watermark_date "
+           "FROM troubleticket t INNER JOIN users u ON t.acctid = u.acctid "
+           "WHERE " + changed + " > %s OR (" + changed + " = %s AND t.id > %s) "
+           "ORDER BY " + changed + ", t.id LIMIT %s")
+    return sql, (since_date, since_date, int(since_id), int(limit))
+
+
+def _radius_user(login):
+    return "SELECT acctid, username FROM users WHERE username = %s LIMIT 1", (login,)
+
+
+# name -> (source, builder(**params) -> (sql, args), default timeout in seconds)
+QUERIES = {
+    "usage_sessions": ("accounting", _usage_sessions, 20),
+    "usage_total": ("accounting", _usage_total, 20),
+    "packages": ("billing", _packages, 10),
+    "payment": ("billing", _payment, 10),
+    "parental": ("accounting", _parental, 10),
+    "tickets": ("billing", _tickets, 20),
+    "tickets_since": ("billing", _tickets_since, 120),
+    "radius_user": ("billing", _radius_user, 10),
+}
+
+
+def sql_literal(value):
+    """MySQL literal for the Superset backend (SQL Lab takes no bind parameters)."""
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float, decimal.Decimal)):
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        value = value.isoformat(sep=" ") if isinstance(value, datetime.datetime) else value.isoformat()
+    return "'%s'" % "".join(_ESCAPES.get(c, c) for c in str(value))
+
+
+def render_sql(sql, args):
+    return sql % tuple(sql_literal(a) for a in args)
+
+
+def _json_value(value):
+    """Same JSON shapes as Superset returns (ISO datetimes, numbers, HH:MM:SS durations)."""
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, datetime.timedelta):
+        seconds = int(value.total_seconds())
+        sign = "-" if seconds < 0 else ""
+        seconds = abs(seconds)
+        return "%s%02d:%02d:%02d" % (sign, seconds // 3600, seconds % 3600 // 60, seconds % 60)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    return value
+
+
+class ResCompanyApiData(models.Model):
+    _inherit = "res.company"
+
+    api_data_backend = fields.Selection([
+        ("superset", "Superset SQL Lab"),
+        ("direct", "Direct DB (pooled)"),
+    ], string="Mobile API Data Backend", default="superset", required=True)
+    api_billing_connector_id = fields.Many2one(
+        "mysql.connector", string="Billing DB (radius)",
+        help="Read-only connection used by the mobile API when the backend is Direct DB.")
+    api_accounting_connector_id = fields.Many2one(
+        "mysql.connector", string="Accounting DB (otello)",
+        help="Read-only connection used by the mobile API when the backend is Direct DB.")
+
+    def _api_query_timeout(self, name, default):
+        return int(self.env["ir.config_parameter"].sudo().get_param(
+            "bash_authentication.api_query_timeout.%s" % name, default))
+
+    def _api_connector(self, source):
+        connector = self.api_billing_connector_id if source == "billing" else self.api_accounting_connector_id
+        if not connector:
+            raise UserError(_("Configure the %s database connection on the company.") % source)
+        return connector.sudo()
+
+    def api_query(self, name, **params):
+        """Runs a declared mobile API query; returns a list of dict rows."""
+        self.ensure_one()
+        source, build, default_timeout = QUERIES[name]
+        sql, args = build(**params)
+        timeout = self._api_query_timeout(name, default_timeout)
+
+        if self.api_data_backend != "direct":
+            database_id, schema = SUPERSET_SOURCES[source]
+            response = self.run_query(database_id, render_sql(sql, args), schema, timeout=(5, timeout))
+            if response.get("status") not in (None, "success"):
+                raise UserError(_("Superset query %s failed: %s") % (name, response.get("error") or response))
+            return response.get("data") or []
+
+        connector = self._api_connector(source)
+        conn_params = {
+            "host": connector.host,
+            "port": connector.port,
+            "user": connector.user,
+            "password": connector.password,
+            "database": connector.database,
+            "charset": connector.charset,
+        }
+        try:
+            with mysql_connection(conn_params, read_timeout=timeout,
+                                  connect_timeout=int(connector.connect_timeout or 5), read_only=True) as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(sql, args)
+                    rows = cursor.fetchall()
+        except UserError:
+            raise
+        except Exception as e:
+            _logger.error("Mobile API query %s failed on %s: %s", name, connector.name, str(e))
+            raise UserError(_("Query %s failed: %s") % (name, str(e)))
+        return [{k: _json_value(v) for k, v in row.items()} for row in rows]
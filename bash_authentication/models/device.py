@@ -1,9 +1,122 @@
-from odoo import fields, models, _
-from odoo.exceptions import UserError
+from datetime import datetime, timedelta
+import json
 import logging
 
+from odoo import api, fields, models
+
 _logger = logging.getLogger(__name__)  # Set up logging for this model
 
+GENIEACS_PAGE_SIZE = 500
+# A device counts as online if it informed GenieACS within this window
+# last_inform is refreshed by the sync cron (every 2 minutes) and CPEs inform periodically,
+# so "online" tolerates a cron cycle plus an inform period
+DEFAULT_ONLINE_WINDOW = 300     # seconds
+
+
+def online_window(env):
+    """How recent last_inform must be for a device to count as online.
+
+    ICP `bash_authentication.device_online_window` (seconds), default DEFAULT_ONLINE_WINDOW.
+    """
+    return timedelta(seconds=int(env["ir.config_parameter"].sudo().get_param(
+        "bash_authentication.device_online_window", DEFAULT_ONLINE_WINDOW)))
+
+WLAN = "InternetGatewayDevice.LANDevice.1.WLANConfiguration"
+
+# Only the parameters the mobile app shows, instead of the full parameter tree
+GENIEACS_PROJECTION = ",".join([
+    "_id",
+    "_tags",
+    "_lastInform",
+    "_deviceId._Manufacturer",
+    f"{WLAN}.1.SSID",
+    f"{WLAN}.3.SSID",
+    f"{WLAN}.5.SSID",
+    f"{WLAN}.1.Enable",
+    f"{WLAN}.3.Enable",
+    f"{WLAN}.5.Enable",
+    f"{WLAN}.1.PreSharedKey.1.KeyPassphrase",
+    f"{WLAN}.5.PreSharedKey.1.KeyPassphrase",
+    f"{WLAN}.1.X_TP_PreSharedKey",
+    f"{WLAN}.3.X_TP_PreSharedKey",
+    "InternetGatewayDevice.DNS.X_ZTE-COM_IPv4DNSServer1",
+    "InternetGatewayDevice.DNS.X_ZTE-COM_IPv4DNSServer2",
+    "InternetGatewayDevice.LANDevice.1.LANHostConfigManagement.DNSServers",
+])
+
+# DNS servers pushed by the app's DNS (parental filter) switch: "on" = filtered DNS
+DNS_PROFILES = {
+    "on": ("80.91.123.22", "80.91.123.23"),
+    "off": ("80.91.126.35", "80.91.126.34"),
+}
+
+# Only the devices and user tags are needed to find devices removed from GenieACS
+GENIEACS_ID_PROJECTION = "_id,_tags"
+
+
+def safe_get(dct, *keys):
+    """Safely navigate nested dictionaries, return empty string if any key is missing."""
+    for key in keys:
+        if not isinstance(dct, dict):
+            return ""
+        dct = dct.get(key)
+        if dct is None:
+            return ""
+    return dct.get("_value", "") if isinstance(dct, dict) else dct
+
+
+def parse_last_inform(value):
+    """'2025-01-01T10:00:00.123Z' -> naive UTC datetime (None if missing/invalid)."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value[:19], '%Y-%m-%dT%H:%M:%S')
+    except ValueError:
+        return None
+
+
+def genieacs_device_vals(device, window=timedelta(seconds=DEFAULT_ONLINE_WINDOW)):
+    """Maps a GenieACS device document to `device` values (ZTE and TP-Link parameter paths)."""
+    manufacturer = safe_get(device, "_deviceId", "_Manufacturer")
+    igd = ("InternetGatewayDevice",)
+    wlan = igd + ("LANDevice", "1", "WLANConfiguration")
+
+    if manufacturer == "ZTE":
+        vals = {
+            "device_name_24": safe_get(device, *wlan, "1", "SSID"),
+            "device_name_5": safe_get(device, *wlan, "5", "SSID"),
+            "device_pass_24": safe_get(device, *wlan, "1", "PreSharedKey", "1", "KeyPassphrase"),
+            "device_pass_5": safe_get(device, *wlan, "5", "PreSharedKey", "1", "KeyPassphrase"),
+            "dns": "%s,%s" % (safe_get(device, *igd, "DNS", "X_ZTE-COM_IPv4DNSServer1"),
+                              safe_get(device, *igd, "DNS", "X_ZTE-COM_IPv4DNSServer2")),
+            "wifi_status_24": safe_get(device, *wlan, "1", "Enable"),
+            "wifi_status_5": safe_get(device, *wlan, "5", "Enable"),
+        }
+    else:
+        vals = {
+            "device_name_24": safe_get(device, *wlan, "1", "SSID"),
+            "device_name_5": safe_get(device, *wlan, "3", "SSID"),
+            "device_pass_24": safe_get(device, *wlan, "1", "X_TP_PreSharedKey"),
+            "device_pass_5": safe_get(device, *wlan, "3", "X_TP_PreSharedKey"),
+            "dns": safe_get(device, *igd, "LANDevice", "1", "LANHostConfigManagement", "DNSServers"),
+            "wifi_status_24": safe_get(device, *wlan, "1", "Enable"),
+            "wifi_status_5": safe_get(device, *wlan, "3", "Enable"),
+        }
+
+    # Enable comes back as a JSON boolean; the app expects the same text as before
+    for key in ("wifi_status_24", "wifi_status_5"):
+        if isinstance(vals[key], bool):
+            vals[key] = str(vals[key]).lower()
+
+    last_inform = parse_last_inform(device.get("_lastInform"))
+    vals.update({
+        "device_id": device.get("_id"),
+        "device_manufactuer": manufacturer,
+        "last_inform": last_inform,
+        "device_status": bool(last_inform and last_inform > fields.Datetime.now() - window),
+    })
+    return vals
+
 
 class Device(models.Model):
 
@@ -13,12 +126,173 @@ class Device(models.Model):
     device_name_5 = fields.Char(string="Name 5G")
     device_pass_24 = fields.Char(string="Password 2.4G")
     device_pass_5 = fields.Char(string="Password 5G")
-    device_id = fields.Char(string="ID")
+    device_id = fields.Char(string="ID", index=True)
     device_manufactuer = fields.Char(string="Manufactuer")
     device_status = fields.Boolean(string="Status")
     dns = fields.Char(string="DNS")
     user = fields.Many2one(
         'res.users',
-        string='User')
+        string='User',
+        index=True)
     wifi_status_24 = fields.Char(string="Status Wifi 2.4G")
-    wifi_status_5 = fields.Char(string="Status Wifi 5G")
\ No newline at end of file
+    wifi_status_5 = fields.Char(string="Status Wifi 5G")
+    last_inform = fields.Datetime(string="Last Inform")
+    task_ids = fields.One2many("device.task", "device_id", string="Tasks")
+    task_state = fields.Selection([
+        ("queued", "Queued"),
+        ("submitted", "Submitted"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ], string="Last Task", readonly=True)
+    task_message = fields.Text(string="Last Task Message", readonly=True)
+    task_date = fields.Datetime(string="Last Task Update", readonly=True)
+
+    def unlink(self):
+        # Tombstones so the app's `since` delta sync learns about removed devices
+        self.env["mobile.api.deletion"]._record("device", [(d.user.id, d.device_id) for d in self])
+        return super().unlink()
+
+    def _wlan_index(self, internet_mode):
+        """'2.4' / '5' -> WLANConfiguration index for this CPE (None if unknown)."""
+        self.ensure_one()
+        if internet_mode == "2.4":
+            return "1"
+        if internet_mode == "5":
+            return "5" if self.device_manufactuer == "ZTE" else "3"
+        return None
+
+    def _dns_parameter_values(self, dns1, dns2):
+        """setParameterValues entries for the LAN DNS servers (both servers in one task)."""
+        self.ensure_one()
+        if self.device_manufactuer == "ZTE":
+            return [
+                ["InternetGatewayDevice.DNS.X_ZTE-COM_IPv4DNSServer1", dns1],
+                ["InternetGatewayDevice.DNS.X_ZTE-COM_IPv4DNSServer2", dns2],
+            ]
+        return [["InternetGatewayDevice.LANDevice.1.LANHostConfigManagement.DNSServers", "%s,%s" % (dns1, dns2)]]
+
+    def action_open_task_wizard(self):
+        return {
+            "type": "ir.actions.act_window",
+            "name": "Queue GenieACS Task",
+            "res_model": "device.task.wizard",
+            "view_mode": "form",
+            "target": "new",
+            "context": {"default_device_ids": [(6, 0, self.ids)]},
+        }
+
+    def is_online(self):
+        """Online if the device informed GenieACS within the online window (no GenieACS call)."""
+        self.ensure_one()
+        return bool(self.last_inform and self.last_inform > fields.Datetime.now() - online_window(self.env))
+
+    # ------------------------------------------------------------
+    # Background sync from GenieACS
+    # ------------------------------------------------------------
+    def _genieacs_pages(self, company, query, projection, sort=None):
+        """Yields pages of GenieACS devices (limit/skip) for the given query and projection."""
+        skip = 0
+        while True:
+            params = {
+                "query": json.dumps(query),
+                "projection": projection,
+                "limit": GENIEACS_PAGE_SIZE,
+                "skip": skip,
+            }
+            if sort:
+                params["sort"] = json.dumps(sort)
+            page = company.genieacs_request("GET", "/devices/", params=params) or []
+            if page:
+                yield page
+            if len(page) < GENIEACS_PAGE_SIZE:
+                return
+            skip += GENIEACS_PAGE_SIZE
+
+    def _genieacs_users_by_login(self, tags):
+        """Maps GenieACS tags to the users with that login (devices are tagged with the user login)."""
+        tags = list({t for t in tags if t})
+        users = {}
+        for i in range(0, len(tags), 1000):
+            for user in self.env["res.users"].sudo().with_context(active_test=False).search(
+                    [("login", "in", tags[i:i + 1000])]):
+                users[user.login] = user.id
+        return users
+
+    def _genieacs_upsert(self, documents):
+        """Creates/updates `device` rows for a page of GenieACS documents; one search per page."""
+        users = self._genieacs_users_by_login(t for doc in documents for t in (doc.get("_tags") or []))
+        rows = {}
+        window = online_window(self.env)
+        for doc in documents:
+            vals = genieacs_device_vals(doc, window)
+            for tag in doc.get("_tags") or []:
+                if tag in users:
+                    rows[(vals["device_id"], users[tag])] = dict(vals, user=users[tag])
+        if not rows:
+            return 0, 0
+
+        Device = self.sudo()
+        existing = {
+            (d.device_id, d.user.id): d
+            for d in Device.search([("device_id", "in", list({k[0] for k in rows}))])
+        }
+        to_create, updated = [], 0
+        for key, vals in rows.items():
+            record = existing.get(key)
+            if not record:
+                to_create.append(vals)
+                continue
+            changed = {k: v for k, v in vals.items() if k != "user" and (record[k] or False) != (v or False)}
+            if changed:
+                record.write(changed)
+                updated += 1
+        if to_create:
+            Device.create(to_create)
+        return len(to_create), updated
+
+    def _genieacs_sync_company(self, company, full=False):
+        """Incremental sync: only devices with _lastInform after the stored watermark.
+
+        With `full=True` all tagged devices are pulled and devices removed from GenieACS
+        (or untagged) are deleted locally.
+        """
+        ICP = self.env["ir.config_parameter"].sudo()
+        watermark_key = "bash_authentication.genieacs_last_inform.%s" % company.id
+        watermark = ICP.get_param(watermark_key)
+
+        query = {"_tags": {"$exists": True}}
+        if watermark and not full:
+            query["_lastInform"] = {"$gte": watermark}
+
+        created = updated = 0
+        newest = watermark
+        for page in self._genieacs_pages(company, query, GENIEACS_PROJECTION, sort={"_lastInform": 1}):
+            c, u = self._genieacs_upsert(page)
+            created += c
+            updated += u
+            newest = max([newest or ""] + [d.get("_lastInform") or "" for d in page]) or newest
+            if newest:
+                ICP.set_param(watermark_key, newest)
+
+        deleted = 0
+        if full:
+            keep = set()
+            for page in self._genieacs_pages(company, {"_tags": {"$exists": True}}, GENIEACS_ID_PROJECTION):
+                users = self._genieacs_users_by_login(t for doc in page for t in (doc.get("_tags") or []))
+                keep |= {(doc.get("_id"), users[t]) for doc in page for t in (doc.get("_tags") or []) if t in users}
+            stale = self.sudo().search([("user.company_id", "=", company.id)]).filtered(
+                lambda d: (d.device_id, d.user.id) not in keep)
+            deleted = len(stale)
+            stale.unlink()
+
+        _logger.info("GenieACS sync (%s) for %s: %s created, %s updated, %s deleted",
+                     "full" if full else "incremental", company.name, created, updated, deleted)
+        return created, updated, deleted
+
+    @api.model
+    def _cron_genieacs_sync(self, full=False):
+        for company in self.env["res.company"].sudo().search([("gasc_url", "!=", False)]):
+            try:
+                self._genieacs_sync_company(company, full=full)
+            except Exception as e:
+                _logger.error("GenieACS sync failed for %s: %s", company.name, str(e))
@@ -0,0 +1,240 @@
+import json
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from urllib.parse import quote
+
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+TASK_STATES = [
+    ("queued", "Queued"),
+    ("submitted", "Submitted"),
+    ("done", "Done"),
+    ("failed", "Failed"),
+]
+
+SUBMIT_BATCH = 2000     # queued tasks picked per cron run
+POLL_CHUNK = 200        # GenieACS ids per /tasks or /faults query
+
+
+def _submit_task(client, base_url, auth, device_id, payload):
+    """Runs in a worker thread (no env): posts one task, returns (status, body)."""
+    try:
+        resp = client.request(
+            "POST",
+            f"{base_url}/devices/{quote(device_id)}/tasks",
+            params={"connection_request": ""},
+            json=payload,
+            auth=auth,
+        )
+        return resp.status_code, resp.text
+    except Exception as e:
+        return None, str(e)
+
+
+class DeviceTask(models.Model):
+    _name = "device.task"
+    _description = "GenieACS Device Task"
+    _order = "id desc"
+
+    device_id = fields.Many2one("device", string="Device", required=True, index=True, ondelete="cascade")
+    company_id = fields.Many2one("res.company", string="Company", required=True, index=True)
+    name = fields.Char(string="Task", required=True, default="setParameterValues")
+    payload = fields.Text(string="Payload", required=True)
+    state = fields.Selection(TASK_STATES, string="State", default="queued", required=True, index=True)
+    genieacs_task_id = fields.Char(string="GenieACS Task ID", index=True)
+    message = fields.Text(string="Message")
+    submitted_at = fields.Datetime(string="Submitted At")
+    done_at = fields.Datetime(string="Done At")
+
+    # ------------------------------------------------------------
+    # Queue
+    # ------------------------------------------------------------
+    @api.model
+    def _enqueue(self, devices, payload):
+        """Queues the same task on every device (one create) and wakes the submit cron.
+
+        `payload` is a GenieACS task dict or a callable(device) -> dict for per-device values.
+        """
+        vals_list = []
+        for device in devices:
+            task = payload(device) if callable(payload) else payload
+            vals_list.append({
+                "device_id": device.id,
+                "company_id": (device.user.company_id or self.env.company).id,
+                "name": task.get("name", "setParameterValues"),
+                "payload": json.dumps(task),
+            })
+        tasks = self.sudo().create(vals_list)
+        tasks._update_devices()
+        cron = self.env.ref("bash_authentication.ir_cron_genieacs_task_submit", raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+        return tasks
+
+    def _update_devices(self):
+        """Mirrors the latest task of each device on the device (task_state / task_message).
+
+        Devices ending in the same state/message are written together.
+        """
+        latest = {}
+        for task in self.sorted("id"):
+            latest[task.device_id] = task
+        groups = defaultdict(lambda: self.env["device"])
+        for device, task in latest.items():
+            groups[(task.state, task.message or False)] |= device
+        now = fields.Datetime.now()
+        for (state, message), devices in groups.items():
+            devices.sudo().write({"task_state": state, "task_message": message, "task_date": now})
+
+    def _set_state(self, state, message=False, **vals):
+        self._set_states([(self, state, message, vals)])
+
+    def _set_states(self, outcomes):
+        """Applies [(tasks, state, message, extra vals)] with one write per distinct outcome."""
+        now = fields.Datetime.now()
+        groups = defaultdict(lambda: self.browse())
+        for tasks, state, message, vals in outcomes:
+            vals = dict(vals or {}, state=state, message=message)
+            if state in ("done", "failed"):
+                vals["done_at"] = now
+            groups[tuple(sorted(vals.items()))] |= tasks
+        changed = self.browse()
+        for vals, tasks in groups.items():
+            tasks.write(dict(vals))
+            changed |= tasks
+        changed._update_devices()
+
+    # ------------------------------------------------------------
+    # Submit (concurrent, through the shared HTTP client pool)
+    # ------------------------------------------------------------
+    def _submit(self):
+        workers = int(self.env["ir.config_parameter"].sudo().get_param(
+            "bash_authentication.genieacs_task_workers", 10))
+        for company in self.company_id:
+            tasks = self.filtered(lambda t: t.company_id == company)
+            client = company._genieacs_client()
+            auth = (company.gasc_username, company.gasc_password)
+            jobs = {t.id: (t.device_id.device_id, json.loads(t.payload)) for t in tasks}
+            results = {}
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as executor:
+                futures = {
+                    executor.submit(_submit_task, client, company.gasc_url, auth, device_id, payload): task_id
+                    for task_id, (device_id, payload) in jobs.items()
+                }
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+
+            now = fields.Datetime.now()
+            outcomes = []
+            for task in tasks:
+                status, body = results[task.id]
+                try:
+                    task_id = (json.loads(body) or {}).get("_id") if status in (200, 202) else None
+                except ValueError:
+                    task_id = None
+                if status == 200:
+                    outcomes.append((task, "done", False, {"genieacs_task_id": task_id, "submitted_at": now}))
+                elif status == 202:
+                    outcomes.append((task, "submitted", _("Waiting for the device to connect"),
+                                     {"genieacs_task_id": task_id, "submitted_at": now}))
+                else:
+                    outcomes.append((task, "failed",
+                                     "HTTP %s: %s" % (status, (body or "")[:500]) if status else body, {}))
+            self._set_states(outcomes)
+            _logger.info("📤 GenieACS tasks for %s: %s submitted", company.name, len(tasks))
+
+    @api.model
+    def _cron_submit(self):
+        tasks = self.sudo().search([("state", "=", "queued")], order="id", limit=SUBMIT_BATCH)
+        while tasks:
+            tasks._submit()
+            self.env.cr.commit()
+            tasks = self.sudo().search([("state", "=", "queued")], order="id", limit=SUBMIT_BATCH)
+
+    # ------------------------------------------------------------
+    # Poll (batched: one /tasks and one /faults query per chunk)
+    # ------------------------------------------------------------
+    def _poll(self):
+        expiry = timedelta(hours=int(self.env["ir.config_parameter"].sudo().get_param(
+            "bash_authentication.genieacs_task_expiry_hours", 24)))
+        now = fields.Datetime.now()
+
+        # Submitted without a task id back: nothing to poll, so they only expire
+        no_id = self.filtered(lambda t: not t.genieacs_task_id)
+        expired = no_id.filtered(lambda t: not t.submitted_at or t.submitted_at < now - expiry)
+        if expired:
+            expired._set_state("failed", _("Expired: GenieACS returned no task id to track"))
+
+        for company in self.company_id:
+            tasks = self.filtered(lambda t: t.company_id == company and t.genieacs_task_id)
+            for i in range(0, len(tasks), POLL_CHUNK):
+                chunk = tasks[i:i + POLL_CHUNK]
+                device_ids = list(set(chunk.device_id.mapped("device_id")))
+                pending = company.genieacs_request("GET", "/tasks/", params={
+                    "query": json.dumps({"device": {"$in": device_ids}}),
+                    "projection": "_id",
+                }) or []
+                pending_ids = {t.get("_id") for t in pending}
+                fault_ids = ["%s:task_%s" % (t.device_id.device_id, t.genieacs_task_id) for t in chunk]
+                faults = company.genieacs_request("GET", "/faults/", params={
+                    "query": json.dumps({"_id": {"$in": fault_ids}}),
+                }) or []
+                faults = {f.get("_id"): f for f in faults}
+
+                outcomes = []
+                drops = []      # (task, fault id) to delete on GenieACS once the states are saved
+                for task in chunk:
+                    fault = faults.get("%s:task_%s" % (task.device_id.device_id, task.genieacs_task_id))
+                    if fault:
+                        outcomes.append((task, "failed", "%s: %s" % (fault.get("code"), fault.get("message")), {}))
+                        drops.append((task, fault.get("_id")))
+                    elif task.genieacs_task_id not in pending_ids:
+                        outcomes.append((task, "done", False, {}))
+                    elif task.submitted_at and task.submitted_at < now - expiry:
+                        outcomes.append((task, "failed", _("Expired: the device did not connect"), {}))
+                        drops.append((task, None))
+
+                self._set_states(outcomes)
+                for task, fault_id in drops:
+                    task._drop_on_genieacs(fault_id)
+
+    def _drop_on_genieacs(self, fault_id=None):
+        """Deletes the task (and its fault) on GenieACS so it is not retried on the next inform."""
+        self.ensure_one()
+        try:
+            self.company_id.genieacs_response("DELETE", "/tasks/%s" % self.genieacs_task_id)
+            if fault_id:
+                self.company_id.genieacs_response("DELETE", "/faults/%s" % quote(fault_id, safe=""))
+        except Exception as e:
+            _logger.warning("GenieACS task %s could not be deleted: %s", self.genieacs_task_id, str(e))
+
+    @api.model
+    def _cron_poll(self):
+        tasks = self.sudo().search([("state", "=", "submitted")], order="id")
+        try:
+            tasks._poll()
+        except Exception as e:
+            _logger.error("GenieACS task poll failed: %s", str(e))
+
+    # ------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------
+    def _to_api(self):
+        return [{
+            "task_id": t.id,
+            "device_id": t.device_id.device_id,
+            "state": t.state,
+            "message": t.message or "",
+        } for t in self]
+
+    def action_retry(self):
+        failed = self.filtered(lambda t: t.state == "failed")
+        if not failed:
+            raise UserError(_("Only failed tasks can be retried."))
+        failed._set_state("queued", genieacs_task_id=False, submitted_at=False, done_at=False)
+        self.env.ref("bash_authentication.ir_cron_genieacs_task_submit").sudo()._trigger()
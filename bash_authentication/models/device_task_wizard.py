@@ -0,0 +1,74 @@
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+
+from .device import DNS_PROFILES
+
+
+class DeviceTaskWizard(models.TransientModel):
+    _name = "device.task.wizard"
+    _description = "Queue GenieACS Task on Devices"
+
+    device_ids = fields.Many2many("device", string="Devices", required=True)
+    device_count = fields.Integer(compute="_compute_device_count")
+    operation = fields.Selection([
+        ("dns", "Change DNS"),
+        ("wifi_status", "Enable / Disable Wi-Fi"),
+        ("parameter", "Set Parameter"),
+    ], string="Operation", required=True, default="dns")
+
+    dns_profile = fields.Selection([
+        ("on", "Filtered DNS"),
+        ("off", "Standard DNS"),
+        ("custom", "Custom"),
+    ], string="DNS", default="off")
+    dns1 = fields.Char(string="DNS 1")
+    dns2 = fields.Char(string="DNS 2")
+
+    internet_mode = fields.Selection([("2.4", "2.4G"), ("5", "5G")], string="Band", default="2.4")
+    wifi_enable = fields.Boolean(string="Enabled", default=True)
+
+    parameter = fields.Char(string="Parameter", help="Full TR-069 path, e.g. InternetGatewayDevice.ManagementServer.PeriodicInformInterval")
+    value = fields.Char(string="Value")
+    value_type = fields.Selection([
+        ("xsd:string", "String"),
+        ("xsd:boolean", "Boolean"),
+        ("xsd:unsignedInt", "Unsigned Int"),
+        ("xsd:int", "Int"),
+    ], string="Type", default="xsd:string")
+
+    @api.depends("device_ids")
+    def _compute_device_count(self):
+        for wizard in self:
+            wizard.device_count = len(wizard.device_ids)
+
+    def _task_payload(self, device):
+        if self.operation == "dns":
+            dns1, dns2 = DNS_PROFILES.get(self.dns_profile) or (self.dns1, self.dns2)
+            values = device._dns_parameter_values(dns1, dns2)
+        elif self.operation == "wifi_status":
+            index = device._wlan_index(self.internet_mode)
+            values = [["InternetGatewayDevice.LANDevice.1.WLANConfiguration.%s.Enable" % index,
+                       self.wifi_enable, "xsd:boolean"]]
+        else:
+            values = [[self.parameter.strip(), self.value or "", self.value_type]]
+        return {"name": "setParameterValues", "parameterValues": values}
+
+    def action_queue(self):
+        self.ensure_one()
+        if self.operation == "dns" and self.dns_profile == "custom" and not (self.dns1 and self.dns2):
+            raise UserError(_("Enter both DNS servers."))
+        if self.operation == "parameter" and not (self.parameter or "").strip():
+            raise UserError(_("Enter the parameter path."))
+
+        tasks = self.env["device.task"]._enqueue(self.device_ids, self._task_payload)
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("GenieACS"),
+                "message": _("%s tasks queued; they are submitted in the background.") % len(tasks),
+                "type": "success",
+                "sticky": False,
+                "next": {"type": "ir.actions.act_window_close"},
+            },
+        }
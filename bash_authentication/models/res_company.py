@@ -1,8 +1,9 @@
-import json
-import requests
 import logging
+
+import requests
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError
+from odoo.addons.ab_radius_connector.models.http_client import get_client
 
 _logger = logging.getLogger(__name__)  # Set up logging for this model
 
@@ -18,12 +19,38 @@ class ResCompanyExtension(models.Model):
     ss_csrf_token = fields.Text(string='CSRF Token')
     ss_session_cookie = fields.Text(string='Session Token')
     ss_database_id = fields.Text(string='Database ID', default=2)
-    session = requests.Session()
     
     gasc_username = fields.Char(string='GenieACS username', required=True, default='apiuser')
     gasc_password = fields.Char(string='GenieACS password', required=True, default='G3n1@sc.2025!!')
     gasc_url = fields.Char(string='GenieACS URL', required=True, default='https://tr069.abissnet.al')
 
+    def _genieacs_client(self):
+        self.ensure_one()
+        return get_client('genieacs', self.gasc_url, timeout=(5, 30))
+
+    def _superset_client(self):
+        self.ensure_one()
+        return get_client('superset', self.ss_base_url, timeout=(5, 120))
+
+    def genieacs_response(self, method, path, params=None, json=None, timeout=None, idempotent=None):
+        """Sends a GenieACS NBI request through the shared client; returns the raw response."""
+        self.ensure_one()
+        return self._genieacs_client().request(
+            method,
+            f"{self.gasc_url}{path}",
+            params=params,
+            json=json,
+            auth=(self.gasc_username, self.gasc_password),
+            timeout=timeout,
+            idempotent=idempotent,
+        )
+
+    def genieacs_request(self, method, path, params=None, json=None, timeout=None):
+        """Calls the GenieACS NBI (e.g. GET /devices) with the company credentials."""
+        response = self.genieacs_response(method, path, params=params, json=json, timeout=timeout)
+        response.raise_for_status()
+        return response.json() if response.text.strip() else None
+
     def login_to_superset(self):
         """Logs in to the Superset API and retrieves authentication tokens."""
         try:
@@ -40,7 +67,8 @@ class ResCompanyExtension(models.Model):
             headers = {'Content-Type': 'application/json'}
 
             # Send login request
-            response = self.session.post(login_url, json=payload, headers=headers)
+            client = self._superset_client()
+            response = client.request("POST", login_url, json=payload, headers=headers, idempotent=True)
             _logger.info(response.json())
             response.raise_for_status()
 
@@ -58,7 +86,7 @@ class ResCompanyExtension(models.Model):
                 "Authorization": f"Bearer {self.ss_access_token}",
                 "Content-Type": "application/json"
             }
-            csrf_response = self.session.get(csrf_url, headers=csrf_headers)
+            csrf_response = client.request("GET", csrf_url, headers=csrf_headers, cookies=response.cookies)
             csrf_response.raise_for_status()
             csrf_data = csrf_response.json()
 
@@ -68,8 +96,8 @@ class ResCompanyExtension(models.Model):
 
             # Store CSRF token and session cookie
             self.ss_csrf_token = csrf_data['result']
-            cookies = self.session.cookies.get_dict()
-            self.ss_session_cookie = cookies.get("session", "")
+            # The shared client keeps no cookies, take the session from the responses
+            self.ss_session_cookie = csrf_response.cookies.get("session") or response.cookies.get("session", "")
 
             _logger.info("Successfully logged into Superset. Session Cookie: %s", self.ss_session_cookie)
             return self.get_request_headers()
@@ -78,99 +106,17 @@ class ResCompanyExtension(models.Model):
             _logger.error("Error during Superset login: %s", str(e))
             raise UserError(_("Error during Superset login: %s") % str(e))
 
-    def execute_superset_query(self, username, last_superset_call,imported_ids):
+    def execute_superset_query(self, username, last_superset_call, imported_ids):
         """
-        Executes a SQL query on Superset's API and returns the result.
-        If authentication fails, it attempts to refresh the session.
+        Returns the legacy tickets of `username` not yet imported, in the Superset response
+        shape ({"status": "success", "data": [...]}) expected by ticket.helpdesk.create_new_ticket.
+        Runs through the mobile API data layer (Superset or direct DB, see api_query).
         """
-        try:
-            _logger.info("Executing query for username: %s", username)
-
-            # API endpoint for executing SQL queries
-            api_url = f"{self.ss_base_url}/api/v1/sqllab/execute/"
-            headers = self.get_request_headers()
-
-            sql = f"""
-                        SELECT t.id as imported_id,
-                               t.operatorid as user_id,
-                               t.acctid as customer_id,
-                               u.username as ab_username,
-                               u.fullname as customer_name,
-                               u.email as email,
-                               u.mobile as phone,
-                               case when  t.status=1 then 5 else 1 end as stage_id,
-                               case when  t.status=1 then 'Closed' else 'Inbox' end as stage_name,
-                               t.start_date as create_date,
-                               t.subject as subject,
-                               t.description as description,
-                               t.closed_solution,
-                               t.close_date as end_date ,
-                               t.update_date as last_update_date,
-                               t.closedBy as assigned_user_id,
-                               t.priority as priority
-                        FROM troubleticket t
-                        INNER JOIN users u ON t.acctid=u.acctid
-                        WHERE u.username = '{username}'
-                    """
-
-            # sql = f"""
-            #     SELECT * FROM troubleticket t INNER JOIN users u ON t.acctid=u.acctid WHERE u.username = 'abissnet'
-            # """
-            if imported_ids:
-                imported_ids_tuple = tuple(imported_ids) if len(imported_ids) > 1 else f"({imported_ids[0]})"
-                sql += f" AND t.id NOT IN {imported_ids_tuple}"
-
-            sql += " limit 10 "
-
-            payload = {
-                "database_id": 2,  # Replace with actual database ID
-                "sql": sql,
-                "schema": "radius"
-            }
-
-            _logger.info("Sending SQL query to Superset API.")
-            response = self.session.post(api_url, headers=headers, json=payload)
-
-            _logger.info(sql)
-            _logger.info(response.json())
-
-            # Handle Unauthorized (401) - Re-authenticate and retry
-            if response.status_code == 401:
-                _logger.warning("401 Unauthorized. Refreshing session and retrying...")
-                self.login_to_superset()
-                headers = self.get_request_headers()
-                response = self.session.post(api_url, headers=headers, json=payload)
-
-            # Handle Bad Request (400) - Re-authenticate and retry
-            if response.status_code == 400:
-                _logger.error("400 Bad Request. Response: %s", response.text)
-                self.login_to_superset()
-                headers = self.get_request_headers()
-                response = self.session.post(api_url, headers=headers, json=payload)
-
-            # Raise for other HTTP errors
-            response.raise_for_status()
-
-            # Validate JSON response
-            if response.text.strip():
-                try:
-                    return response.json()
-                except json.JSONDecodeError:
-                    _logger.error("Invalid JSON response: %s", response.text)
-                    raise UserError(_("Superset API returned an invalid JSON response."))
-
-            _logger.error("Empty response received from Superset API.")
-            raise UserError(_("Empty response received from Superset API."))
-
-        except requests.exceptions.RequestException as e:
-            _logger.error("Error during Superset API request: %s", str(e))
-            raise UserError(_("Error connecting to Superset API: %s") % str(e))
-
-        except Exception as e:
-            _logger.error("Unexpected error: %s", str(e))
-            raise UserError(_("Unexpected error: %s") % str(e))
+        _logger.info("Fetching legacy tickets for username: %s", username)
+        rows = self.api_query("tickets", login=username, exclude_ids=imported_ids)
+        return {"status": "success", "data": rows}
 
-    def run_query(self, database_id, query, schema=None, query_limit=None):
+    def run_query(self, database_id, query, schema=None, query_limit=None, timeout=None):
         """Execute an SQL query."""
         try:
 
@@ -185,20 +131,20 @@ class ResCompanyExtension(models.Model):
             if query_limit:
                 payload["queryLimit"] = query_limit
 
-            response = self.session.post(api_url, headers=headers, json=payload)
+            response = self._superset_client().request("POST", api_url, headers=headers, json=payload, timeout=timeout)
 
             if response.status_code == 401:
                 _logger.warning("401 Unauthorized. Refreshing session and retrying...")
                 self.login_to_superset()
                 headers = self.get_request_headers()
-                response = self.session.post(api_url, headers=headers, json=payload)
+                response = self._superset_client().request("POST", api_url, headers=headers, json=payload, timeout=timeout)
 
             # Handle Bad Request (400) - Re-authenticate and retry
             if response.status_code == 400:
                 _logger.error("400 Bad Request. Response: %s", response.text)
                 self.login_to_superset()
                 headers = self.get_request_headers()
-                response = self.session.post(api_url, headers=headers, json=payload)
+                response = self._superset_client().request("POST", api_url, headers=headers, json=payload, timeout=timeout)
 
             response.raise_for_status()
             result = response.json()
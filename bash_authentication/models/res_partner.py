@@ -1,4 +1,4 @@
-from odoo import fields, models
+from odoo import api, fields, models
 
 
 class ResPartnerBash(models.Model):
@@ -18,3 +18,36 @@ class ResPartnerBash(models.Model):
         copy=False,
         readonly=True
     )
+
+    x_ticket_backfill_pending = fields.Boolean(
+        string='Legacy Tickets Pending',
+        help='Legacy tickets of this customer still have to be imported '
+             '(set when the Ab Username is assigned, cleared by the import cron)',
+        index=True,
+        copy=False,
+        readonly=True
+    )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if vals.get('x_ab_username'):
+                vals['x_ticket_backfill_pending'] = True
+        partners = super().create(vals_list)
+        if any(vals.get('x_ab_username') for vals in vals_list):
+            self._trigger_ticket_backfill()
+        return partners
+
+    def write(self, vals):
+        if vals.get('x_ab_username'):
+            vals = dict(vals, x_ticket_backfill_pending=True)
+        res = super().write(vals)
+        if vals.get('x_ab_username'):
+            self._trigger_ticket_backfill()
+        return res
+
+    def _trigger_ticket_backfill(self):
+        """Legacy tickets skipped while the customer had no username are imported by the cron."""
+        cron = self.env.ref('bash_authentication.ir_cron_import_legacy_tickets', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
@@ -11,6 +11,16 @@ class ResUsers(models.Model):
     email = fields.Char(string='Email', help='Your email address')
     phone = fields.Char(string='Phone', help='Your phone number')
     last_superset_call = fields.Date(string='Last Superset Call')
+    api_cache_version = fields.Integer(string='API Cache Version', default=0, readonly=True,
+                                       help='Bumped to invalidate the cached mobile API results of the user.')
+
+    def api_cache_invalidate(self):
+        """Drops the cached mobile API results (payments, packages, usage...) of these users."""
+        if self:
+            self.env.cr.execute(
+                "UPDATE res_users SET api_cache_version = COALESCE(api_cache_version, 0) + 1 WHERE id IN %s",
+                (tuple(self.ids),))
+            self.invalidate_recordset(['api_cache_version'])
 
     def call_superset_query(self):
         """
@@ -18,10 +18,87 @@ def convert_datetime(iso_date):
     return None
 
 
+# Tickets per batch of the background legacy import
+IMPORT_BATCH = 1000
+BACKFILL_BATCH = 200        # customers backfilled per cron run
+
+
 class HelpdeskTicketCreator(models.Model):
     _inherit = 'ticket.helpdesk'
 
-    imported_id = fields.Integer(string='Imported ID', readonly=True)
+    imported_id = fields.Integer(string='Imported ID', readonly=True, index=True)
+    # Indexed for the mobile change token / delta sync (per-customer lookups)
+    customer_id = fields.Many2one(index=True)
+
+    _sql_constraints = [
+        ('imported_id_unique', 'unique(imported_id)', 'A legacy ticket can only be imported once.'),
+    ]
+
+    def unlink(self):
+        # Tombstones so the app's `since` delta sync learns about removed tickets
+        self.env["mobile.api.deletion"]._record(
+            "ticket", [(user.id, ticket.id) for ticket in self for user in ticket.customer_id.user_ids])
+        return super().unlink()
+
+    @api.model
+    def _legacy_ticket_vals(self, item, customer):
+        """Maps a legacy troubleticket row to ticket.helpdesk values."""
+        return {
+            "imported_id": item.get("imported_id"),
+            "subject": item.get("subject") or "No Subject",
+            "x_closed_solution": item.get("closed_solution", ""),
+            "customer_name": item.get("customer_name", ""),
+            "email": item.get("email", ""),
+            "x_acctid": item.get("customer_id", ""),
+            "end_date": convert_datetime(item.get("end_date")),
+            "phone": item.get("phone", ""),
+            "create_date": convert_datetime(item.get("create_date")),
+            "start_date": convert_datetime(item.get("create_date")),
+            "last_update_date": convert_datetime(item.get("last_update_date")),
+            "stage_id": item.get("stage_id"),
+            "description": item.get("description") or "No Description",
+            "priority": str(item.get("priority", "2")),  # Default to medium priority
+            "customer_id": customer.id,
+            "category_id": None,  # Set category if needed
+        }
+
+    @api.model
+    def _import_legacy_rows(self, rows, customers):
+        """Bulk create/update of legacy rows; `customers` maps row -> res.partner.
+
+        Dedup by imported_id (one search per batch); existing tickets are only rewritten
+        when the legacy stage, solution or end date changed.
+        """
+        Ticket = self.sudo().with_context(
+            _skip_team_validation=True, tracking_disable=True, mail_create_nolog=True, mail_notrack=True)
+        ids = [r.get("imported_id") for r in rows if r.get("imported_id")]
+        existing = {t.imported_id: t for t in Ticket.search([("imported_id", "in", ids)])}
+
+        to_create, updated, seen = [], 0, set()
+        for item in rows:
+            imported_id = item.get("imported_id")
+            customer = customers(item)
+            if not imported_id or not customer or imported_id in seen:
+                continue
+            seen.add(imported_id)
+            vals = self._legacy_ticket_vals(item, customer)
+            ticket = existing.get(imported_id)
+            if not ticket:
+                to_create.append(vals)
+                continue
+            changes = {}
+            if vals["stage_id"] and ticket.stage_id.id != vals["stage_id"]:
+                changes["stage_id"] = vals["stage_id"]
+            for key in ("end_date", "last_update_date"):
+                if vals[key] and fields.Datetime.to_string(ticket[key]) != vals[key]:
+                    changes[key] = vals[key]
+            if (ticket.x_closed_solution or "") != (vals["x_closed_solution"] or ""):
+                changes["x_closed_solution"] = vals["x_closed_solution"]
+            if changes:
+                ticket.write(changes)
+                updated += 1
+        created = Ticket.create(to_create) if to_create else Ticket
+        return created, updated
 
     def create_new_ticket(self, response_data, customer):
         if response_data.get("status") != "success":
@@ -33,33 +110,90 @@ class HelpdeskTicketCreator(models.Model):
             _logger.warning("No data returned from Superset query.")
             return []
 
-        # 🔹 Process the data and store it in Odoo
+        created, _updated = self._import_legacy_rows(query_results, lambda item: customer)
+        return created.ids  # Return the list of created ticket IDs
 
-        tickets_created = []
-        for item in query_results:
-            ex_ticket = self.search([("imported_id", "=", item.get("imported_id"))], limit=1)
-            if ex_ticket:
-                continue
+    # ------------------------------------------------------------
+    # Background incremental import (all customers)
+    # ------------------------------------------------------------
+    @api.model
+    def _legacy_customers(self, rows):
+        """Returns item -> res.partner, matched on the legacy username, then on the account id."""
+        Partner = self.env["res.partner"].sudo().with_context(active_test=False)
+        usernames = list({r.get("ab_username") for r in rows if r.get("ab_username")})
+        acctids = list({int(r.get("customer_id")) for r in rows if r.get("customer_id")})
+        by_username = {p.x_ab_username: p for p in Partner.search([("x_ab_username", "in", usernames)])}
+        by_acctid = {p.x_acctid: p for p in Partner.search([("x_acctid", "in", acctids)])} if acctids else {}
+
+        def customer(item):
+            return by_username.get(item.get("ab_username")) or by_acctid.get(int(item.get("customer_id") or 0))
+        return customer
+
+    @api.model
+    def _import_legacy_tickets(self, company):
+        """Imports troubleticket rows changed since the watermark (update_date, id), in batches."""
+        ICP = self.env["ir.config_parameter"].sudo()
+        key = "bash_authentication.ticket_import_watermark.%s" % company.id
+        since_date, since_id = (ICP.get_param(key) or "1970-01-01 00:00:00|0").rsplit("|", 1)
+
+        created = updated = 0
+        while True:
+            rows = company.api_query("tickets_since", since_date=since_date, since_id=int(since_id),
+                                     limit=IMPORT_BATCH)
+            if not rows:
+                break
+            c, u = self._import_legacy_rows(rows, self._legacy_customers(rows))
+            created += len(c)
+            updated += u
+
+            last = rows[-1]
+            since_date = (last.get("watermark_date") or since_date).replace("T", " ")
+            since_id = last.get("imported_id")
+            ICP.set_param(key, "%s|%s" % (since_date, since_id))
+            self.env.cr.commit()
+            if len(rows) < IMPORT_BATCH:
+                break
 
-            ticket_vals = {
-                "imported_id": item.get("imported_id"),
-                "subject": item.get("subject", "No Subject"),
-                "x_closed_solution": item.get("closed_solution", ""),
-                "customer_name": item.get("customer_name", ""),
-                "email": item.get("email", ""),
-                "x_acctid": item.get("customer_id", ""),
-                "end_date": convert_datetime(item.get("end_date")),
-                "phone": item.get("phone", ""),
-                "create_date": convert_datetime(item.get("create_date")),
-                "start_date": convert_datetime(item.get("create_date")),
-                "stage_id": item.get("stage_id"),
-                "description": item.get("description", "No Description"),
-                "priority": str(item.get("priority", "2")),  # Default to medium priority
-                "customer_id": customer.id,
-                "category_id": None,  # Set category if needed
-            }
-            ticket = self.create(ticket_vals)
-            tickets_created.append(ticket.id)
-            _logger.info(f"Created Helpdesk Ticket ID: {ticket.id} - {ticket.name}")
-
-        return tickets_created  # Return the list of created ticket IDs
+        _logger.info("🎫 Legacy tickets for %s: %s imported, %s updated (watermark %s|%s)",
+                     company.name, created, updated, since_date, since_id)
+        return created, updated
+
+    @api.model
+    def _import_legacy_tickets_for(self, partner, company):
+        """Backfill for a customer whose tickets the watermark passed before they had a username.
+
+        Runs for every partner flagged x_ticket_backfill_pending (set whenever x_ab_username
+        is assigned); clears the flag once done.
+        """
+        created = self.browse()
+        if partner.x_ab_username:
+            rows = company.api_query("tickets", login=partner.x_ab_username, limit=IMPORT_BATCH)
+            created, _updated = self._import_legacy_rows(rows, lambda item: partner)
+        partner.sudo().write({"x_ticket_backfill_pending": False})
+        return created
+
+    @api.model
+    def _backfill_pending_customers(self, company):
+        partners = self.env["res.partner"].sudo().with_context(active_test=False).search([
+            ("x_ticket_backfill_pending", "=", True),
+            ("company_id", "in", [company.id, False]),
+        ], limit=BACKFILL_BATCH)
+        for partner in partners:
+            try:
+                self._import_legacy_tickets_for(partner, company)
+                self.env.cr.commit()
+            except Exception as e:
+                self.env.cr.rollback()
+                _logger.error("Legacy ticket backfill failed for %s: %s", partner.x_ab_username, str(e))
+
+    @api.model
+    def _cron_import_legacy_tickets(self):
+        for company in self.env["res.company"].sudo().search([]):
+            if company.api_data_backend == "direct" and not company.api_billing_connector_id:
+                continue
+            try:
+                self._import_legacy_tickets(company)
+            except Exception as e:
+                self.env.cr.rollback()
+                _logger.error("Legacy ticket import failed for %s: %s", company.name, str(e))
+            self._backfill_pending_customers(company)
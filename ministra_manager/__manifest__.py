@@ -26,6 +26,7 @@
 
         # Wizards
         "wizards/ministra_provision_wizard_views.xml",
+        "wizards/ministra_event_wizard_views.xml",
 
         # Menu (must be LAST - references actions from views)
         "views/menu.xml",
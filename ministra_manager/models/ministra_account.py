@@ -1,11 +1,96 @@
 # -*- coding: utf-8 -*-
 import logging
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
+from odoo.addons.ab_ministra_connector.models.res_company_ministra import ministra_call
 
 _logger = logging.getLogger(__name__)
 
+# Fields Odoo owns (pushed to Ministra) and fields Ministra owns (pulled into Odoo)
+PUSH_FIELDS = ('status', 'full_name', 'phone', 'account_number', 'stb_mac', 'tariff_plan', 'comment')
+PULL_FIELDS = ('online', 'stb_sn', 'stb_type', 'ip', 'version', 'last_active')
+
+STB_EVENTS = [
+    ('reboot', 'Reboot'),
+    ('reload_portal', 'Reload Portal'),
+    ('update_channels', 'Update Channels'),
+    ('send_msg', 'Send Message'),
+]
+# Events that act on the STB; a partially delivered batch must not be repeated
+NON_IDEMPOTENT_EVENTS = ('reboot', 'send_msg')
+EVENT_RETRIES = 2       # extra attempts per batch before falling back to one call per login
+EVENT_BACKOFF = 1.0     # seconds, doubled on every retry
+
+
+def _ministra_job(endpoint, method, resource, identifiers, data):
+    """Runs in a worker thread (no env): one Ministra call, returns an error message or None."""
+    base, auth, timeout = endpoint
+    try:
+        ministra_call(base, auth, method, resource, identifiers=identifiers, data=data, timeout=timeout)
+        return None
+    except Exception as e:
+        return str(e)
+
+
+class _RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across the worker threads (rate <= 0: unlimited)."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next)
+            self._next = at + self.interval
+        if at > now:
+            time.sleep(at - now)
+
+
+def _event_job(endpoint, limiter, logins, data):
+    """Runs in a worker thread (no env): one send_event call for a batch of logins.
+
+    Returns {login: error or None}. A batch still failing after EVENT_RETRIES is sent
+    again one login at a time, so one bad login does not fail the whole batch.
+    Non-idempotent events (reboot, send_msg) are never retried: Ministra may have
+    delivered them to the valid logins before failing, so a failed batch goes
+    straight to the per-login calls and each login is tried once.
+    """
+    retries = 0 if data.get('event') in NON_IDEMPOTENT_EVENTS else EVENT_RETRIES
+    error = None
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(EVENT_BACKOFF * 2 ** (attempt - 1))
+        limiter.wait()
+        error = _ministra_job(endpoint, 'POST', 'send_event', logins, data)
+        if not error:
+            return dict.fromkeys(logins)
+    if len(logins) == 1:
+        return {logins[0]: error}
+    results = {}
+    for login in logins:
+        limiter.wait()
+        results[login] = _ministra_job(endpoint, 'POST', 'send_event', [login], data)
+    return results
+
+
+def _norm(field, value):
+    """Comparable form of a Ministra / Odoo value ('' == None == False, MACs case-insensitive)."""
+    value = '' if value is None or value is False else str(value).strip()
+    if field == 'stb_mac':
+        value = value.upper().replace('-', ':')
+    if field == 'last_active' and value.startswith('0000-00-00'):
+        value = ''
+    return value
+
 
 class MinstraAccount(models.Model):
     """Ministra IPTV Account"""
@@ -127,6 +212,21 @@ class MinstraAccount(models.Model):
     )
     comment = fields.Text(string='Comment')
 
+    # ==================== STB EVENTS ====================
+
+    last_event = fields.Selection(STB_EVENTS, string='Last STB Event', readonly=True)
+    last_event_state = fields.Selection(
+        [
+            ('sent', 'Sent'),
+            ('failed', 'Failed'),
+        ],
+        string='Last Event Delivery',
+        readonly=True,
+        index=True
+    )
+    last_event_date = fields.Datetime(string='Last Event Date', readonly=True)
+    last_event_error = fields.Text(string='Last Event Error', readonly=True)
+
     # ==================== COMPUTED FIELDS ====================
 
     @api.depends('login', 'full_name')
@@ -192,17 +292,9 @@ class MinstraAccount(models.Model):
 
     # ==================== API SYNC METHODS ====================
 
-    def action_sync_to_ministra(self):
-        """Push account to Ministra (create or update)"""
+    def _ministra_push_data(self):
+        """Form data for POST accounts / PUT users (only the fields that are set)."""
         self.ensure_one()
-
-        # Validate required fields
-        if not self.login:
-            raise UserError(_('Login is required to sync with Ministra'))
-
-        company = self.company_id
-
-        # Prepare API data
         data = {
             'login': self.login,
             'status': self.status,
@@ -222,6 +314,54 @@ class MinstraAccount(models.Model):
             data['tariff_plan'] = self.tariff_plan.external_id
         if self.comment:
             data['comment'] = self.comment
+        return data
+
+    @api.model
+    def _ministra_tariff_map(self, company):
+        """{external_id: tariff id} for the company (one search instead of one per account)."""
+        tariffs = self.env['ministra.tariff'].with_context(active_test=False).search_read(
+            [('company_id', '=', company.id)], ['external_id'])
+        return {t['external_id']: t['id'] for t in tariffs}
+
+    @api.model
+    def _ministra_pull_vals(self, account_data, tariffs, fields_=None):
+        """Map a Ministra account dict to Odoo values (optionally restricted to `fields_`)."""
+        vals = {}
+        for key in ('full_name', 'phone', 'account_number', 'stb_mac', 'stb_sn', 'stb_type', 'ip', 'version'):
+            if key in account_data:
+                vals[key] = account_data[key]
+        for key in ('status', 'online'):
+            if key in account_data and account_data[key] is not None:
+                vals[key] = str(account_data[key])
+        if 'last_active' in account_data:
+            # Ministra may return '0000-00-00 00:00:00' for empty datetime
+            # Only set if it's a valid datetime value
+            last_active = account_data['last_active']
+            if last_active and last_active != '0000-00-00 00:00:00':
+                vals['last_active'] = last_active
+            else:
+                vals['last_active'] = False
+
+        # Update tariff if external_id matches
+        if account_data.get('tariff_plan') and tariffs.get(account_data['tariff_plan']):
+            vals['tariff_plan'] = tariffs[account_data['tariff_plan']]
+
+        if fields_ is not None:
+            vals = {k: v for k, v in vals.items() if k in fields_}
+        return vals
+
+    def action_sync_to_ministra(self):
+        """Push account to Ministra (create or update)"""
+        self.ensure_one()
+
+        # Validate required fields
+        if not self.login:
+            raise UserError(_('Login is required to sync with Ministra'))
+
+        company = self.company_id
+
+        # Prepare API data
+        data = self._ministra_push_data()
 
         try:
             if self.ministra_synced:
@@ -287,47 +427,8 @@ class MinstraAccount(models.Model):
                 raise UserError(_('No data returned from Ministra for login: %s') % self.login)
 
             # USERS resource returns a single object (not a list)
-
-            # Map Ministra fields to Odoo
-            vals = {}
-
-            if 'full_name' in account_data:
-                vals['full_name'] = account_data['full_name']
-            if 'phone' in account_data:
-                vals['phone'] = account_data['phone']
-            if 'account_number' in account_data:
-                vals['account_number'] = account_data['account_number']
-            if 'status' in account_data:
-                vals['status'] = str(account_data['status'])
-            if 'online' in account_data:
-                vals['online'] = str(account_data['online'])
-            if 'stb_mac' in account_data:
-                vals['stb_mac'] = account_data['stb_mac']
-            if 'stb_sn' in account_data:
-                vals['stb_sn'] = account_data['stb_sn']
-            if 'stb_type' in account_data:
-                vals['stb_type'] = account_data['stb_type']
-            if 'ip' in account_data:
-                vals['ip'] = account_data['ip']
-            if 'version' in account_data:
-                vals['version'] = account_data['version']
-            if 'last_active' in account_data:
-                # Ministra may return '0000-00-00 00:00:00' for empty datetime
-                # Only set if it's a valid datetime value
-                last_active = account_data['last_active']
-                if last_active and last_active != '0000-00-00 00:00:00':
-                    vals['last_active'] = last_active
-                else:
-                    vals['last_active'] = False
-
-            # Update tariff if external_id matches
-            if 'tariff_plan' in account_data and account_data['tariff_plan']:
-                tariff = self.env['ministra.tariff'].search([
-                    ('company_id', '=', company.id),
-                    ('external_id', '=', account_data['tariff_plan'])
-                ], limit=1)
-                if tariff:
-                    vals['tariff_plan'] = tariff.id
+            tariffs = self._ministra_tariff_map(company)
+            vals = self._ministra_pull_vals(account_data, tariffs)
 
             # Update record
             self.write(vals)
@@ -394,64 +495,229 @@ class MinstraAccount(models.Model):
             _logger.error("❌ Failed to delete account %s: %s", self.login, str(e))
             raise
 
-    # ==================== EVENT SENDING METHODS ====================
-
-    def action_send_reboot(self):
-        """Send reboot event to STB"""
-        self.ensure_one()
-
-        company = self.company_id
-
-        try:
-            company.ministra_api_call('POST', 'send_event', self.login, data={'event': 'reboot'})
-
-            _logger.info("🔄 Sent reboot event to: %s", self.login)
-
-            self.message_post(
-                body=_('🔄 Reboot command sent to STB'),
-                subtype_xmlid='mail.mt_note'
-            )
+    # ==================== BULK RECONCILIATION ====================
+
+    def _reconcile_with_ministra(self, company):
+        """Reconcile these accounts of `company` against one listing of Ministra accounts.
+
+        - missing upstream: created (POST accounts)
+        - Odoo-owned fields differ (PUSH_FIELDS): only the differing fields are sent (PUT users)
+        - Ministra-owned fields differ (PULL_FIELDS): written locally in bulk
+        Calls run concurrently (ICP `ministra_manager.reconcile_workers`, default 8) on the
+        pooled Ministra client; sync status is written with one write per outcome.
+        Returns a dict of counters.
+        """
+        remote = {}
+        for item in company.ministra_api_call('GET', 'accounts') or []:
+            login = self._sanitize_login(item.get('login'))
+            if login:
+                remote[login] = item
+        tariffs = self._ministra_tariff_map(company)
+
+        jobs = {}       # account id -> (method, resource, identifiers, data)
+        pulls = {}      # frozen vals -> account ids
+        for account in self:
+            data = account._ministra_push_data()
+            upstream = remote.pop(account.login, None)
+            if upstream is None:
+                jobs[account.id] = ('POST', 'accounts', None, data)
+                continue
+            # only fields the listing returns can be compared
+            diff = {
+                key: value for key, value in data.items()
+                if key in PUSH_FIELDS and key in upstream and _norm(key, value) != _norm(key, upstream[key])
+            }
+            # text fields cleared in Odoo are cleared upstream too
+            diff.update({
+                key: '' for key in PUSH_FIELDS
+                if key not in data and key != 'tariff_plan' and _norm(key, upstream.get(key))
+            })
+            if diff:
+                jobs[account.id] = ('PUT', 'users', account.login, diff)
 
-            return {
-                'type': 'ir.actions.client',
-                'tag': 'display_notification',
-                'params': {
-                    'title': _('Reboot Sent'),
-                    'message': _('Reboot command sent to %s') % self.login,
-                    'type': 'info',
+            vals = {
+                key: value for key, value in self._ministra_pull_vals(upstream, tariffs, PULL_FIELDS).items()
+                if _norm(key, value) != _norm(key, fields.Datetime.to_string(account[key])
+                                              if key == 'last_active' else account[key])
+            }
+            if vals:
+                pulls.setdefault(tuple(sorted(vals.items())), []).append(account.id)
+
+        errors = {}
+        if jobs:
+            workers = int(self.env['ir.config_parameter'].sudo().get_param(
+                'ministra_manager.reconcile_workers', 8))
+            endpoint = company._ministra_endpoint()
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as executor:
+                futures = {
+                    executor.submit(_ministra_job, endpoint, *job): account_id
+                    for account_id, job in jobs.items()
                 }
+                for future in as_completed(futures):
+                    error = future.result()
+                    if error:
+                        errors[futures[future]] = error
+
+        Account = self.with_context(tracking_disable=True)
+        for vals, account_ids in pulls.items():
+            Account.browse(account_ids).write(dict(vals))
+
+        now = fields.Datetime.now()
+        ok = self - self.browse(list(errors))
+        if ok:
+            ok.with_context(tracking_disable=True).write({
+                'ministra_synced': True,
+                'last_sync_date': now,
+                'last_sync_error': False,
+            })
+        by_error = {}
+        for account_id, error in errors.items():
+            by_error.setdefault(error, []).append(account_id)
+        for error, account_ids in by_error.items():
+            Account.browse(account_ids).write({'last_sync_error': error})
+
+        created = sum(1 for job in jobs.values() if job[0] == 'POST')
+        counters = {
+            'created': created,
+            'updated': len(jobs) - created,
+            'pulled': sum(len(ids) for ids in pulls.values()),
+            'failed': len(errors),
+            'unchanged': len(self) - len(jobs),
+            'unknown': len(remote),
+        }
+        _logger.info("🔁 Ministra reconciliation for %s: %s", company.name, counters)
+        return counters
+
+    def action_reconcile_with_ministra(self):
+        """Reconcile the selected accounts (one Ministra listing per company)."""
+        totals = {}
+        for company in self.company_id:
+            counters = self.filtered(lambda a: a.company_id == company)._reconcile_with_ministra(company)
+            for key, value in counters.items():
+                totals[key] = totals.get(key, 0) + value
+
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Ministra Reconciliation'),
+                'message': _('Created: %(created)d, Updated: %(updated)d, Pulled: %(pulled)d, '
+                             'Unchanged: %(unchanged)d, Failed: %(failed)d') % totals,
+                'type': 'warning' if totals.get('failed') else 'success',
+                'sticky': bool(totals.get('failed')),
             }
+        }
 
-        except Exception as e:
-            _logger.error("❌ Failed to send reboot to %s: %s", self.login, str(e))
-            raise
-
-    def action_reload_portal(self):
-        """Send reload portal event to STB"""
-        self.ensure_one()
-
-        company = self.company_id
-
-        try:
-            company.ministra_api_call('POST', 'send_event', self.login, data={'event': 'reload_portal'})
-
-            _logger.info("🔄 Sent reload_portal event to: %s", self.login)
+    @api.model
+    def cron_reconcile_ministra_accounts(self):
+        """Cron job: reconcile every account of every company with a Ministra API configured"""
+        companies = self.env['res.company'].search([
+            ('ministra_api_base_url', '!=', False)
+        ])
+
+        for company in companies:
+            try:
+                accounts = self.search([('company_id', '=', company.id)])
+                if accounts:
+                    accounts._reconcile_with_ministra(company)
+                self.env.cr.commit()
+            except Exception as e:
+                self.env.cr.rollback()
+                _logger.error("❌ Cron: Failed to reconcile Ministra accounts for company %s: %s",
+                              company.name, str(e))
 
-            self.message_post(
-                body=_('🔄 Reload portal command sent to STB'),
-                subtype_xmlid='mail.mt_note'
-            )
+    # ==================== EVENT SENDING METHODS ====================
 
-            return {
-                'type': 'ir.actions.client',
-                'tag': 'display_notification',
-                'params': {
-                    'title': _('Reload Portal Sent'),
-                    'message': _('Reload portal command sent to %s') % self.login,
-                    'type': 'info',
-                }
+    def _send_stb_event(self, event, **params):
+        """Send one STB event to every account in self.
+
+        Logins are grouped into multi-identifier send_event calls (ICP
+        `ministra_manager.event_batch_size`, default 50), sent concurrently
+        (`ministra_manager.event_workers`, default 4) at no more than
+        `ministra_manager.event_rate` calls per second per company (default 5).
+        Delivery is recorded on each account (last_event_*). Returns {'sent', 'failed'}.
+        """
+        get_param = self.env['ir.config_parameter'].sudo().get_param
+        batch_size = max(1, int(get_param('ministra_manager.event_batch_size', 50)))
+        workers = max(1, int(get_param('ministra_manager.event_workers', 4)))
+        rate = float(get_param('ministra_manager.event_rate', 5))
+        data = dict(params, event=event)
+
+        errors = {}     # account id -> error
+        targets = self.filtered(lambda a: a.ministra_synced and a.login)
+        for account in self - targets:
+            errors[account.id] = _('Not synced to Ministra')
+
+        for company in targets.company_id:
+            accounts = targets.filtered(lambda a: a.company_id == company)
+            by_login = {account.login: account.id for account in accounts}
+            logins = list(by_login)
+            batches = [logins[i:i + batch_size] for i in range(0, len(logins), batch_size)]
+            try:
+                endpoint = company._ministra_endpoint()
+            except Exception as e:
+                errors.update(dict.fromkeys(accounts.ids, str(e)))
+                continue
+            limiter = _RateLimiter(rate)
+            with ThreadPoolExecutor(max_workers=min(workers, len(batches))) as executor:
+                futures = [executor.submit(_event_job, endpoint, limiter, batch, data) for batch in batches]
+                for future in as_completed(futures):
+                    for login, error in future.result().items():
+                        if error:
+                            errors[by_login[login]] = error
+            _logger.info("📡 Sent %s to %d STBs of %s in %d calls (%d failed)",
+                         event, len(logins), company.name, len(batches),
+                         len([i for i in accounts.ids if i in errors]))
+
+        now = fields.Datetime.now()
+        Account = self.with_context(tracking_disable=True)
+        sent = self - self.browse(list(errors))
+        if sent:
+            sent.with_context(tracking_disable=True).write({
+                'last_event': event,
+                'last_event_state': 'sent',
+                'last_event_date': now,
+                'last_event_error': False,
+            })
+        by_error = {}
+        for account_id, error in errors.items():
+            by_error.setdefault(error, []).append(account_id)
+        for error, account_ids in by_error.items():
+            Account.browse(account_ids).write({
+                'last_event': event,
+                'last_event_state': 'failed',
+                'last_event_date': now,
+                'last_event_error': error,
+            })
+        return {'sent': len(sent), 'failed': len(errors)}
+
+    def _stb_event_action(self, event, title, note, **params):
+        """Send an event from a button: chatter note for a single account, summary for a batch."""
+        counters = self._send_stb_event(event, **params)
+        if len(self) == 1:
+            if counters['failed']:
+                raise UserError(_('Failed to send %s to %s:\n%s') % (event, self.login, self.last_event_error))
+            self.message_post(body=note, subtype_xmlid='mail.mt_note')
+            message = _('%s sent to %s') % (title, self.login)
+        else:
+            message = _('Sent: %(sent)d, Failed: %(failed)d') % counters
+
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': title,
+                'message': message,
+                'type': 'warning' if counters['failed'] else 'info',
+                'sticky': bool(counters['failed']) and len(self) > 1,
             }
+        }
 
-        except Exception as e:
-            _logger.error("❌ Failed to send reload_portal to %s: %s", self.login, str(e))
-            raise
+    def action_send_reboot(self):
+        """Send reboot event to the STBs"""
+        return self._stb_event_action('reboot', _('Reboot Sent'), _('🔄 Reboot command sent to STB'))
+
+    def action_reload_portal(self):
+        """Send reload portal event to the STBs"""
+        return self._stb_event_action('reload_portal', _('Reload Portal Sent'),
+                                      _('🔄 Reload portal command sent to STB'))
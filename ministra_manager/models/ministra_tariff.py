@@ -1,10 +1,17 @@
 # -*- coding: utf-8 -*-
+import hashlib
+import json
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from odoo.addons.ab_ministra_connector.models.res_company_ministra import ministra_call
 
 _logger = logging.getLogger(__name__)
 
+# Fields taken from GET /tariffs (compared by hash before writing)
+SYNC_FIELDS = ('name', 'user_default', 'days_to_expires', 'description', 'packages_info', 'active')
+
 
 class MinistraTariff(models.Model):
     """Ministra IPTV Tariff Plan (synced from Ministra API)"""
@@ -91,8 +98,75 @@ class MinistraTariff(models.Model):
 
     # ==================== API SYNC METHODS ====================
 
+    @api.model
+    def _tariff_vals(self, tariff_data):
+        """Odoo values for a tariff returned by GET /tariffs (None when it has no id)."""
+        external_id = tariff_data.get('external_id') or tariff_data.get('id')
+        if not external_id:
+            _logger.warning("Skipping tariff without external_id: %s", tariff_data)
+            return None
+        return {
+            'name': tariff_data.get('name', 'Unknown Tariff'),
+            'external_id': str(external_id),
+            'user_default': bool(tariff_data.get('user_default')),
+            'days_to_expires': int(tariff_data.get('days_to_expires') or 0),
+            'description': tariff_data.get('description') or False,
+            'packages_info': str(tariff_data.get('packages', '')),
+            'active': True,
+        }
+
+    @staticmethod
+    def _tariff_hash(vals):
+        """Hash of the synced fields, so unchanged tariffs are not written."""
+        return hashlib.sha1(json.dumps(
+            [vals[key] or False for key in SYNC_FIELDS], sort_keys=True, default=str).encode()).hexdigest()
+
+    @api.model
+    def _apply_ministra_tariffs(self, company, results):
+        """Create / update / archive the company's tariffs from one GET /tariffs result.
+
+        Existing tariffs are loaded once into a map keyed by external_id; new ones are
+        created in one batch, changed ones written, missing ones archived.
+        Returns (created, updated, archived).
+        """
+        existing = {
+            tariff.external_id: tariff
+            for tariff in self.with_context(active_test=False).search([('company_id', '=', company.id)])
+        }
+        now = fields.Datetime.now()
+        sync_vals = {'ministra_synced': True, 'last_sync_date': now, 'last_sync_error': False}
+
+        to_create = {}
+        updated = self.browse()
+        seen = set()
+        for tariff_data in results:
+            vals = self._tariff_vals(tariff_data)
+            if not vals:
+                continue
+            external_id = vals['external_id']
+            seen.add(external_id)
+            tariff = existing.get(external_id)
+            if tariff is None:
+                to_create[external_id] = dict(vals, company_id=company.id, **sync_vals)
+            elif self._tariff_hash(vals) != self._tariff_hash({key: tariff[key] for key in SYNC_FIELDS}):
+                tariff.write(dict(vals, **sync_vals))
+                updated |= tariff
+
+        if to_create:
+            self.create(list(to_create.values()))
+        unchanged = self.browse([t.id for ext, t in existing.items() if ext in seen]) - updated
+        if unchanged:
+            unchanged.write(sync_vals)
+        missing = self.browse([t.id for ext, t in existing.items() if ext not in seen and t.active])
+        if missing:
+            missing.write({'active': False, 'last_sync_date': now})
+
+        _logger.info("📥 Tariffs for %s: %d received, %d created, %d updated, %d archived",
+                     company.name, len(results), len(to_create), len(updated), len(missing))
+        return len(to_create), len(updated), len(missing)
+
     def action_sync_tariffs_from_ministra(self):
-        """Pull all tariff plans from Ministra API and create/update in Odoo"""
+        """Pull all tariff plans from Ministra API and create/update/archive in Odoo"""
         self.ensure_one()
         company = self.company_id
 
@@ -103,46 +177,7 @@ class MinistraTariff(models.Model):
             if not results:
                 raise UserError(_('No tariffs returned from Ministra API'))
 
-            _logger.info("📥 Received %d tariff plans from Ministra", len(results))
-
-            created_count = 0
-            updated_count = 0
-
-            for tariff_data in results:
-                external_id = tariff_data.get('external_id') or tariff_data.get('id')
-                name = tariff_data.get('name', 'Unknown Tariff')
-
-                if not external_id:
-                    _logger.warning("Skipping tariff without external_id: %s", tariff_data)
-                    continue
-
-                # Check if exists
-                existing = self.search([
-                    ('company_id', '=', company.id),
-                    ('external_id', '=', external_id)
-                ], limit=1)
-
-                vals = {
-                    'name': name,
-                    'external_id': external_id,
-                    'company_id': company.id,
-                    'user_default': bool(tariff_data.get('user_default')),
-                    'days_to_expires': int(tariff_data.get('days_to_expires') or 0),
-                    'description': tariff_data.get('description', ''),
-                    'packages_info': str(tariff_data.get('packages', '')),
-                    'ministra_synced': True,
-                    'last_sync_date': fields.Datetime.now(),
-                    'last_sync_error': False,
-                }
-
-                if existing:
-                    existing.write(vals)
-                    updated_count += 1
-                    _logger.info("✏️ Updated tariff: %s (external_id: %s)", name, external_id)
-                else:
-                    self.create(vals)
-                    created_count += 1
-                    _logger.info("✅ Created tariff: %s (external_id: %s)", name, external_id)
+            created_count, updated_count, archived_count = self._apply_ministra_tariffs(company, results)
 
             # Success notification
             return {
@@ -150,7 +185,8 @@ class MinistraTariff(models.Model):
                 'tag': 'display_notification',
                 'params': {
                     'title': _('Tariffs Synced'),
-                    'message': _('Created: %d, Updated: %d') % (created_count, updated_count),
+                    'message': _('Created: %d, Updated: %d, Archived: %d') % (
+                        created_count, updated_count, archived_count),
                     'type': 'success',
                     'sticky': False,
                 }
@@ -163,35 +199,48 @@ class MinistraTariff(models.Model):
 
     @api.model
     def cron_sync_tariffs_from_ministra(self):
-        """Cron job to sync tariffs from all companies"""
+        """Cron job to sync tariffs from all companies.
+
+        GET /tariffs runs for all companies concurrently; results are applied one
+        company at a time in this transaction.
+        """
         companies = self.env['res.company'].search([
             ('ministra_api_base_url', '!=', False)
         ])
 
+        endpoints = {}
         for company in companies:
             try:
-                # Find or create a dummy tariff record to call the sync method
-                # (we need a record to call ensure_one() in action_sync_tariffs_from_ministra)
-                tariff = self.search([('company_id', '=', company.id)], limit=1)
-                if not tariff:
-                    # Create a temporary tariff just to trigger sync
-                    tariff = self.create({
-                        'name': 'Temp',
-                        'external_id': 'temp',
-                        'company_id': company.id,
-                    })
-
-                tariff.action_sync_tariffs_from_ministra()
-
-                # Delete temp if it still exists
-                temp = self.search([
-                    ('company_id', '=', company.id),
-                    ('external_id', '=', 'temp')
-                ])
-                if temp:
-                    temp.unlink()
-
+                endpoints[company.id] = company._ministra_endpoint()
+            except Exception as e:
+                _logger.error("❌ Cron: Failed to sync tariffs for company %s: %s", company.name, str(e))
+        if not endpoints:
+            return
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(8, len(endpoints))) as executor:
+            futures = {
+                executor.submit(ministra_call, base, auth, 'GET', 'tariffs', timeout=timeout): company_id
+                for company_id, (base, auth, timeout) in endpoints.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    results[futures[future]] = e
+
+        for company in companies.filtered(lambda c: c.id in results):
+            result = results[company.id]
+            try:
+                if isinstance(result, Exception):
+                    raise result
+                if not result:
+                    # an empty answer must not archive every tariff
+                    raise UserError(_('No tariffs returned from Ministra API'))
+                self._apply_ministra_tariffs(company, result)
+                self.env.cr.commit()
             except Exception as e:
+                self.env.cr.rollback()
                 _logger.error("❌ Cron: Failed to sync tariffs for company %s: %s",
                               company.name, str(e))
 
@@ -1,2 +1,3 @@
 # -*- coding: utf-8 -*-
 from . import ministra_provision_wizard
+from . import ministra_event_wizard
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+from ..models.ministra_account import STB_EVENTS
+
+
+class MinistraEventWizard(models.TransientModel):
+    """Wizard for sending an STB event to many IPTV accounts"""
+    _name = 'ministra.event.wizard'
+    _description = 'Ministra STB Event Wizard'
+
+    # ==================== FIELDS ====================
+
+    account_ids = fields.Many2many(
+        'ministra.account',
+        string='Accounts',
+        default=lambda self: self.env.context.get('active_ids', [])
+    )
+    account_count = fields.Integer(string='Accounts', compute='_compute_account_count')
+    event = fields.Selection(STB_EVENTS, string='Event', default='reboot', required=True)
+    msg = fields.Text(string='Message', help='Text shown on the STB screen')
+    need_confirm = fields.Boolean(
+        string='Require Confirmation',
+        help='The viewer must confirm the message on the STB'
+    )
+    reboot_after_ok = fields.Boolean(string='Reboot After Confirmation')
+    ttl = fields.Integer(string='Message TTL (seconds)', default=0, help='0 = until confirmed')
+
+    @api.depends('account_ids')
+    def _compute_account_count(self):
+        for rec in self:
+            rec.account_count = len(rec.account_ids)
+
+    # ==================== ACTIONS ====================
+
+    def action_send(self):
+        """Send the event to the selected accounts in batches"""
+        self.ensure_one()
+
+        if not self.account_ids:
+            raise UserError(_('Select at least one IPTV account.'))
+
+        params = {}
+        if self.event == 'send_msg':
+            if not self.msg:
+                raise UserError(_('Message text is required.'))
+            params = {
+                'msg': self.msg,
+                'need_confirm': int(self.need_confirm),
+                'reboot_after_ok': int(self.reboot_after_ok),
+            }
+            if self.ttl:
+                params['ttl'] = self.ttl
+
+        counters = self.account_ids._send_stb_event(self.event, **params)
+
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('STB Event: %s') % dict(STB_EVENTS)[self.event],
+                'message': _('Sent: %(sent)d, Failed: %(failed)d') % counters,
+                'type': 'warning' if counters['failed'] else 'success',
+                'sticky': bool(counters['failed']),
+                'next': {'type': 'ir.actions.act_window_close'},
+            }
+        }
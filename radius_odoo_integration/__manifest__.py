@@ -30,6 +30,7 @@
         'data/ir_sequence.xml',
         'data/product_category.xml',
         'data/ir_cron.xml',  # Cron jobs
+        'data/server_actions.xml',  # Bulk list actions
 
         # 3️⃣ MENU ROOT
         'views/menu.xml',
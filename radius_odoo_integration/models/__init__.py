@@ -5,3 +5,4 @@ from . import sale_order
 from . import account_move
 from . import customer_contract
 from . import contract_template_generator
+from . import asr_radius_user
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields
+
+
+class AsrRadiusUser(models.Model):
+    _inherit = 'asr.radius.user'
+
+    def _reconcile_expected_pools(self):
+        """Expired customers carry a per-user Framed-Pool override (see res.partner.action_move_to_expired_pool)."""
+        today = fields.Date.today()
+        pools = {}
+        for user in self:
+            partner = user.partner_id
+            expired = bool(
+                partner and partner.is_radius_customer and partner.subscription_id
+                and partner.service_paid_until and partner.service_paid_until < today
+            )
+            pools[user.username] = (expired and partner.subscription_id.ip_pool_expired) or False
+        return pools
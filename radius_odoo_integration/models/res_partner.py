@@ -6,6 +6,10 @@ import re
 import secrets
 import string
 
+from odoo.addons.asr_radius_manager.models.radius_bulk import (
+    CHUNK_SIZE, chunked, delete_by_usernames, fetch_online_usernames, fetch_reply_values, insert_rows,
+)
+
 _logger = logging.getLogger(__name__)
 
 _SANITIZE_RE = re.compile(r"[^A-Z0-9]+")
@@ -808,17 +812,22 @@ class ResPartner(models.Model):
             rec.total_sessions_count = Sess.search_count([('username', '=', rec.radius_username)])
 
     def _compute_open_ticket_count(self):
-        """Compute open tickets count for each partner"""
-        for rec in self:
-            if 'ticket.helpdesk' not in self.env:
-                rec.open_ticket_count = 0
-                continue
-            # Count tickets that are not in closing/cancel stages
-            rec.open_ticket_count = self.env['ticket.helpdesk'].search_count([
-                ('customer_id', '=', rec.id),
+        """Compute open tickets count for the whole recordset with one grouped query"""
+        self.open_ticket_count = 0
+        if 'ticket.helpdesk' not in self.env or not self.ids:
+            return
+        # Count tickets that are not in closing/cancel stages
+        groups = self.env['ticket.helpdesk']._read_group(
+            domain=[
+                ('customer_id', 'in', self.ids),
                 ('stage_id.closing_stage', '=', False),
                 ('stage_id.cancel_stage', '=', False),
-            ])
+            ],
+            groupby=['customer_id'],
+            aggregates=['__count'],
+        )
+        for partner, count in groups:
+            partner.open_ticket_count = count
 
     def action_view_sessions(self):
         """Open view of active RADIUS sessions for this customer"""
@@ -884,53 +893,89 @@ class ResPartner(models.Model):
         """
         Update payment statistics from all paid invoices
         Called when invoice is paid to refresh payment totals
-        """
-        for rec in self:
-            # Initialize defaults
-            rec.total_paid_amount = 0.0
-            rec.last_payment_date = False
-            rec.last_payment_amount = 0.0
-            rec.first_payment_date = False
-
-            # Check if account module is installed
-            if 'account.move' not in self.env:
-                continue
 
-            # Get all paid invoices for this customer
-            invoices = self.env['account.move'].search([
-                ('partner_id', '=', rec.id),
-                ('move_type', 'in', ['out_invoice', 'out_refund']),
-                ('state', '=', 'posted'),
-                ('payment_state', 'in', ['paid', 'in_payment'])
-            ])
+        Works on the whole recordset: two aggregate queries on account_move
+        (totals/min/max dates + last amount via DISTINCT ON), then one write per
+        distinct set of values instead of one search per partner.
+        """
+        if not self:
+            return
+        empty = {
+            'total_paid_amount': 0.0,
+            'last_payment_date': False,
+            'last_payment_amount': 0.0,
+            'first_payment_date': False,
+        }
+        if 'account.move' not in self.env:
+            self._write_payment_statistics({rec.id: empty for rec in self})
+            return
 
-            if not invoices:
+        self.env['account.move'].flush_model([
+            'partner_id', 'move_type', 'state', 'payment_state', 'amount_total', 'invoice_date', 'date',
+        ])
+        stats = {rec.id: dict(empty) for rec in self}
+        for ids in self.env.cr.split_for_in_conditions(self.ids):
+            self.env.cr.execute("""
+                SELECT partner_id,
+                       SUM(amount_total) AS total,
+                       MIN(COALESCE(invoice_date, date)) AS first_date,
+                       MAX(COALESCE(invoice_date, date)) AS last_date
+                FROM account_move
+                WHERE partner_id IN %(ids)s
+                  AND move_type IN ('out_invoice', 'out_refund')
+                  AND state = 'posted'
+                  AND payment_state IN ('paid', 'in_payment')
+                GROUP BY partner_id
+            """, {'ids': tuple(ids)})
+            for partner_id, total, first_date, last_date in self.env.cr.fetchall():
+                stats[partner_id].update({
+                    'total_paid_amount': float(total or 0.0),
+                    'first_payment_date': first_date or False,
+                    'last_payment_date': last_date or False,
+                })
+            self.env.cr.execute("""
+                SELECT DISTINCT ON (partner_id) partner_id, amount_total
+                FROM account_move
+                WHERE partner_id IN %(ids)s
+                  AND move_type IN ('out_invoice', 'out_refund')
+                  AND state = 'posted'
+                  AND payment_state IN ('paid', 'in_payment')
+                ORDER BY partner_id, COALESCE(invoice_date, date) DESC, id DESC
+            """, {'ids': tuple(ids)})
+            for partner_id, amount in self.env.cr.fetchall():
+                stats[partner_id]['last_payment_amount'] = float(amount or 0.0)
+
+        self._write_payment_statistics(stats)
+        _logger.info("Updated payment statistics for %d partner(s)", len(self))
+
+    def _write_payment_statistics(self, stats):
+        """Write {partner_id: vals}, skipping unchanged partners and grouping identical values."""
+        fnames = ['total_paid_amount', 'last_payment_date', 'last_payment_amount', 'first_payment_date']
+        by_vals = {}
+        for rec in self:
+            vals = stats[rec.id]
+            if all(rec[f] == vals[f] for f in fnames):
                 continue
+            by_vals.setdefault(tuple(vals[f] for f in fnames), []).append(rec.id)
+        for key, ids in by_vals.items():
+            self.browse(ids).sudo().with_context(_from_radius_write=True).write(dict(zip(fnames, key)))
 
-            # Sum all paid amounts
-            rec.total_paid_amount = sum(invoices.mapped('amount_total'))
-
-            # Sort by date to get first and last
-            sorted_invoices = invoices.sorted(key=lambda inv: inv.invoice_date or inv.date or fields.Date.today())
-
-            # First payment
-            if sorted_invoices:
-                first_inv = sorted_invoices[0]
-                rec.first_payment_date = first_inv.invoice_date or first_inv.date
-
-            # Last payment
-            if sorted_invoices:
-                latest_inv = sorted_invoices[-1]
-                rec.last_payment_date = latest_inv.invoice_date or latest_inv.date
-                rec.last_payment_amount = latest_inv.amount_total
-
-            _logger.info(
-                "Updated payment statistics for partner %s: total=%.2f, last_payment=%.2f on %s",
-                rec.name,
-                rec.total_paid_amount,
-                rec.last_payment_amount,
-                rec.last_payment_date
-            )
+    @api.model
+    def _cron_backfill_payment_statistics(self, batch_size=1000):
+        """Recompute payment statistics for every customer, committing per batch."""
+        last_id = 0
+        processed = 0
+        while True:
+            partners = self.with_context(active_test=False).search(
+                [('id', '>', last_id), ('customer_rank', '>', 0)], order='id', limit=batch_size)
+            if not partners:
+                break
+            partners._update_payment_statistics()
+            self.env.cr.commit()
+            processed += len(partners)
+            last_id = partners[-1].id
+            partners.invalidate_recordset()
+        _logger.info("Backfilled payment statistics for %d partner(s)", processed)
 
     def _compute_payment_balance(self):
         """Compute payment balance from account receivable"""
@@ -941,35 +986,52 @@ class ResPartner(models.Model):
             else:
                 rec.payment_balance = 0.0
 
-    def _compute_sale_invoice_counts(self):
-        """Compute counts of sale orders and invoices"""
-        for rec in self:
-            # Sale orders count
-            if 'sale.order' in self.env:
-                rec.sale_order_count = self.env['sale.order'].search_count([
-                    ('partner_id', 'child_of', rec.id)
-                ])
-            else:
-                rec.sale_order_count = 0
+    def _count_child_of(self, model, partner_field, domain, fname):
+        """Set `fname` to the number of `model` records whose `partner_field` is child_of each partner.
 
-            # Invoices count
-            if 'account.move' in self.env:
-                rec.invoice_count = self.env['account.move'].search_count([
-                    ('partner_id', 'child_of', rec.id),
-                    ('move_type', 'in', ['out_invoice', 'out_refund'])
-                ])
-            else:
-                rec.invoice_count = 0
+        One child_of search + one grouped query for the whole recordset; counts of
+        contacts are rolled up to every ancestor that is part of `self`.
+        """
+        all_partners = self.with_context(active_test=False).search_fetch(
+            [('id', 'child_of', self.ids)], ['parent_id'])
+        groups = self.env[model]._read_group(
+            domain=[(partner_field, 'in', all_partners.ids)] + domain,
+            groupby=[partner_field],
+            aggregates=['__count'],
+        )
+        self_ids = set(self._ids)
+        for partner, count in groups:
+            while partner:
+                if partner.id in self_ids:
+                    partner[fname] += count
+                partner = partner.parent_id
+
+    def _compute_sale_invoice_counts(self):
+        """Compute counts of sale orders and invoices (grouped, not per partner)"""
+        self.sale_order_count = 0
+        self.invoice_count = 0
+        if not self.ids:
+            return
+        # Sale orders count
+        if 'sale.order' in self.env:
+            self._count_child_of('sale.order', 'partner_id', [], 'sale_order_count')
+        # Invoices count
+        if 'account.move' in self.env:
+            self._count_child_of('account.move', 'partner_id',
+                                 [('move_type', 'in', ['out_invoice', 'out_refund'])], 'invoice_count')
 
     def _compute_contract_count(self):
-        """Compute count of customer contracts"""
-        for rec in self:
-            if 'customer.contract' in self.env:
-                rec.contract_count = self.env['customer.contract'].search_count([
-                    ('partner_id', '=', rec.id)
-                ])
-            else:
-                rec.contract_count = 0
+        """Compute count of customer contracts with one grouped query"""
+        self.contract_count = 0
+        if 'customer.contract' not in self.env or not self.ids:
+            return
+        groups = self.env['customer.contract']._read_group(
+            domain=[('partner_id', 'in', self.ids)],
+            groupby=['partner_id'],
+            aggregates=['__count'],
+        )
+        for partner, count in groups:
+            partner.contract_count = count
 
     # ==================== CONSTRAINTS ====================
     # Note: NIPT validation is done in create() and write() methods instead of @api.constrains
@@ -1024,6 +1086,11 @@ class ResPartner(models.Model):
             VALUES (%s, 'Cleartext-Password', ':=', %s)
         """, (username, cleartext_password))
 
+    def _mark_radius_access(self, state):
+        """Keep the linked RADIUS user's access state in step with the group pushed here."""
+        if self.radius_user_id:
+            self.radius_user_id.sudo().with_context(skip_radius_auto_sync=True).write({'radius_access_state': state})
+
     @staticmethod
     def _upsert_radusergroup(cursor, username, groupname):
         cursor.execute("DELETE FROM radusergroup WHERE username=%s", (username,))
@@ -1053,6 +1120,7 @@ class ResPartner(models.Model):
                     self._upsert_radcheck(cur, rec.radius_username, rec.radius_password)
                     self._upsert_radusergroup(cur, rec.radius_username, rec.groupname)
                 conn.commit()
+                rec._mark_radius_access('active')
 
                 rec.sudo().write({
                     'radius_synced': True,
@@ -1146,6 +1214,7 @@ class ResPartner(models.Model):
                     """, (suspended,))
                     self._upsert_radusergroup(cur, rec.radius_username, suspended)
                 conn.commit()
+                rec._mark_radius_access('suspended')
 
                 rec.sudo().write({
                     'radius_synced': True,
@@ -1224,6 +1293,7 @@ class ResPartner(models.Model):
                 with conn.cursor() as cur:
                     self._upsert_radusergroup(cur, rec.radius_username, rec.groupname)
                 conn.commit()
+                rec._mark_radius_access('active')
 
                 rec.sudo().write({
                     'radius_synced': True,
@@ -1370,6 +1440,56 @@ class ResPartner(models.Model):
                 }
             }
 
+    # ==================== BULK RADIUS ACTIONS ====================
+    def _run_bulk_radius_action(self, operation):
+        """Bulk variant of action_suspend / action_reactivate / action_remove_from_radius.
+
+        Delegates to asr.radius.user._radius_bulk_execute on the linked RADIUS users
+        and mirrors the outcome on the partners.
+        """
+        RadiusUser = self.env['asr.radius.user']
+        unlinked = self.filtered(lambda r: not r.radius_user_id)
+        if unlinked:
+            raise UserError(_("Missing linked RADIUS user: %s") % ', '.join(
+                unlinked.mapped(lambda r: r.radius_username or r.display_name)[:20]))
+
+        users = self.radius_user_id
+        done_users, failed, disconnected, groups = users._radius_bulk_execute(operation)
+
+        done_partners = self.filtered(lambda r: r.radius_user_id in done_users)
+        writer = self.sudo().with_context(_from_radius_write=True)
+        if done_partners:
+            writer.browse(done_partners.ids).write({
+                'radius_synced': operation != 'remove',
+                'last_sync_error': False,
+                'last_sync_date': fields.Datetime.now(),
+            })
+        failed_partners = self - done_partners
+        for error in set(failed.values()):
+            vals = {'last_sync_error': error}
+            if operation != 'remove':
+                vals['radius_synced'] = False
+            writer.browse(failed_partners.filtered(lambda r: failed.get(r.radius_user_id.id) == error).ids).write(vals)
+
+        lines = {
+            rec.id: RadiusUser._bulk_summary_line(
+                operation, rec.radius_user_id.username, groups.get(rec.radius_user_id.id),
+                failed.get(rec.radius_user_id.id), rec.radius_user_id.id in disconnected)
+            for rec in self
+        }
+        RadiusUser._bulk_log_summary(self, operation, lines)
+        return RadiusUser._bulk_notification(operation, len(done_partners), len(failed_partners), len(disconnected),
+                                             last_error=next(iter(failed.values()), None))
+
+    def action_bulk_suspend(self):
+        return self._run_bulk_radius_action('suspend')
+
+    def action_bulk_reactivate(self):
+        return self._run_bulk_radius_action('reactivate')
+
+    def action_bulk_remove_from_radius(self):
+        return self._run_bulk_radius_action('remove')
+
     def action_disconnect_user(self):
         """
         Disconnect PPPoE session (delegates to asr.radius.user)
@@ -1705,6 +1825,7 @@ class ResPartner(models.Model):
                     """, (suspended_group,))
                     self._upsert_radusergroup(cur, rec.radius_username, suspended_group)
                 conn.commit()
+                rec._mark_radius_access('suspended')
 
                 rec.sudo().write({
                     'radius_synced': True,
@@ -1987,171 +2108,168 @@ class ResPartner(models.Model):
         return True
 
     @api.model
-    def _cron_move_expired_to_expired_pool(self):
+    def _cron_move_expired_to_expired_pool(self, chunk_size=CHUNK_SIZE):
         """
         Cron job: Move expired services to expired IP pool.
         Runs daily at 06:00 to check for expired customers.
 
-        OPTIMIZED FOR LARGE SCALE (25,000+ customers):
-        1. Batch DB updates (2-3 seconds for all)
-        2. Parallel disconnect (5-10x faster)
-        3. Proper error handling per user
+        Set-based pipeline (25,000+ customers):
+        1. One query for the expired set
+        2. Per chunk: skip users whose radreply already holds the expired pool, then one
+           DELETE ... IN + one multi-row INSERT in a single MySQL transaction
+           (re-running the job only touches what is left → resumable/idempotent)
+        3. Per chunk: one radacct query for the online subset, parallel disconnect of those only
+        4. Chatter notes written in bulk, Odoo committed after every chunk
         """
         import time
-        from concurrent.futures import ThreadPoolExecutor, as_completed
 
         start_time = time.time()
         today = fields.Date.today()
 
-        expired_partners = self.search([
+        expired = self.search_read([
             ('is_radius_customer', '=', True),
             ('radius_synced', '=', True),
             ('service_paid_until', '<', today),
             ('subscription_id', '!=', False),
-        ])
+            ('radius_username', '!=', False),
+        ], ['radius_username', 'subscription_id', 'company_id', 'radius_user_id'], order='id')
 
-        total_count = len(expired_partners)
+        total_count = len(expired)
         _logger.info("🔍 Cron: Found %d expired RADIUS customers to move to expired pool", total_count)
-
-        if not expired_partners:
+        if not expired:
             _logger.info("✅ Cron: No expired customers found")
             return
 
-        # ========== PHASE 1: BATCH DB UPDATES (Fast!) ==========
-        _logger.info("📊 Phase 1/3: Batch updating pools in database...")
-        batch_start = time.time()
-
-        success_count = 0
-        failed_pool_updates = []
-
-        for partner in expired_partners:
-            try:
-                # IMPORTANT: auto_disconnect=False → Skip disconnect in pool update
-                # Disconnect will be done in parallel in Phase 2
-                partner.action_move_to_expired_pool(auto_disconnect=False)
-                success_count += 1
-            except Exception as e:
-                _logger.error("❌ Failed to move partner %s to expired pool: %s", partner.name, str(e))
-                failed_pool_updates.append((partner.id, str(e)))
-
-        batch_duration = time.time() - batch_start
-        _logger.info(
-            "✅ Phase 1 complete: %d/%d pools updated in %.2f seconds (%.0f users/sec)",
-            success_count, total_count, batch_duration, success_count / max(batch_duration, 0.1)
-        )
-
-        # ========== PHASE 2: PARALLEL DISCONNECT (5-10x faster!) ==========
-        _logger.info("⚡ Phase 2/3: Checking active sessions and disconnecting in parallel...")
-        disconnect_start = time.time()
-
-        # Filter partners that need disconnect (have radius_user_id and might be online)
-        partners_to_check = expired_partners.filtered(lambda p: p.radius_user_id)
+        sub_ids = {row['subscription_id'][0] for row in expired}
+        pools = {
+            s['id']: (s['ip_pool_expired'] or '').strip()
+            for s in self.env['asr.subscription'].browse(sub_ids).read(['ip_pool_expired'])
+        }
 
-        _logger.info("🔍 Checking %d users for active sessions...", len(partners_to_check))
+        by_company = {}
+        skipped_no_pool = 0
+        for row in expired:
+            pool = pools.get(row['subscription_id'][0])
+            if not pool:
+                skipped_no_pool += 1
+                continue
+            company_id = row['company_id'][0] if row['company_id'] else self.env.company.id
+            by_company.setdefault(company_id, []).append(
+                (row['id'], row['radius_username'], pool, row['radius_user_id'] and row['radius_user_id'][0])
+            )
+        if skipped_no_pool:
+            _logger.warning("⚠️ %d expired customers skipped: subscription has no expired pool", skipped_no_pool)
 
-        # Thread-safe disconnect function
-        def disconnect_user_safe(partner_id):
-            """Disconnect single user in thread-safe way"""
+        stats = {'moved': 0, 'already': 0, 'failed': 0, 'disconnected': 0, 'disconnect_errors': 0, 'online': 0}
+        for company_id, rows in by_company.items():
+            company = self.env['res.company'].browse(company_id)
+            conn = None
             try:
-                # Get new cursor for thread safety
-                with self.pool.cursor() as cr:
-                    env = api.Environment(cr, self.env.uid, self.env.context)
-                    partner = env['res.partner'].browse(partner_id)
-
-                    if not partner.exists() or not partner.radius_user_id:
-                        return {'partner_id': partner_id, 'status': 'skip', 'reason': 'No radius_user_id'}
-
-                    # Check if has active session
-                    if not partner.radius_user_id._has_active_session():
-                        return {'partner_id': partner_id, 'status': 'skip', 'reason': 'No active session'}
-
-                    # Disconnect
-                    _logger.info("⚡ Disconnecting user %s (online)", partner.radius_username)
-                    partner.radius_user_id.action_disconnect_user()
-
-                    # Update chatter
-                    partner.message_post(
-                        body=_(
-                            "⚡ Auto-disconnect: Service expired, user was online and has been disconnected.<br/>"
-                            "On reconnect: portal access only (payment required for internet)"
-                        ),
-                        subtype_xmlid='mail.mt_note'
-                    )
-
-                    return {'partner_id': partner_id, 'status': 'success', 'username': partner.radius_username}
-
+                conn = company._get_direct_conn()
+                for chunk in chunked(rows, chunk_size):
+                    self._expire_pool_chunk(conn, chunk, stats)
             except Exception as e:
-                _logger.warning("⚠️ Failed to disconnect partner %s: %s", partner_id, str(e))
-                return {'partner_id': partner_id, 'status': 'error', 'error': str(e)}
-
-        # Execute disconnects in parallel (max 10 concurrent)
-        disconnect_results = {
-            'success': 0,
-            'skipped': 0,
-            'errors': 0,
-            'details': []
-        }
-
-        max_workers = 10  # Adjust based on system resources and SSH capacity
-
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all disconnect jobs
-            future_to_partner = {
-                executor.submit(disconnect_user_safe, partner.id): partner.id
-                for partner in partners_to_check
-            }
-
-            # Process results as they complete
-            for future in as_completed(future_to_partner):
-                partner_id = future_to_partner[future]
-                try:
-                    result = future.result(timeout=15)  # 15 sec timeout per disconnect
-
-                    if result['status'] == 'success':
-                        disconnect_results['success'] += 1
-                        _logger.info("✅ Disconnected: %s", result.get('username', partner_id))
-                    elif result['status'] == 'skip':
-                        disconnect_results['skipped'] += 1
-                    else:
-                        disconnect_results['errors'] += 1
-                        disconnect_results['details'].append(result)
-
-                except Exception as e:
-                    disconnect_results['errors'] += 1
-                    _logger.error("❌ Disconnect future failed for partner %s: %s", partner_id, str(e))
-
-        disconnect_duration = time.time() - disconnect_start
-        _logger.info(
-            "✅ Phase 2 complete: %d disconnected, %d skipped (offline), %d errors in %.2f seconds",
-            disconnect_results['success'],
-            disconnect_results['skipped'],
-            disconnect_results['errors'],
-            disconnect_duration
-        )
+                _logger.error("❌ Expired-pool pipeline aborted for company %s: %s", company.name, e)
+            finally:
+                if conn:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
 
-        # ========== PHASE 3: SUMMARY ==========
         total_duration = time.time() - start_time
-
         _logger.info("=" * 80)
         _logger.info("✅ CRON COMPLETE: Expired customers processed")
         _logger.info("📊 Total customers: %d", total_count)
-        _logger.info("✅ Pool updates: %d success, %d failed", success_count, len(failed_pool_updates))
-        _logger.info("⚡ Disconnects: %d success, %d skipped, %d errors",
-                    disconnect_results['success'],
-                    disconnect_results['skipped'],
-                    disconnect_results['errors'])
+        _logger.info("✅ Pool updates: %d moved, %d already in expired pool, %d failed, %d skipped (no pool)",
+                     stats['moved'], stats['already'], stats['failed'], skipped_no_pool)
+        _logger.info("⚡ Disconnects: %d online, %d disconnected, %d errors",
+                     stats['online'], stats['disconnected'], stats['disconnect_errors'])
         _logger.info("⏱️ Total time: %.2f seconds (%.1f customers/sec)",
-                    total_duration,
-                    total_count / max(total_duration, 0.1))
+                     total_duration, total_count / max(total_duration, 0.1))
         _logger.info("=" * 80)
 
-        # Log errors for troubleshooting
-        if failed_pool_updates:
-            _logger.warning("⚠️ Pool update failures: %s", failed_pool_updates[:10])
+    def _expire_pool_chunk(self, conn, chunk, stats):
+        """Move one chunk of (partner_id, username, pool, radius_user_id) to the expired pool.
 
-        if disconnect_results['details']:
-            _logger.warning("⚠️ Disconnect errors: %s", disconnect_results['details'][:10])
+        Users already carrying the expired pool in radreply are skipped, so the job can be
+        re-run after a crash; the radreply change is one MySQL transaction per chunk.
+        """
+        try:
+            with conn.cursor() as cur:
+                current = fetch_reply_values(cur, [row[1] for row in chunk], 'Framed-Pool')
+        except Exception as e:
+            stats['failed'] += len(chunk)
+            _logger.error("❌ Failed to read current pools for %d users: %s", len(chunk), e)
+            return
+        pending = [row for row in chunk if current.get(row[1]) != row[2]]
+        stats['already'] += len(chunk) - len(pending)
+        if not pending:
+            return
+        chunk = pending
+        usernames = [username for _pid, username, _pool, _ruid in chunk]
+
+        try:
+            conn.begin()
+            with conn.cursor() as cur:
+                delete_by_usernames(cur, 'radreply', usernames, attribute='Framed-Pool')
+                insert_rows(cur, 'radreply', ('username', 'attribute', 'op', 'value'),
+                            [(username, 'Framed-Pool', ':=', pool) for _pid, username, pool, _ruid in chunk])
+            conn.commit()
+        except Exception as e:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            stats['failed'] += len(chunk)
+            _logger.error("❌ Failed to move %d users to expired pool: %s", len(chunk), e)
+            return
 
+        partners = self.browse([pid for pid, _u, _p, _r in chunk])
+        stats['moved'] += len(chunk)
+
+        online = set()
+        try:
+            with conn.cursor() as cur:
+                online = set(fetch_online_usernames(cur, usernames))
+        except Exception as e:
+            _logger.warning("⚠️ Could not read online sessions from radacct: %s", e)
+        stats['online'] += len(online)
+
+        disconnected = set()
+        to_disconnect = [(pid, ruid) for pid, username, _pool, ruid in chunk if username in online and ruid]
+        if to_disconnect:
+            results = self.env['asr.radius.user']._disconnect_users_parallel([ruid for _pid, ruid in to_disconnect])
+            for _pid, ruid in to_disconnect:
+                if results.get(ruid) == 'success':
+                    disconnected.add(ruid)
+                else:
+                    stats['disconnect_errors'] += 1
+            stats['disconnected'] += len(disconnected)
+
+        bodies = {}
+        for pid, username, pool, ruid in chunk:
+            if ruid in disconnected:
+                bodies[pid] = _(
+                    "⚡ Service expired - moved to expired IP pool (no internet).<br/>"
+                    "Pool: %s<br/>"
+                    "User was online and has been disconnected.<br/>"
+                    "On reconnect: portal access only (payment required for internet)"
+                ) % pool
+            else:
+                bodies[pid] = _(
+                    "Service expired - moved to expired IP pool (no internet).<br/>"
+                    "Pool: %s<br/>"
+                    "Customer can access portal to make payment"
+                ) % pool
+        try:
+            partners._message_log_batch(bodies=bodies)
+        except Exception as e:
+            _logger.warning("Failed to log expired-pool notes: %s", e)
+
+        self.env.cr.commit()
+        _logger.info("✅ Moved %d users to expired pool (%d online, %d disconnected)",
+                     len(chunk), len(online), len(disconnected))
 
     def action_view_sessions(self):
         return self.action_view_active_sessions()
\ No newline at end of file